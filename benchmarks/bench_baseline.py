@@ -0,0 +1,48 @@
+"""
+Measures how fast spectra are added to and scored against an incremental
+baseline, and how long a persisted baseline takes to load.
+
+Run with `python -m benchmarks.bench_baseline`.
+"""
+
+import tempfile
+import time
+
+import numpy as np
+
+from t8_client.baseline import BaselineStore
+
+N_SPECTRA = 1000
+N_BINS = (2048, 16384)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for n_bins in N_BINS:
+        spectra = rng.random((N_SPECTRA, n_bins))
+        with tempfile.TemporaryDirectory() as root:
+            store = BaselineStore(root)
+
+            start = time.perf_counter()
+            for spectrum in spectra:
+                store.update("M1", "P1", "PM1", spectrum)
+            update = (time.perf_counter() - start) / N_SPECTRA
+
+            start = time.perf_counter()
+            for spectrum in spectra[:100]:
+                store.score("M1", "P1", "PM1", spectrum)
+            score = (time.perf_counter() - start) / 100
+
+            store.save()
+            start = time.perf_counter()
+            BaselineStore(root).get("M1", "P1", "PM1")
+            load = time.perf_counter() - start
+
+        print(
+            f"{n_bins:>6} bins  update {update * 1e6:>8.1f} us"
+            f"  score {score * 1e6:>8.1f} us  load {load * 1000:>6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
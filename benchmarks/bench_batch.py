@@ -0,0 +1,63 @@
+"""
+Compares the throughput of the preprocess -> spectrum path on a mixed workload
+(captures of several lengths and sample rates) computed one capture at a time and
+with the batch planner, against the planner on a single-length workload.
+
+Run with `python -m benchmarks.bench_batch`.
+"""
+
+import time
+
+import numpy as np
+
+from t8_client.batch import calculate_spectra
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+N_CAPTURES = 256
+LENGTHS = (8192, 10000, 16384)
+SAMPLE_RATES = (12800, 25600)
+
+
+def _per_capture(waveforms, sample_rates):
+    return [
+        calculate_spectrum(preprocess_waveform(waveform), sample_rate, 0, 5000)
+        for waveform, sample_rate in zip(waveforms, sample_rates, strict=True)
+    ]
+
+
+def _batched(waveforms, sample_rates):
+    return calculate_spectra(waveforms, sample_rates, 0, 5000)
+
+
+def _best(function, *args):
+    function(*args)
+    times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    lengths = rng.choice(LENGTHS, N_CAPTURES)
+    sample_rates = rng.choice(SAMPLE_RATES, N_CAPTURES)
+    # Waveforms as returned by get_data: float32
+    mixed = [rng.standard_normal(n).astype(np.float32) for n in lengths]
+    single = [rng.standard_normal(LENGTHS[-1]).astype(np.float32)] * N_CAPTURES
+    samples = sum(lengths)
+
+    for name, function, waveforms, rates in (
+        ("per capture, mixed", _per_capture, mixed, sample_rates),
+        ("batched, mixed", _batched, mixed, sample_rates),
+        ("batched, single length", _batched, single, [SAMPLE_RATES[-1]] * N_CAPTURES),
+    ):
+        seconds = _best(function, waveforms, rates)
+        n = samples if waveforms is mixed else LENGTHS[-1] * N_CAPTURES
+        print(f"{name:<24} {seconds * 1000:>8.1f} ms {n / seconds / 1e6:>8.1f} MS/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares bulk downloads from a stand-in device that only serves a few requests
+at once: a fixed pool of threads hammering the device versus the adaptive
+request scheduler of the client.
+
+Run with `python -m benchmarks.bench_bulk_fetch`.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client import get_data
+from t8_client.scheduler import RequestScheduler
+from t8_client.util.timestamp import timestamp_to_iso_string
+
+N_CAPTURES = 200
+
+
+def main():
+    device = StandInDevice(n_captures=N_CAPTURES, n_samples=4096)
+    times = [timestamp_to_iso_string(t) for t in device.timestamps]
+
+    with StandInServer({"t8": device}, latency=0.02, capacity=4) as server:
+        params = server.params()
+        base = f"http://{server.address}/t8/rest/waves/LP_Turbine/MAD31CY005/AM1"
+
+        with requests.Session() as session:
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=32)
+            session.mount("http://", adapter)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                statuses = list(
+                    executor.map(
+                        lambda t: session.get(f"{base}/{t}").status_code,
+                        device.timestamps,
+                    )
+                )
+            elapsed = time.perf_counter() - start
+        failed = sum(status != 200 for status in statuses)
+        print(
+            f"{'32 threads, no scheduler':<28} {elapsed:>7.2f} s"
+            f" {failed:>5} failed captures {server.rejected:>5} rejected requests"
+        )
+
+        server.reset_counters()
+        scheduler = RequestScheduler(max_limit=16)
+        with requests.Session() as session:
+            session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=16))
+            start = time.perf_counter()
+            captures = get_data.get_captures(
+                "waves", times, **params, session=session, scheduler=scheduler
+            )
+            elapsed = time.perf_counter() - start
+        limit = scheduler.limiter(server.address).limit
+        print(
+            f"{'adaptive scheduler':<28} {elapsed:>7.2f} s"
+            f" {N_CAPTURES - len(captures):>5} failed captures"
+            f" {server.rejected:>5} rejected requests (final limit {limit:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measures the bytes transferred and the latency of repeated listing refreshes with
+and without ETag/Last-Modified revalidation. Both cases use the default headers
+of `requests`, which already negotiate gzip/deflate.
+
+Run with `python -m benchmarks.bench_conditional_requests`.
+"""
+
+import time
+
+import requests
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client import get_data
+
+REPEATS = 20
+
+
+class PlainSession(requests.Session):
+    """
+    Session that drops the revalidation headers of the client, to reproduce the
+    previous behaviour of downloading every listing in full.
+    """
+
+    def get(self, url, **kwargs):
+        kwargs["headers"] = {}
+        return super().get(url, **kwargs)
+
+
+def _measure(server, params, label):
+    server.reset_counters()
+    get_data.clear_conditional_cache()
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        list(get_data.get_wave_list(**params))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {server.bytes_sent / REPEATS:>12.0f} B/refresh"
+        f" {elapsed / REPEATS * 1000:>9.2f} ms/refresh"
+    )
+
+
+def main():
+    devices = {"t8": StandInDevice(n_captures=2000)}
+    with StandInServer(devices) as server:
+        params = server.params()
+        with PlainSession() as session:
+            _measure(server, {**params, "session": session}, "plain (no revalidation)")
+        _measure(server, params, "ETag revalidation")
+
+        with requests.Session() as session:
+            _measure(server, {**params, "session": session}, "... with pooled session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the latency of `t8-client` commands run as separate processes, as shell
+pipelines do, with and without the background daemon.
+
+The commands replay a local payload store (`--source archive`), so the numbers
+measure the per-process setup the daemon saves and not the network.
+
+Run with `python -m benchmarks.bench_daemon`.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from t8_client.capture import WaveCapture
+from t8_client.daemon import is_running
+from t8_client.store import PayloadStore
+
+N_WAVES = 50
+N_SAMPLES = 65536
+REPEATS = 10
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "list-waves": ["list-waves", "-p", "M1:P1:PM1"],
+    "get-wave": ["get-wave", "-p", "M1:P1:PM1", "-t", "1970-01-01T00:00:10"],
+    "stats": ["stats", "-p", "M1:P1:PM1", "-e", "1970-01-01T00:00:10"],
+}
+
+
+def _record(root):
+    rng = np.random.default_rng(0)
+    with PayloadStore(root) as store:
+        for timestamp in range(N_WAVES):
+            samples = (rng.standard_normal(N_SAMPLES) * 3000).astype(np.int16)
+            payload = zlib.compress(samples.tobytes())
+            capture = WaveCapture("M1", "P1", "PM1", timestamp, payload, 0.001, 25600)
+            store.put("t8", capture)
+
+
+def _latency(args, env, cwd):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "t8_client.daemon", *args],
+            env=env,
+            cwd=cwd,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        _record(os.path.join(directory, "store"))
+        socket = os.path.join(directory, "t8.sock")
+        env = {
+            **os.environ,
+            "PYTHONPATH": ROOT,
+            "ID": "t8",
+            "T8_SOURCE": "archive",
+            "T8_STORE": os.path.join(directory, "store"),
+            "T8_DAEMON_SOCKET": socket,
+        }
+
+        without = {
+            name: _latency(args, {**env, "T8_NO_DAEMON": "1"}, directory)
+            for name, args in COMMANDS.items()
+        }
+
+        daemon = subprocess.Popen(
+            [sys.executable, "-m", "t8_client.daemon", "daemon"],
+            env=env,
+            cwd=directory,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while not is_running(socket):
+                time.sleep(0.05)
+            with_daemon = {
+                name: _latency(args, env, directory) for name, args in COMMANDS.items()
+            }
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+        for name in COMMANDS:
+            print(
+                f"{name:<12} without daemon {without[name] * 1000:>7.1f} ms,"
+                f" with daemon {with_daemon[name] * 1000:>6.1f} ms"
+                f" ({without[name] / with_daemon[name]:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
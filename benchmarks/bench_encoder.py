@@ -0,0 +1,86 @@
+"""
+Compares the size and the encode/decode throughput of a series of spectra stored
+in the compact container with several codecs, levels and delta encoding, against
+float32 `.npy`.
+
+Run with `python -m benchmarks.bench_encoder`.
+"""
+
+import io
+import time
+
+import numpy as np
+
+from t8_client.util.encoder import choose_factor, decode_series, encode_series
+
+N_SPECTRA = 500
+N_LINES = 3200
+
+CONFIGURATIONS = [
+    {"codec": "zlib", "level": 1},
+    {"codec": "zlib", "level": 6},
+    {"codec": "zlib", "level": 9},
+    {"codec": "lzma", "level": 6},
+    {"codec": "zlib", "level": 6, "delta": True},
+    {"codec": "lzma", "level": 6, "delta": True},
+]
+
+
+def _series(rng):
+    """
+    A slowly changing history of machine spectra: a few harmonics over a noise
+    floor, with a slowly drifting amplitude and a small measurement noise.
+    """
+    freqs = np.arange(N_LINES)
+    base = 0.01 + sum(
+        amplitude * np.exp(-(((freqs - 50 * k) / 2.0) ** 2))
+        for k, amplitude in enumerate([1.0, 0.5, 0.3, 0.2], start=1)
+    )
+    drift = 1 + 0.1 * np.sin(np.linspace(0, 3, N_SPECTRA))[:, None]
+    noise = 1 + 0.001 * rng.standard_normal((N_SPECTRA, N_LINES))
+    return (base * drift * noise).astype(np.float32)
+
+
+def _best(function, *args):
+    times = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def _save_npy(series):
+    buffer = io.BytesIO()
+    np.save(buffer, series)
+    return buffer.getvalue()
+
+
+def main():
+    series = _series(np.random.default_rng(0))
+    megabytes = series.nbytes / 1e6
+
+    npy, encode = _best(_save_npy, series)
+    _, decode = _best(lambda data: np.load(io.BytesIO(data)), npy)
+    print(
+        f"{'float32 .npy':<24} {len(npy) / 2**20:>7.2f} MiB {1.0:>6.1f}x"
+        f" {megabytes / encode:>8.0f} MB/s enc {megabytes / decode:>8.0f} MB/s dec"
+    )
+
+    for options in CONFIGURATIONS:
+        container, encode = _best(lambda s, o=options: encode_series(s, **o), series)
+        decoded, decode = _best(decode_series, container)
+        error = np.max(np.abs(decoded - series)) / choose_factor(series)
+        name = f"{options['codec']} {options['level']}" + (
+            " delta" if options.get("delta") else ""
+        )
+        print(
+            f"{name:<24} {len(container) / 2**20:>7.2f} MiB"
+            f" {len(npy) / len(container):>6.1f}x"
+            f" {megabytes / encode:>8.0f} MB/s enc {megabytes / decode:>8.0f} MB/s dec"
+            f"  (max error {error:.2f} factor)"
+        )
+
+
+if __name__ == "__main__":
+    main()
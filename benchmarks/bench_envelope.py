@@ -0,0 +1,61 @@
+"""
+Measures the envelope spectrum throughput in captures per second on one core,
+comparing the batched frequency domain pipeline with a per-capture time domain
+pipeline (`sosfiltfilt` + `hilbert` + `calculate_spectrum`).
+
+Run with `python -m benchmarks.bench_envelope`.
+"""
+
+import time
+
+import numpy as np
+from scipy.signal import butter, hilbert, sosfiltfilt
+
+from t8_client.envelope import calculate_envelope_spectrum
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+SAMPLE_RATE = 25600
+BAND = (3000, 5000)
+BATCH = 64
+
+
+def _per_capture(waveforms):
+    sos = butter(4, BAND, btype="bandpass", fs=SAMPLE_RATE, output="sos")
+    for waveform in waveforms:
+        envelope = np.abs(hilbert(sosfiltfilt(sos, waveform)))
+        envelope -= envelope.mean()
+        calculate_spectrum(preprocess_waveform(envelope), SAMPLE_RATE, 0, 500)
+
+
+def _report(label, n_samples, function):
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<22} {n_samples:>8} samples {BATCH / best:>10.1f} captures/s")
+
+
+def main():
+    rng = np.random.default_rng(0)
+    for n_samples in (4096, 16384, 65536):
+        waveforms = rng.standard_normal((BATCH, n_samples))
+        single = waveforms.astype(np.float32)
+        _report("per-capture scipy", n_samples, lambda w=waveforms: _per_capture(w))
+        _report(
+            "batched float64",
+            n_samples,
+            lambda w=waveforms: calculate_envelope_spectrum(
+                w, SAMPLE_RATE, BAND, 0, 500
+            ),
+        )
+        _report(
+            "batched float32",
+            n_samples,
+            lambda w=single: calculate_envelope_spectrum(w, SAMPLE_RATE, BAND, 0, 500),
+        )
+
+
+if __name__ == "__main__":
+    main()
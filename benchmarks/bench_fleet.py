@@ -0,0 +1,64 @@
+"""
+Compares fetching the latest wave of every tag of a fleet of stand-in T8 hosts one
+device at a time, like separately configured CLI runs, with the fan-out of
+`t8_client.fleet.Fleet`.
+
+Run with `python -m benchmarks.bench_fleet`.
+"""
+
+import time
+from contextlib import ExitStack
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client import get_data
+from t8_client.fleet import Fleet
+
+N_HOSTS = 16
+N_TAGS = 4
+
+
+def latest_wave(**params):
+    times = list(get_data.list_captures("waves", **params))
+    return get_data.get_wave_capture(**params, time=max(times))
+
+
+def main():
+    tags = [f"LP_Turbine:P{i}:AM1" for i in range(N_TAGS)]
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(
+                StandInServer(
+                    {"t8": StandInDevice(n_captures=50, n_samples=8192)},
+                    latency=0.02,
+                    capacity=2,
+                )
+            )
+            for _ in range(N_HOSTS)
+        ]
+        profiles = {
+            f"t8-{i}": {**server.params(), "max_connections": 2, "tags": tags}
+            for i, server in enumerate(servers)
+        }
+
+        start = time.perf_counter()
+        for profile in profiles.values():
+            with Fleet({"device": profile}) as fleet:
+                for _ in fleet.run(latest_wave, devices=["device"]):
+                    pass
+        sequential = time.perf_counter() - start
+        print(f"{'one device at a time':<24} {sequential:>7.2f} s")
+
+        start = time.perf_counter()
+        with Fleet(profiles) as fleet:
+            results = list(fleet.run(latest_wave))
+        elapsed = time.perf_counter() - start
+        failed = sum(isinstance(result, Exception) for _, _, result in results)
+        print(
+            f"{'fleet fan-out':<24} {elapsed:>7.2f} s"
+            f" ({len(results)} captures from {N_HOSTS} hosts, {failed} failed,"
+            f" {sequential / elapsed:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures angle-domain resampling and order spectra on million-sample captures,
+comparing the vectorized batch path with a per-capture loop that filters each
+capture and resamples it with `np.interp`.
+
+Run with `python -m benchmarks.bench_order_tracking`.
+"""
+
+import time
+
+import numpy as np
+
+from t8_client.order_tracking import (
+    _anti_alias,
+    _revolutions,
+    angle_domain_resample,
+    calculate_order_spectrum,
+)
+
+SAMPLE_RATE = 51200
+N_SAMPLES = 1_000_000
+BATCH = 8
+SAMPLES_PER_REV = 64
+
+
+def _loop_resample(waveforms, speeds):
+    resampled = []
+    for waveform, speed in zip(waveforms, speeds, strict=True):
+        waveform = _anti_alias(waveform, SAMPLE_RATE, speed, SAMPLES_PER_REV)
+        revolutions = _revolutions(speed, N_SAMPLES, SAMPLE_RATE)
+        angles = np.arange(int(revolutions[-1] * SAMPLES_PER_REV) + 1) / SAMPLES_PER_REV
+        resampled.append(np.interp(angles, revolutions, waveform))
+    return resampled
+
+
+def _time(label, function, repeats=3):
+    best = min(_elapsed(function) for _ in range(repeats))
+    print(
+        f"{label:<34} {best * 1000:>9.1f} ms"
+        f" {BATCH * N_SAMPLES / best / 1e6:>8.1f} Msamples/s"
+    )
+
+
+def _elapsed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(0)
+    waveforms = rng.standard_normal((BATCH, N_SAMPLES))
+    speeds = np.linspace(
+        rng.uniform(600, 1200, BATCH), rng.uniform(2400, 3000, BATCH), N_SAMPLES, axis=1
+    )
+
+    _time("loop np.interp (variable speed)", lambda: _loop_resample(waveforms, speeds))
+    _time(
+        "batch resample (variable speed)",
+        lambda: angle_domain_resample(waveforms, SAMPLE_RATE, speeds, SAMPLES_PER_REV),
+    )
+    _time(
+        "batch resample (shared profile)",
+        lambda: angle_domain_resample(
+            waveforms, SAMPLE_RATE, speeds[0], SAMPLES_PER_REV
+        ),
+    )
+    _time(
+        "batch resample (constant RPM)",
+        lambda: angle_domain_resample(waveforms, SAMPLE_RATE, 1800.0, SAMPLES_PER_REV),
+    )
+    _time(
+        "batch order spectrum (variable)",
+        lambda: calculate_order_spectrum(waveforms, SAMPLE_RATE, speeds, 20),
+    )
+
+
+if __name__ == "__main__":
+    main()
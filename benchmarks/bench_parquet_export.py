@@ -0,0 +1,72 @@
+"""
+Compares the throughput and on-disk size of exporting a series of captures as one
+CSV file per capture and as a partitioned Parquet dataset (float32 and float16).
+
+Run with `python -m benchmarks.bench_parquet_export`.
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client.export import export_parquet
+from t8_client.util.csv import save_array_to_csv
+from t8_client.util.parquet import ParquetCaptureWriter
+
+N_CAPTURES = 200
+N_SAMPLES = 8192
+START = 1554907724
+
+
+def _directory_size(path) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _report(label, elapsed, path):
+    print(
+        f"{label:<22} {N_CAPTURES / elapsed:>10.1f} captures/s"
+        f" {_directory_size(path) / 1e6:>10.2f} MB"
+    )
+
+
+def main():
+    rng = np.random.default_rng(0)
+    captures = [
+        (START + i * 600, rng.standard_normal(N_SAMPLES).astype(np.float32))
+        for i in range(N_CAPTURES)
+    ]
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "csv")
+        start = time.perf_counter()
+        for timestamp, samples in captures:
+            save_array_to_csv(
+                os.path.join(path, f"{timestamp}.csv"), samples, "Samples"
+            )
+        _report("csv", time.perf_counter() - start, path)
+
+        for dtype in ("float32", "float16"):
+            path = os.path.join(root, dtype)
+            start = time.perf_counter()
+            with ParquetCaptureWriter(path, dtype=dtype) as writer:
+                for timestamp, samples in captures:
+                    writer.write("M1", "P1", "PM1", timestamp, samples, 1.0, 2560)
+            _report(f"parquet {dtype}", time.perf_counter() - start, path)
+
+        devices = {"t8": StandInDevice(n_captures=N_CAPTURES, n_samples=N_SAMPLES)}
+        with StandInServer(devices) as server:
+            path = os.path.join(root, "end-to-end")
+            start = time.perf_counter()
+            export_parquet(path, **server.params())
+            _report("stand-in -> parquet", time.perf_counter() - start, path)
+
+
+if __name__ == "__main__":
+    main()
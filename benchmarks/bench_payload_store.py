@@ -0,0 +1,61 @@
+"""
+Measures the disk footprint of the payload store against decoded float arrays, and
+the time to read captures back from it compared with fetching them from a stand-in
+T8.
+
+Run with `python -m benchmarks.bench_payload_store`.
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import requests
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client import get_data
+from t8_client.store import PayloadStore
+from t8_client.util.timestamp import timestamp_to_iso_string
+
+N_CAPTURES = 300
+N_SAMPLES = 16384
+
+
+def _read_all(times, params):
+    start = time.perf_counter()
+    total = 0.0
+    for time_ in times:
+        waveform, _ = get_data.get_wave(**params, time=time_)
+        total += float(waveform[0])
+    return time.perf_counter() - start
+
+
+def main():
+    device = StandInDevice(n_captures=N_CAPTURES, n_samples=N_SAMPLES)
+    times = [timestamp_to_iso_string(t) for t in device.timestamps]
+
+    with (
+        tempfile.TemporaryDirectory() as root,
+        StandInServer({"t8": device}) as server,
+        requests.Session() as session,
+    ):
+        params = server.params(session=session)
+        with PayloadStore(root) as store:
+            fetched = _read_all(times, {**params, "store": store})
+            stored = _read_all(times, {**params, "store": store, "offline": True})
+            size = os.path.getsize(os.path.join(root, PayloadStore.DATA_FILE))
+            size += os.path.getsize(os.path.join(root, PayloadStore.INDEX_FILE))
+
+    float32 = N_CAPTURES * N_SAMPLES * np.dtype(np.float32).itemsize
+    float64 = N_CAPTURES * N_SAMPLES * np.dtype(np.float64).itemsize
+    print(f"{N_CAPTURES} waves of {N_SAMPLES} samples")
+    print(f"{'payload store':<16} {size / 2**20:>8.1f} MiB")
+    print(f"{'float32 arrays':<16} {float32 / 2**20:>8.1f} MiB ({float32 / size:.1f}x)")
+    print(f"{'float64 arrays':<16} {float64 / 2**20:>8.1f} MiB ({float64 / size:.1f}x)")
+    print(f"{'fetch + store':<16} {fetched:>8.2f} s")
+    print(f"{'read from store':<16} {stored:>8.2f} s ({fetched / stored:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
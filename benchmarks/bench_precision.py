@@ -0,0 +1,55 @@
+"""
+Compares the time and peak memory of the preprocess -> spectrum path on a large
+batch of captures in float64 (the default) and in float32.
+
+Run with `python -m benchmarks.bench_precision`.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+BATCH = 64
+N_SAMPLES = 65536
+SAMPLE_RATE = 25600
+
+
+def _process(waveforms, dtype):
+    return calculate_spectrum(
+        preprocess_waveform(waveforms, dtype=dtype), SAMPLE_RATE, 0, 10000
+    )
+
+
+def main():
+    rng = np.random.default_rng(0)
+    # Waveforms as returned by get_data: float32
+    waveforms = rng.standard_normal((BATCH, N_SAMPLES)).astype(np.float32)
+    reference, _ = _process(waveforms, np.float64)
+
+    for dtype in (np.float64, np.float32):
+        _process(waveforms, dtype)
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            _process(waveforms, dtype)
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        spectra, _ = _process(waveforms, dtype)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        error = np.max(np.abs(spectra - reference)) / np.max(reference)
+        print(
+            f"{np.dtype(dtype).name:<8} {min(times) * 1000:>8.1f} ms"
+            f" {peak / 2**20:>8.1f} MiB peak"
+            f"  (max error {error:.1e} of the peak)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares the time and peak memory of computing the overall values of long waves
+from the full decoded float array and with the streaming statistics engine.
+
+Run with `python -m benchmarks.bench_stats`.
+"""
+
+import time
+import tracemalloc
+import zlib
+
+import numpy as np
+from scipy.stats import kurtosis
+
+from t8_client.capture import WaveCapture
+from t8_client.stats import capture_statistics
+
+N_WAVES = 8
+N_SAMPLES = 2**22
+
+
+def _full_array(capture):
+    # What callers of `get_wave` do today: the scaled float array and one
+    # temporary per expression
+    wave = capture.data
+    rms = np.sqrt(np.mean(wave**2))
+    peak = np.max(np.abs(wave))
+    return {
+        "rms": rms,
+        "peak": peak,
+        "peak_to_peak": np.ptp(wave),
+        "crest_factor": peak / rms,
+        "kurtosis": kurtosis(wave, fisher=False),
+    }
+
+
+def _measure(function, captures):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for capture in captures:
+        function(capture)
+        capture.release()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    rng = np.random.default_rng(0)
+    captures = []
+    for i in range(N_WAVES):
+        samples = (rng.standard_normal(N_SAMPLES) * 3000).astype(np.int16)
+        payload = zlib.compress(samples.tobytes(), 1)
+        captures.append(WaveCapture("M1", "P1", "PM1", i, payload, 0.001, 25600))
+
+    for name, function in (
+        ("full array", _full_array),
+        ("streaming", capture_statistics),
+    ):
+        seconds, peak = _measure(function, captures)
+        print(
+            f"{name:<12} {seconds * 1000 / N_WAVES:>8.1f} ms/wave"
+            f" {peak / 2**20:>8.1f} MiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
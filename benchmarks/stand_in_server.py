@@ -0,0 +1,241 @@
+"""
+Local stand-in for the REST API of T8 devices, used by the benchmarks.
+
+It serves the waves and spectra listings and captures of any number of simulated
+devices (one per `id` in the URL path) over plain HTTP, supports ETag/Last-Modified
+revalidation and gzip/deflate transfer encoding, and counts the bytes it sends so
+transfer costs can be measured.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+import zlib
+from base64 import b64encode
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def make_payload(samples: np.ndarray) -> tuple[str, float]:
+    """
+    Encodes an array of floats in the T8 "zint" format.
+
+    Args:
+        samples (np.ndarray): The samples to encode.
+
+    Returns:
+        tuple[str, float]: The base64 encoded compressed int16 data and the factor
+            that scales them back to the original units.
+    """
+    peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    factor = peak / 32767 if peak else 1.0
+    quantized = np.round(samples / factor).astype(np.int16)
+    return b64encode(zlib.compress(quantized.tobytes())).decode(), factor
+
+
+class StandInDevice:
+    """
+    Captures stored by a simulated T8 device.
+
+    Args:
+        n_captures (int): Number of captures per machine/point/pmode.
+        n_samples (int): Number of samples of each wave.
+        sample_rate (int): Sample rate of the waves in Hz.
+        start (int): Unix timestamp of the first capture.
+        step (int): Seconds between consecutive captures.
+    """
+
+    def __init__(
+        self, n_captures=50, n_samples=8192, sample_rate=2560, start=1554907724, step=60
+    ):
+        self.n_samples = n_samples
+        self.sample_rate = sample_rate
+        self.timestamps = [start + i * step for i in range(n_captures)]
+        self.modified = time.time()
+
+    def add_capture(self, timestamp: int) -> None:
+        """
+        Appends a new capture, as a real device does when it acquires a new wave.
+
+        Args:
+            timestamp (int): Unix timestamp of the new capture.
+        """
+        self.timestamps.append(timestamp)
+        self.modified = time.time()
+
+    def wave(self, timestamp: int) -> dict:
+        rng = np.random.default_rng(timestamp)
+        t = np.arange(self.n_samples) / self.sample_rate
+        samples = np.sin(2 * np.pi * 50 * t) + 0.1 * rng.standard_normal(len(t))
+        data, factor = make_payload(samples)
+        return {"data": data, "factor": factor, "sample_rate": self.sample_rate}
+
+    def spectrum(self, timestamp: int) -> dict:
+        rng = np.random.default_rng(timestamp)
+        samples = np.abs(rng.standard_normal(self.n_samples // 2))
+        data, factor = make_payload(samples)
+        return {"data": data, "factor": factor, "min_freq": 0, "max_freq": 1000}
+
+
+class StandInServer:
+    """
+    Threaded HTTP server simulating one or more T8 devices.
+
+    Use it as a context manager; while active, `params(id_)` returns the connection
+    parameters to pass to the `t8_client.get_data` functions.
+
+    Args:
+        devices (dict[str, StandInDevice]): Simulated devices keyed by their ID.
+        latency (float): Artificial delay added to every response, in seconds.
+        capacity (int): Number of requests the device serves at once, like an
+            embedded T8. Requests beyond it get a 503 response with `Retry-After`.
+            None for no limit.
+    """
+
+    def __init__(self, devices=None, latency=0.0, capacity=None):
+        self.devices = devices or {"t8": StandInDevice()}
+        self.latency = latency
+        self.capacity = capacity
+        self.rejected = 0
+        self._active = 0
+        self.bytes_sent = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def params(self, id_="t8", **kwargs) -> dict:
+        return {
+            "scheme": "http",
+            "host": self.address,
+            "id": id_,
+            "machine": "LP_Turbine",
+            "point": "MAD31CY005",
+            "pmode": "AM1",
+            "t8_user": "user",
+            "t8_password": "password",
+            **kwargs,
+        }
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.bytes_sent = 0
+            self.requests = 0
+            self.rejected = 0
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    overloaded = server.capacity and server._active >= server.capacity
+                    if overloaded:
+                        server.rejected += 1
+                    else:
+                        server._active += 1
+                if overloaded:
+                    self.send_response(503)
+                    self.send_header("Retry-After", "1")
+                    self.send_header("Content-Length", "4")
+                    self.end_headers()
+                    self.wfile.write(b"Busy")
+                    return
+                try:
+                    self._serve()
+                finally:
+                    with server._lock:
+                        server._active -= 1
+
+            def _serve(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                # /{id}/rest/{kind}/{machine}/{point}/{pmode}[/{timestamp}]
+                parts = self.path.strip("/").split("/")
+                device = server.devices.get(parts[0])
+                if device is None or len(parts) not in (6, 7):
+                    self._send(404, b"Not Found", None)
+                    return
+
+                kind = parts[2]
+                if len(parts) == 6:
+                    base = f"/{'/'.join(parts)}"
+                    body = {
+                        "_items": [
+                            {"_links": {"self": f"{base}/{timestamp}"}}
+                            for timestamp in device.timestamps
+                        ]
+                    }
+                    modified = device.modified
+                else:
+                    timestamp = int(parts[6])
+                    if timestamp not in device.timestamps:
+                        self._send(404, b"Not Found", None)
+                        return
+                    body = (
+                        device.wave(timestamp)
+                        if kind == "waves"
+                        else device.spectrum(timestamp)
+                    )
+                    modified = timestamp
+
+                content = json.dumps(body).encode()
+                etag = f'"{hashlib.md5(content).hexdigest()}"'
+                last_modified = formatdate(modified, usegmt=True)
+                if self.headers.get("If-None-Match") == etag:
+                    self._send(304, b"", None, etag, last_modified)
+                    return
+                self._send(200, content, "application/json", etag, last_modified)
+
+            def _send(
+                self, status, content, content_type, etag=None, last_modified=None
+            ):
+                accepted = self.headers.get("Accept-Encoding", "")
+                encoding = None
+                if content and "gzip" in accepted:
+                    content, encoding = gzip.compress(content), "gzip"
+                elif content and "deflate" in accepted:
+                    content, encoding = zlib.compress(content), "deflate"
+
+                self.send_response(status)
+                if content_type:
+                    self.send_header("Content-Type", content_type)
+                if encoding:
+                    self.send_header("Content-Encoding", encoding)
+                if etag:
+                    self.send_header("ETag", etag)
+                if last_modified:
+                    self.send_header("Last-Modified", last_modified)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+                with server._lock:
+                    server.bytes_sent += len(content)
+                    server.requests += 1
+
+        return Handler
@@ -0,0 +1,290 @@
+"""
+Performance regression suite for the hot paths of the client.
+
+Every benchmark runs at several realistic capture sizes. The timings are stored as
+JSON so that two runs (e.g. before and after a change) can be compared:
+
+    python -m benchmarks.suite run -o output/benchmarks/before.json
+    python -m benchmarks.suite run -o output/benchmarks/after.json
+    python -m benchmarks.suite compare output/benchmarks/before.json \\
+        output/benchmarks/after.json --threshold 0.1
+
+`compare` exits with status 1 when a benchmark got slower than the threshold.
+"""
+
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime
+
+import click
+import numpy as np
+import requests
+import scipy
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer, make_payload
+from t8_client import get_data
+from t8_client.spectrum import calculate_spectrum
+from t8_client.util.csv import save_array_to_csv
+from t8_client.util.decoder import zint_to_float
+from t8_client.util.timestamp import iso_string_to_timestamp, timestamp_to_iso_string
+from t8_client.waveform import preprocess_waveform
+
+# Samples per capture of the wave benchmarks: from short spectra-only waves to long
+# high resolution captures
+CAPTURE_SIZES = (2048, 8192, 32768, 131072)
+# Items per listing of the listing and timestamp benchmarks
+LISTING_SIZES = (100, 1000, 10000)
+SAMPLE_RATE = 2560
+START = 1554907724
+
+# Benchmark setups keyed by name, as (setup, sizes)
+BENCHMARKS = {}
+
+
+def benchmark(name, sizes):
+    """
+    Registers a benchmark. The decorated function is a context manager that takes
+    the size, prepares the inputs and yields the function without arguments to
+    time; whatever follows the `yield` is run as teardown.
+    """
+
+    def register(function):
+        BENCHMARKS[name] = (contextmanager(function), sizes)
+        return function
+
+    return register
+
+
+def _waveform(n_samples):
+    rng = np.random.default_rng(0)
+    t = np.arange(n_samples) / SAMPLE_RATE
+    return np.sin(2 * np.pi * 50 * t) + 0.1 * rng.standard_normal(n_samples)
+
+
+@benchmark("zint_to_float", CAPTURE_SIZES)
+def _zint_to_float(size):
+    raw, _ = make_payload(_waveform(size))
+    yield lambda: zint_to_float(raw)
+
+
+@benchmark("timestamp_roundtrip", LISTING_SIZES)
+def _timestamp_roundtrip(size):
+    timestamps = [START + 60 * i for i in range(size)]
+
+    def run():
+        for timestamp in timestamps:
+            iso_string_to_timestamp(timestamp_to_iso_string(timestamp))
+
+    yield run
+
+
+@benchmark("preprocess_waveform", CAPTURE_SIZES)
+def _preprocess_waveform(size):
+    waveform = _waveform(size)
+    yield lambda: preprocess_waveform(waveform)
+
+
+@benchmark("calculate_spectrum", CAPTURE_SIZES)
+def _calculate_spectrum(size):
+    waveform = preprocess_waveform(_waveform(size))
+    yield lambda: calculate_spectrum(waveform, SAMPLE_RATE, 0, SAMPLE_RATE / 2.56)
+
+
+@benchmark("save_array_to_csv", CAPTURE_SIZES[:3])
+def _save_array_to_csv(size):
+    waveform = _waveform(size)
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, "wave.csv")
+        yield lambda: save_array_to_csv(path, waveform, "Samples")
+
+
+@benchmark("list_timestamps", LISTING_SIZES)
+def _list_timestamps(size):
+    base = "https://t8/rest/waves/M1/P1/PM1"
+    response = {
+        "_items": [
+            {"_links": {"self": f"{base}/{START + 60 * i}"}} for i in range(size)
+        ]
+    }
+    yield lambda: list(get_data._list_timestamps(response))
+
+
+@benchmark("fetch_wave", CAPTURE_SIZES)
+def _fetch_wave(size):
+    device = StandInDevice(n_captures=1, n_samples=size, sample_rate=SAMPLE_RATE)
+    with StandInServer({"t8": device}) as server, requests.Session() as session:
+        params = server.params(
+            time=timestamp_to_iso_string(device.timestamps[0]), session=session
+        )
+        yield lambda: get_data.get_wave(**params)
+
+
+def _time(function, min_time, repeats) -> dict:
+    """
+    Times a function like `timeit`: the number of calls per repeat is calibrated so
+    that every repeat takes at least `min_time` seconds.
+
+    Returns:
+        dict: Minimum, median and standard deviation of the seconds per call, and
+            the number of calls per repeat and repeats.
+    """
+    function()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        samples.append((time.perf_counter() - start) / loops)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def run_suite(pattern="*", min_time=0.1, repeats=5, echo=print) -> dict:
+    """
+    Runs the benchmarks whose name matches a glob pattern.
+
+    Returns:
+        dict: The environment of the run and the timings of every benchmark, keyed
+            by `name[size]`.
+    """
+    results = {}
+    for name, (setup, sizes) in BENCHMARKS.items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        for size in sizes:
+            key = f"{name}[{size}]"
+            with setup(size) as function:
+                results[key] = _time(function, min_time, repeats)
+            echo(f"{key:<32} {_format_seconds(results[key]['min']):>10}")
+    return {
+        "machine": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "scipy": scipy.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        },
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, threshold=0.1, statistic="min") -> list:
+    """
+    Compares two runs of the suite.
+
+    Returns:
+        list[tuple[str, float, float, float, str]]: The name, baseline and current
+            seconds per call, the ratio current/baseline and the verdict
+            ("regression", "improvement", "unchanged", "new" or "removed") of every
+            benchmark in either run.
+    """
+    rows = []
+    names = list(baseline["results"])
+    names += [name for name in current["results"] if name not in baseline["results"]]
+    for name in names:
+        before = baseline["results"].get(name, {}).get(statistic)
+        after = current["results"].get(name, {}).get(statistic)
+        if before is None or after is None:
+            verdict = "new" if before is None else "removed"
+            rows.append((name, before, after, None, verdict))
+            continue
+        ratio = after / before
+        if ratio > 1 + threshold:
+            verdict = "regression"
+        elif ratio < 1 / (1 + threshold):
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        rows.append((name, before, after, ratio, verdict))
+    return rows
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+@click.group(help="Performance regression suite of the T8 client.")
+def main():
+    pass
+
+
+@main.command(name="run", help="Run the benchmarks and store the timings as JSON.")
+@click.option("-k", "--pattern", default="*", help="Glob of the benchmarks to run")
+@click.option(
+    "-o",
+    "--output",
+    default=os.path.join("output", "benchmarks", "results.json"),
+    help="JSON file to store the results in",
+)
+@click.option("--min-time", default=0.1, help="Minimum seconds of every repeat")
+@click.option("--repeats", default=5, help="Number of repeats of every benchmark")
+def run(pattern, output, min_time, repeats):
+    results = run_suite(pattern, min_time, repeats)
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results stored in {output}")
+
+
+@main.command(
+    name="compare",
+    help="Compare two result files and fail if any benchmark regressed by more than"
+    + " the threshold.",
+)
+@click.argument("baseline", type=click.File())
+@click.argument("current", type=click.File())
+@click.option(
+    "-t", "--threshold", default=0.1, help="Relative slowdown considered a regression"
+)
+@click.option(
+    "--statistic",
+    type=click.Choice(["min", "median"]),
+    default="min",
+    help="Timing statistic to compare",
+)
+def compare(baseline, current, threshold, statistic):
+    rows = compare_results(
+        json.load(baseline), json.load(current), threshold, statistic
+    )
+    for name, before, after, ratio, verdict in rows:
+        change = f"{ratio:.2f}x" if ratio is not None else "-"
+        print(
+            f"{name:<32} {_format_seconds(before):>10} {_format_seconds(after):>10}"
+            f" {change:>7}  {verdict}"
+        )
+    regressions = sum(row[4] == "regression" for row in rows)
+    if regressions:
+        raise click.ClickException(
+            f"{regressions} benchmarks regressed by more than {threshold:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,252 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import click
 import numpy as np
+import requests
 
 from t8_client import get_data
+from t8_client.sources import SOURCES, open_source
 from t8_client.spectrum import calculate_spectrum
-from t8_client.util.plots import plot_spectrum_comparison, plot_waveform
+from t8_client.util.plots import plot_spectrum_comparison
+from t8_client.watch import parse_tag
 from t8_client.waveform import preprocess_waveform
 
-HOST = "lzfs45.mirror.twave.io"
-ID = "lzfs45"
-MACHINE = "LP_Turbine"
-POINT = "MAD31CY005"
-PMODE = "AM1"
-TIME = "2019-04-11T18:25:54"
+METRICS = [
+    "tag",
+    "time",
+    "sample_rate",
+    "fmin",
+    "fmax",
+    "t8_overall",
+    "calculated_overall",
+    "max_abs_error",
+    "relative_error",
+    "correlation",
+    "t8_peak_freq",
+    "calculated_peak_freq",
+]
 
 
-def main():
-    T8_USER = input("Enter T8 username: ")
-    T8_PASSWORD = input("Enter T8 password: ")
+def compare_spectra(t8_spectrum, t8_freqs, spectrum, freqs) -> dict:
+    """
+    Computes metrics of the agreement between the spectrum of the T8 and the
+    spectrum calculated from the waveform.
 
-    url_params = {
-        "host": HOST,
-        "id": ID,
-        "machine": MACHINE,
-        "point": POINT,
-        "pmode": PMODE,
-        "time": TIME,
-        "t8_user": T8_USER,
-        "t8_password": T8_PASSWORD,
+    Args:
+        t8_spectrum (np.ndarray): The spectrum returned by the T8.
+        t8_freqs (np.ndarray): The frequencies of the T8 spectrum.
+        spectrum (np.ndarray): The spectrum calculated from the waveform.
+        freqs (np.ndarray): The frequencies of the calculated spectrum.
+
+    Returns:
+        dict: The overall values (root sum of squares) of both spectra, the maximum
+            absolute and the relative error and the correlation of the calculated
+            spectrum interpolated at the T8 frequencies, and the frequency of the
+            peak of each spectrum.
+    """
+    resampled = np.interp(t8_freqs, freqs, spectrum)
+    difference = resampled - t8_spectrum
+    t8_norm = np.linalg.norm(t8_spectrum)
+    if np.std(t8_spectrum) > 0 and np.std(resampled) > 0:
+        correlation = float(np.corrcoef(t8_spectrum, resampled)[0, 1])
+    else:
+        correlation = float("nan")
+    return {
+        "t8_overall": float(t8_norm),
+        "calculated_overall": float(np.linalg.norm(spectrum)),
+        "max_abs_error": float(np.max(np.abs(difference))),
+        "relative_error": float(np.linalg.norm(difference) / t8_norm)
+        if t8_norm
+        else float("nan"),
+        "correlation": correlation,
+        "t8_peak_freq": float(t8_freqs[np.argmax(t8_spectrum)]),
+        "calculated_peak_freq": float(freqs[np.argmax(spectrum)]),
     }
 
-    # Get waveform from API
-    waveform, sample_rate = get_data.get_wave(**url_params)
-    preprocessed_waveform = preprocess_waveform(waveform)
 
-    plot_waveform(waveform, sample_rate)
+def compare_capture(tag, time, url_params, plots_dir=None, dtype=np.float64) -> dict:
+    """
+    Fetches the waveform and the spectrum of a tag at a given time, once each, and
+    compares the T8 spectrum with the one calculated from the waveform.
 
-    # Get T8 spectrum from API
-    t8_spectrum, fmin, fmax = get_data.get_spectrum(**url_params)
-    t8_freqs = np.linspace(fmin, fmax, len(t8_spectrum))
+    Args:
+        tag (str): Combined tag in the format M1:P1:PM1.
+        time (str): ISO formatted timestamp of the capture.
+        url_params (dict): The connection parameters.
+        plots_dir (str): Directory to save a comparison plot to. None for no plot.
+        dtype (np.dtype): The floating point precision of the calculated spectrum.
 
-    # Calculate spectrum from waveform
-    filtered_spectrum, filtered_freqs = calculate_spectrum(
-        preprocessed_waveform, sample_rate, fmin, fmax
-    )
+    Returns:
+        dict: The comparison metrics of the capture (see `METRICS`).
+    """
+    machine, point, pmode = parse_tag(tag)
+    params = {
+        **url_params,
+        "machine": machine,
+        "point": point,
+        "pmode": pmode,
+        "time": time,
+    }
 
-    # Compare T8 spectrum and calculated spectrum
-    plot_spectrum_comparison(
-        t8_spectrum,
-        t8_freqs,
-        filtered_spectrum,
-        filtered_freqs,
-        fmin,
-        fmax,
-        title1="T8 Spectrum",
-        title2="Calculated Spectrum",
+    wave = get_data.get_wave_capture(**params)
+    t8_spectrum = get_data.get_spectrum_capture(**params)
+
+    spectrum, freqs = calculate_spectrum(
+        preprocess_waveform(wave.data, dtype=dtype),
+        wave.sample_rate,
+        t8_spectrum.fmin,
+        t8_spectrum.fmax,
     )
+    metrics = {
+        "tag": tag,
+        "time": time,
+        "sample_rate": wave.sample_rate,
+        "fmin": t8_spectrum.fmin,
+        "fmax": t8_spectrum.fmax,
+        **compare_spectra(t8_spectrum.data, t8_spectrum.freqs, spectrum, freqs),
+    }
+
+    if plots_dir is not None:
+        plot_spectrum_comparison(
+            t8_spectrum.data,
+            t8_spectrum.freqs,
+            spectrum,
+            freqs,
+            t8_spectrum.fmin,
+            t8_spectrum.fmax,
+            title1="T8 Spectrum",
+            title2="Calculated Spectrum",
+            file_path=os.path.join(
+                plots_dir, f"{machine}_{point}_{pmode}_{time.replace(':', '-')}.png"
+            ),
+        )
+    return metrics
+
+
+@click.command(
+    help="Compare the spectra of the T8 with the spectra calculated from the"
+    + " waveforms, for several tags and times in parallel. The connection parameters"
+    + " are read from the HOST, ID, T8_USER and T8_PASSWORD environment variables."
+)
+@click.option(
+    "--source",
+    type=click.Choice(SOURCES),
+    envvar="T8_SOURCE",
+    help="Where listings and captures come from, as in t8-client. Defaults to"
+    + " record with --store and http otherwise (or the T8_SOURCE variable)",
+)
+@click.option(
+    "--store",
+    "store_path",
+    envvar="T8_STORE",
+    help="Directory of the local payload store that records captures (or the"
+    + " T8_STORE variable)",
+)
+@click.option("--offline", is_flag=True, help="Shorthand for --source archive")
+@click.option(
+    "-T",
+    "--tag",
+    "tags",
+    multiple=True,
+    required=True,
+    help="Combined tag in the format M1:P1:PM1. Can be given several times",
+)
+@click.option(
+    "-t",
+    "--time",
+    "times",
+    multiple=True,
+    help="Time of the captures. Can be given several times, defaults to every"
+    + " capture within the time range",
+)
+@click.option("-s", "--start", help="Start of the time range")
+@click.option("-e", "--end", help="End of the time range")
+@click.option(
+    "-o",
+    "--output",
+    default=os.path.join("output", "spectra_comparison"),
+    help="Directory for the metrics and plots",
+)
+@click.option("--plots", is_flag=True, help="Save a comparison plot of every capture")
+@click.option("-j", "--jobs", default=8, help="Number of captures compared at once")
+@click.option(
+    "--precision",
+    type=click.Choice(["float64", "float32"]),
+    default="float64",
+    help="Floating point precision of the calculated spectra",
+)
+def main(
+    source, store_path, offline, tags, times, start, end, output, plots, jobs, precision
+):
+    url_params = {
+        "host": os.getenv("HOST"),
+        "id": os.getenv("ID"),
+        "t8_user": os.getenv("T8_USER"),
+        "t8_password": os.getenv("T8_PASSWORD"),
+    }
+    for tag in tags:
+        parse_tag(tag)
+    plots_dir = os.path.join(output, "plots") if plots else None
+
+    if offline:
+        source = "archive"
+    elif source is None:
+        source = "record" if store_path else "http"
+    try:
+        data_source = open_source(source, store_path)
+    except ValueError as error:
+        raise click.UsageError(f"{error} (--store)") from error
+
+    with data_source, requests.Session() as session:
+        url_params["source"] = data_source
+        url_params["session"] = session
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=jobs)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        jobs_list = []
+        for tag in tags:
+            if times:
+                tag_times = list(times)
+            else:
+                # Only the captures with both a waveform and a spectrum
+                machine, point, pmode = parse_tag(tag)
+                tag_params = {
+                    **url_params,
+                    "machine": machine,
+                    "point": point,
+                    "pmode": pmode,
+                }
+                waves = set(get_data.list_captures("waves", start, end, **tag_params))
+                spectra = get_data.list_captures("spectra", start, end, **tag_params)
+                tag_times = sorted(waves.intersection(spectra))
+            jobs_list += [(tag, time) for time in tag_times]
+
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(
+                    compare_capture, tag, time, url_params, plots_dir, precision
+                )
+                for tag, time in jobs_list
+            ]
+            rows = []
+            for (tag, time), future in zip(jobs_list, futures, strict=True):
+                # A capture that cannot be fetched or compared, e.g. a corrupt
+                # payload, must not abort the other comparisons
+                try:
+                    rows.append(future.result())
+                except Exception as error:
+                    click.echo(f"{tag} {time} error: {error!r}", err=True)
+
+    os.makedirs(output, exist_ok=True)
+    metrics_path = os.path.join(output, "metrics.csv")
+    with open(metrics_path, mode="w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=METRICS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Compared {len(rows)} of {len(jobs_list)} captures, see {metrics_path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,258 @@
+import os
+
+import numpy as np
+
+
+class SpectrumBaseline:
+    """
+    Running per-bin statistics of the spectra of one machine, point and processing
+    mode, updated in O(bins) per new spectrum without keeping any history.
+
+    The mean and variance of every bin are tracked with Welford's algorithm. The
+    percentiles are estimated from a log-binned histogram sketch per bin, whose
+    relative error is bounded by half the ratio between consecutive bucket edges
+    (about 8.5% with the default 128 buckets over 9 decades).
+
+    Args:
+        n_bins (int): The number of bins of the spectra.
+        value_range (tuple[float, float]): Range of amplitudes covered by the
+            histogram sketch. Values outside it are counted in the first or last
+            histogram bucket.
+        n_buckets (int): The number of buckets of the histogram sketch of each bin.
+    """
+
+    def __init__(self, n_bins, value_range=(1e-6, 1e3), n_buckets=128):
+        self.n_bins = n_bins
+        self.value_range = value_range
+        self.count = 0
+        self.mean = np.zeros(n_bins)
+        self.m2 = np.zeros(n_bins)
+        self.histogram = np.zeros((n_bins, n_buckets), dtype=np.uint32)
+        self._log_range = np.log10(value_range)
+
+    @property
+    def n_buckets(self) -> int:
+        return self.histogram.shape[1]
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        np.ndarray: The sample variance of every bin.
+        """
+        if self.count < 2:
+            return np.zeros(self.n_bins)
+        return self.m2 / (self.count - 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        """
+        np.ndarray: The sample standard deviation of every bin.
+        """
+        return np.sqrt(self.variance)
+
+    def update(self, spectrum: np.ndarray) -> None:
+        """
+        Adds a spectrum to the statistics.
+
+        Args:
+            spectrum (np.ndarray): The spectrum, as returned by `get_spectrum` or
+                `calculate_spectrum`.
+
+        Raises:
+            ValueError: If the number of bins does not match the baseline.
+        """
+        spectrum = self._check(spectrum)
+        self.count += 1
+        delta = spectrum - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (spectrum - self.mean)
+        self.histogram[np.arange(self.n_bins), self._buckets(spectrum)] += 1
+
+    def percentile(self, q: float) -> np.ndarray:
+        """
+        Estimates a percentile of every bin from the histogram sketch.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            np.ndarray: The estimated percentile of every bin, as the geometric
+                center of the histogram bucket that contains it.
+
+        Raises:
+            ValueError: If the baseline is empty.
+        """
+        if self.count == 0:
+            raise ValueError("The baseline is empty")
+        target = q / 100 * self.count
+        cumulative = np.cumsum(self.histogram, axis=1)
+        buckets = np.minimum((cumulative < target).sum(axis=1), self.n_buckets - 1)
+        low, high = self._log_range
+        step = (high - low) / self.n_buckets
+        return 10 ** (low + (buckets + 0.5) * step)
+
+    def zscores(self, spectrum: np.ndarray) -> np.ndarray:
+        """
+        Scores every bin of a spectrum against the baseline.
+
+        Args:
+            spectrum (np.ndarray): The spectrum to score.
+
+        Returns:
+            np.ndarray: The number of standard deviations each bin is away from
+                its mean. Bins with no variance score 0.
+        """
+        spectrum = self._check(spectrum)
+        std = self.std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (spectrum - self.mean) / std
+        return np.where(std > 0, scores, 0.0)
+
+    def score(self, spectrum: np.ndarray) -> float:
+        """
+        Summarizes how abnormal a spectrum is as the RMS of its z-scores.
+
+        Args:
+            spectrum (np.ndarray): The spectrum to score.
+
+        Returns:
+            float: The anomaly score, about 1 for spectra like the baseline ones.
+        """
+        return float(np.sqrt(np.mean(self.zscores(spectrum) ** 2)))
+
+    def exceedance(self, spectrum: np.ndarray, q=99.0) -> float:
+        """
+        Computes the fraction of bins of a spectrum above their q-th percentile.
+
+        Args:
+            spectrum (np.ndarray): The spectrum to score.
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The fraction of bins above the percentile.
+        """
+        spectrum = self._check(spectrum)
+        return float(np.mean(spectrum > self.percentile(q)))
+
+    def save(self, file_path: str) -> None:
+        """
+        Saves the baseline to a compressed `.npz` file.
+
+        Args:
+            file_path (str): The path of the file.
+        """
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, "wb") as file:
+            np.savez_compressed(
+                file,
+                count=self.count,
+                value_range=self.value_range,
+                mean=self.mean,
+                m2=self.m2,
+                histogram=self.histogram,
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> "SpectrumBaseline":
+        """
+        Loads a baseline saved with `save`.
+
+        Args:
+            file_path (str): The path of the file.
+
+        Returns:
+            SpectrumBaseline: The loaded baseline.
+        """
+        with np.load(file_path) as data:
+            histogram = data["histogram"]
+            baseline = cls(
+                histogram.shape[0], tuple(data["value_range"]), histogram.shape[1]
+            )
+            baseline.count = int(data["count"])
+            baseline.mean = data["mean"]
+            baseline.m2 = data["m2"]
+            baseline.histogram = histogram
+        return baseline
+
+    def _check(self, spectrum) -> np.ndarray:
+        spectrum = np.asarray(spectrum, dtype=float)
+        if spectrum.shape != (self.n_bins,):
+            raise ValueError(
+                f"Expected a spectrum with {self.n_bins} bins,"
+                + f" got shape {spectrum.shape}"
+            )
+        return spectrum
+
+    def _buckets(self, spectrum: np.ndarray) -> np.ndarray:
+        low, high = self._log_range
+        with np.errstate(divide="ignore"):
+            position = (np.log10(spectrum) - low) / (high - low) * self.n_buckets
+        position = np.nan_to_num(position, nan=0, neginf=0)
+        return np.clip(position, 0, self.n_buckets - 1).astype(np.intp)
+
+
+class BaselineStore:
+    """
+    Directory of spectrum baselines keyed by machine, point and processing mode,
+    stored as one `.npz` file each and loaded on first use.
+
+    Args:
+        root (str): The directory where the baselines are stored.
+        kwargs: Options passed to `SpectrumBaseline` when creating new baselines.
+    """
+
+    def __init__(self, root, **kwargs):
+        self.root = root
+        self.options = kwargs
+        self._baselines = {}
+
+    def path(self, machine, point, pmode) -> str:
+        return os.path.join(self.root, machine, point, f"{pmode}.npz")
+
+    def get(self, machine, point, pmode):
+        """
+        Returns the baseline of a tag, loading it from disk if needed.
+
+        Returns:
+            SpectrumBaseline | None: The baseline, or None if there is none yet.
+        """
+        key = (machine, point, pmode)
+        if key not in self._baselines:
+            path = self.path(*key)
+            if not os.path.exists(path):
+                return None
+            self._baselines[key] = SpectrumBaseline.load(path)
+        return self._baselines[key]
+
+    def update(self, machine, point, pmode, spectrum) -> SpectrumBaseline:
+        """
+        Adds a spectrum to the baseline of a tag, creating it if needed.
+
+        Returns:
+            SpectrumBaseline: The updated baseline.
+        """
+        baseline = self.get(machine, point, pmode)
+        if baseline is None:
+            baseline = SpectrumBaseline(len(spectrum), **self.options)
+            self._baselines[(machine, point, pmode)] = baseline
+        baseline.update(spectrum)
+        return baseline
+
+    def score(self, machine, point, pmode, spectrum) -> float:
+        """
+        Scores a spectrum against the baseline of its tag.
+
+        Raises:
+            KeyError: If the tag has no baseline.
+        """
+        baseline = self.get(machine, point, pmode)
+        if baseline is None:
+            raise KeyError(f"No baseline for {machine}:{point}:{pmode}")
+        return baseline.score(spectrum)
+
+    def save(self) -> None:
+        """
+        Writes every loaded baseline back to disk.
+        """
+        for key, baseline in self._baselines.items():
+            baseline.save(self.path(*key))
@@ -0,0 +1,148 @@
+import numpy as np
+
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import hanning_window, padded_length
+
+
+def plan_batches(lengths, sample_rates) -> dict[tuple[int, float], list[int]]:
+    """
+    Groups captures that can be transformed together: those with the same padded
+    length and sample rate.
+
+    Args:
+        lengths (list[int]): The number of samples of every capture.
+        sample_rates (list[float]): The sample rate of every capture in Hz.
+
+    Returns:
+        dict[tuple[int, float], list[int]]: The positions of the captures of every
+            group, keyed by padded length and sample rate, in order of first
+            appearance.
+
+    Raises:
+        ValueError: If a capture has no samples.
+    """
+    groups = {}
+    for i, (n, sample_rate) in enumerate(zip(lengths, sample_rates, strict=True)):
+        if n == 0:
+            raise ValueError(f"The waveform at position {i} has no samples")
+        groups.setdefault((padded_length(n), float(sample_rate)), []).append(i)
+    return groups
+
+
+def calculate_spectra(
+    waveforms, sample_rates, fmin, fmax, dtype=np.float64
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Calculates the spectra of captures of differing lengths and sample rates with
+    one vectorized transform per group of compatible captures.
+
+    The captures are grouped with `plan_batches`. Every capture of a group is
+    windowed with a Hanning window of its own length into one zero-filled 2-D
+    array, so each row is exactly what `preprocess_waveform` returns for the
+    capture, and the group is transformed at once with `calculate_spectrum`. The
+    results are returned in the order of the input.
+
+    Args:
+        waveforms (list[np.ndarray]): The waveforms.
+        sample_rates (float | list[float]): The sample rate of every waveform in Hz,
+            or one for all.
+        fmin (float): The minimum frequency of interest in Hz.
+        fmax (float): The maximum frequency of interest in Hz.
+        dtype (np.dtype): The floating point precision of the computation.
+
+    Returns:
+        list[tuple[np.ndarray, np.ndarray]]: The spectrum and frequencies of every
+            waveform. The captures of a group share the same frequencies array.
+
+    Raises:
+        ValueError: If a waveform has no samples.
+    """
+    if np.ndim(sample_rates) == 0:
+        sample_rates = [sample_rates] * len(waveforms)
+    dtype = np.dtype(dtype)
+
+    results = [None] * len(waveforms)
+    lengths = [np.shape(waveform)[-1] for waveform in waveforms]
+    for (n_fft, sample_rate), indices in plan_batches(lengths, sample_rates).items():
+        batch = np.zeros((len(indices), n_fft), dtype=dtype)
+        for row, i in enumerate(indices):
+            n = lengths[i]
+            np.multiply(
+                waveforms[i], hanning_window(n, dtype), out=batch[row, :n], dtype=dtype
+            )
+
+        spectra, freqs = calculate_spectrum(batch, sample_rate, fmin, fmax)
+        for row, i in enumerate(indices):
+            results[i] = (spectra[row], freqs)
+    return results
+
+
+def common_frequency_grid(freqs, fmin=None, fmax=None) -> np.ndarray:
+    """
+    Builds a frequency grid on which spectra of differing configurations can be
+    compared: it covers the range shared by all of them, at the coarsest of their
+    resolutions.
+
+    Args:
+        freqs (list[np.ndarray]): The frequencies of every spectrum.
+        fmin (float): Lower bound of the grid. Defaults to the highest first
+            frequency of the spectra.
+        fmax (float): Upper bound of the grid. Defaults to the lowest last
+            frequency of the spectra.
+
+    Returns:
+        np.ndarray: The frequencies of the grid.
+
+    Raises:
+        ValueError: If there are no spectra, or a spectrum has fewer than two
+            frequencies and so no resolution.
+    """
+    if not freqs or min(len(f) for f in freqs) < 2:
+        raise ValueError("Every spectrum needs at least two frequencies")
+    fmin = max(f[0] for f in freqs) if fmin is None else fmin
+    fmax = min(f[-1] for f in freqs) if fmax is None else fmax
+    resolution = max(f[1] - f[0] for f in freqs)
+    return (
+        np.arange(int(np.floor((fmax - fmin) / resolution + 1e-9)) + 1) * (resolution)
+        + fmin
+    )
+
+
+def resample_spectra(spectra, freqs, grid, fill_value=np.nan) -> np.ndarray:
+    """
+    Linearly interpolates spectra of differing configurations onto a common
+    frequency grid, so they can be stacked into one 2-D array.
+
+    Spectra that share the same frequencies array (as the spectra of a group
+    returned by `calculate_spectra` do) are interpolated together.
+
+    Args:
+        spectra (list[np.ndarray]): The spectra.
+        freqs (list[np.ndarray]): The frequencies of every spectrum.
+        grid (np.ndarray): The increasing frequencies to interpolate at.
+        fill_value (float): Value of the grid frequencies outside the range of a
+            spectrum.
+
+    Returns:
+        np.ndarray: One row per spectrum, one column per grid frequency.
+    """
+    grid = np.asarray(grid)
+    dtype = np.result_type(*spectra) if spectra else np.float64
+    resampled = np.empty((len(spectra), len(grid)), dtype=dtype)
+
+    groups = {}
+    for i, f in enumerate(freqs):
+        groups.setdefault(id(f), []).append(i)
+    for indices in groups.values():
+        f = np.asarray(freqs[indices[0]])
+        rows = np.stack([spectra[i] for i in indices])
+        # Index of the bin on the left of every grid frequency, and the weight of
+        # the bin on its right
+        right = np.clip(np.searchsorted(f, grid, side="right"), 1, len(f) - 1)
+        left = right - 1
+        weight = (grid - f[left]) / (f[right] - f[left])
+        values = rows[:, left] * (1 - weight) + rows[:, right] * weight
+        outside = (grid < f[0]) | (grid > f[-1])
+        values[:, outside] = fill_value
+        resampled[indices] = values
+    return resampled
@@ -0,0 +1,257 @@
+import zlib
+from base64 import b64decode
+
+import numpy as np
+
+from t8_client.util.decoder import zint_to_int16
+from t8_client.util.timestamp import timestamp_to_iso_string
+
+
+class Capture:
+    """
+    A wave or spectrum as stored by the T8, kept in its compressed form.
+
+    The zlib compressed int16 payload is decoded lazily on first access to `data` or
+    `samples` and the decoded integers are memoized; scaling by `factor` is applied
+    on demand. Metadata such as the number of samples are available without
+    decoding, so large collections of captures can be held and filtered cheaply.
+
+    Args:
+        machine (str): The machine tag.
+        point (str): The point tag.
+        pmode (str): The processing mode tag.
+        timestamp (int): Unix timestamp of the capture.
+        payload (bytes): The zlib compressed int16 samples (not base64 encoded).
+        factor (float): Factor that scales the int16 samples to physical units.
+    """
+
+    __slots__ = (
+        "machine",
+        "point",
+        "pmode",
+        "timestamp",
+        "factor",
+        "_payload",
+        "_samples",
+        "_n_samples",
+    )
+
+    def __init__(self, machine, point, pmode, timestamp, payload, factor):
+        self.machine = machine
+        self.point = point
+        self.pmode = pmode
+        self.timestamp = timestamp
+        self.factor = factor
+        self._payload = payload
+        self._samples = None
+        self._n_samples = None
+
+    @property
+    def tag(self) -> str:
+        """
+        str: The combined tag in the format M1:P1:PM1.
+        """
+        return f"{self.machine}:{self.point}:{self.pmode}"
+
+    @property
+    def time(self) -> str:
+        """
+        str: The ISO formatted timestamp of the capture.
+        """
+        return timestamp_to_iso_string(self.timestamp)
+
+    @property
+    def payload(self) -> bytes:
+        """
+        bytes: The zlib compressed int16 samples, as returned by the T8.
+        """
+        return self._payload
+
+    @property
+    def is_decoded(self) -> bool:
+        """
+        bool: Whether the payload has already been decoded.
+        """
+        return self._samples is not None
+
+    @property
+    def samples(self) -> np.ndarray:
+        """
+        np.ndarray: The unscaled int16 samples, decoded on first access.
+        """
+        if self._samples is None:
+            if self._payload:
+                self._samples = zint_to_int16(self._payload)
+            else:
+                self._samples = np.array([], dtype=np.int16)
+            self._n_samples = len(self._samples)
+        return self._samples
+
+    @property
+    def data(self) -> np.ndarray:
+        """
+        np.ndarray: The samples scaled to physical units as float32.
+        """
+        return self.samples.astype(np.float32) * np.float32(self.factor)
+
+    @property
+    def n_samples(self) -> int:
+        """
+        int: The number of samples, counted by streaming the decompressor without
+            materializing the decoded array.
+        """
+        if self._n_samples is None:
+            decompressor = zlib.decompressobj()
+            n_bytes = 0
+            data = self._payload
+            while data:
+                n_bytes += len(decompressor.decompress(data, 1 << 16))
+                data = decompressor.unconsumed_tail
+            n_bytes += len(decompressor.flush())
+            self._n_samples = n_bytes // 2
+        return self._n_samples
+
+    @property
+    def nbytes(self) -> int:
+        """
+        int: Bytes held by the payload and, if decoded, the int16 samples.
+        """
+        decoded = self._samples.nbytes if self._samples is not None else 0
+        return len(self._payload) + decoded
+
+    def release(self) -> None:
+        """
+        Drops the memoized decoded samples, keeping only the compressed payload.
+        """
+        self._samples = None
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.tag}, {self.time})"
+
+
+class WaveCapture(Capture):
+    """
+    A waveform capture.
+
+    Args:
+        machine (str): The machine tag.
+        point (str): The point tag.
+        pmode (str): The processing mode tag.
+        timestamp (int): Unix timestamp of the capture.
+        payload (bytes): The zlib compressed int16 samples (not base64 encoded).
+        factor (float): Factor that scales the int16 samples to physical units.
+        sample_rate (float): The sample rate of the waveform in Hz.
+    """
+
+    __slots__ = ("sample_rate",)
+
+    def __init__(self, machine, point, pmode, timestamp, payload, factor, sample_rate):
+        super().__init__(machine, point, pmode, timestamp, payload, factor)
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_response(cls, response, machine, point, pmode, timestamp):
+        """
+        Builds a wave capture from the JSON body returned by the T8.
+
+        Args:
+            response (dict): The decoded JSON body of the wave.
+            machine (str): The machine tag.
+            point (str): The point tag.
+            pmode (str): The processing mode tag.
+            timestamp (int): Unix timestamp of the capture.
+
+        Returns:
+            WaveCapture: The capture, not yet decoded.
+        """
+        return cls(
+            machine,
+            point,
+            pmode,
+            timestamp,
+            b64decode(response["data"]),
+            response["factor"],
+            response["sample_rate"],
+        )
+
+    @property
+    def duration(self) -> float:
+        """
+        float: The duration of the waveform in seconds.
+        """
+        return self.n_samples / self.sample_rate
+
+    def to_tuple(self) -> tuple[np.ndarray, int]:
+        """
+        Returns the waveform in the form returned by `get_data.get_wave`.
+
+        Returns:
+            tuple[np.ndarray, int]: The scaled waveform and the sample rate.
+        """
+        return self.data, self.sample_rate
+
+
+class SpectrumCapture(Capture):
+    """
+    A spectrum capture.
+
+    Args:
+        machine (str): The machine tag.
+        point (str): The point tag.
+        pmode (str): The processing mode tag.
+        timestamp (int): Unix timestamp of the capture.
+        payload (bytes): The zlib compressed int16 samples (not base64 encoded).
+        factor (float): Factor that scales the int16 samples to physical units.
+        fmin (float): The frequency of the first bin in Hz.
+        fmax (float): The frequency of the last bin in Hz.
+    """
+
+    __slots__ = ("fmin", "fmax")
+
+    def __init__(self, machine, point, pmode, timestamp, payload, factor, fmin, fmax):
+        super().__init__(machine, point, pmode, timestamp, payload, factor)
+        self.fmin = fmin
+        self.fmax = fmax
+
+    @classmethod
+    def from_response(cls, response, machine, point, pmode, timestamp):
+        """
+        Builds a spectrum capture from the JSON body returned by the T8.
+
+        Args:
+            response (dict): The decoded JSON body of the spectrum.
+            machine (str): The machine tag.
+            point (str): The point tag.
+            pmode (str): The processing mode tag.
+            timestamp (int): Unix timestamp of the capture.
+
+        Returns:
+            SpectrumCapture: The capture, not yet decoded.
+        """
+        return cls(
+            machine,
+            point,
+            pmode,
+            timestamp,
+            b64decode(response["data"]),
+            response["factor"],
+            response.get("min_freq", 0),
+            response["max_freq"],
+        )
+
+    @property
+    def freqs(self) -> np.ndarray:
+        """
+        np.ndarray: The frequency of every bin of the spectrum in Hz.
+        """
+        return np.linspace(self.fmin, self.fmax, self.n_samples)
+
+    def to_tuple(self) -> tuple[np.ndarray, float, float]:
+        """
+        Returns the spectrum in the form returned by `get_data.get_spectrum`.
+
+        Returns:
+            tuple[np.ndarray, float, float]: The scaled spectrum and its minimum and
+                maximum frequencies.
+        """
+        return self.data, self.fmin, self.fmax
@@ -4,18 +4,100 @@ import click
 import numpy as np
 
 from t8_client import get_data
+from t8_client.fleet import Fleet
+from t8_client.similarity import SpectrumIndex
+from t8_client.sources import SOURCES, open_source
+from t8_client.stats import STATISTICS, iter_statistics
 from t8_client.util.csv import save_array_to_csv
 from t8_client.util.plots import plot_spectrum, plot_waveform
+from t8_client.util.timestamp import iso_string_to_timestamp, timestamp_to_iso_string
+from t8_client.watch import watch as watch_captures
 
 
 @click.group()
+@click.option(
+    "--source",
+    type=click.Choice(SOURCES),
+    help="Where listings and captures come from: the live T8 (http), the live T8"
+    + " recording every capture into the store (record) or the store alone"
+    + " (archive). Defaults to record with --store and http otherwise (or the"
+    + " T8_SOURCE variable)",
+)
+@click.option(
+    "--store",
+    "store_path",
+    help="Directory of the local payload store that records captures (or the"
+    + " T8_STORE variable)",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Shorthand for --source archive",
+)
 @click.pass_context
-def cli(ctx):
+def cli(ctx, source, store_path, offline):
     ctx.ensure_object(dict)
-    ctx.obj["HOST"] = os.getenv("HOST")
-    ctx.obj["ID"] = os.getenv("ID")
-    ctx.obj["T8_USER"] = os.getenv("T8_USER")
-    ctx.obj["T8_PASSWORD"] = os.getenv("T8_PASSWORD")
+    ctx.obj["HOST"] = getenv(ctx, "HOST")
+    ctx.obj["ID"] = getenv(ctx, "ID")
+    ctx.obj["T8_USER"] = getenv(ctx, "T8_USER")
+    ctx.obj["T8_PASSWORD"] = getenv(ctx, "T8_PASSWORD")
+
+    # Read with `getenv` rather than `envvar`, which only sees this process
+    if source is None:
+        source = getenv(ctx, "T8_SOURCE")
+        if source is not None and source not in SOURCES:
+            raise click.BadParameter(
+                f"'{source}' is not one of {', '.join(SOURCES)}", param_hint="T8_SOURCE"
+            )
+    store_path = store_path or getenv(ctx, "T8_STORE")
+    if store_path:
+        store_path = resolve_path(ctx, store_path)
+    if offline:
+        source = "archive"
+    elif source is None:
+        source = "record" if store_path else "http"
+    # A daemon running the commands provides long-lived sources and connection
+    # parameters (see `t8_client.daemon`)
+    shared_source = ctx.obj.get("OPEN_SOURCE")
+    try:
+        data_source = (shared_source or open_source)(source, store_path)
+    except ValueError as error:
+        raise click.UsageError(f"{error} (--store)") from error
+    if shared_source is None:
+        ctx.call_on_close(data_source.close)
+    ctx.obj["DATA_SOURCE"] = {"source": data_source, **ctx.obj.get("SHARED", {})}
+
+
+def getenv(ctx, name) -> str | None:
+    """
+    Returns an environment variable of the command: the variable of the client
+    when the command is run by a daemon, which passes them in `ENV` (see
+    `t8_client.daemon`), or of this process otherwise.
+    """
+    return ctx.obj.get("ENV", os.environ).get(name) or None
+
+
+def resolve_path(ctx, path) -> str:
+    """
+    Returns a path relative to the working directory of the command: the one of the
+    client when the command is run by a daemon, which passes it in `CWD`, or of this
+    process otherwise.
+    """
+    return os.path.join(ctx.obj.get("CWD", ""), path)
+
+
+def connection_params(ctx) -> dict:
+    """
+    Returns the connection parameters of the T8 given by the environment, and the
+    data source, as keyword arguments for the `get_data` functions.
+    """
+    return {
+        "host": ctx.obj["HOST"],
+        "id": ctx.obj["ID"],
+        "t8_user": ctx.obj["T8_USER"],
+        "t8_password": ctx.obj["T8_PASSWORD"],
+        **ctx.obj["DATA_SOURCE"],
+    }
 
 
 def pmode_params(func):
@@ -47,13 +129,10 @@ def list_waves(ctx, machine, point, pmode):
     if point and ":" in point:
         parse_combined_tag(ctx, None, point)
     for wave in get_data.get_wave_list(
-        host=ctx.obj["HOST"],
-        id=ctx.obj["ID"],
+        **connection_params(ctx),
         machine=ctx.params["machine"],
         point=ctx.params["point"],
         pmode=ctx.params["pmode"],
-        t8_user=ctx.obj["T8_USER"],
-        t8_password=ctx.obj["T8_PASSWORD"],
     ):
         print(wave)
 
@@ -69,13 +148,10 @@ def list_spectra(ctx, machine, point, pmode):
     if point and ":" in point:
         parse_combined_tag(ctx, None, point)
     for spectra in get_data.get_spectra(
-        host=ctx.obj["HOST"],
-        id=ctx.obj["ID"],
+        **connection_params(ctx),
         machine=ctx.params["machine"],
         point=ctx.params["point"],
         pmode=ctx.params["pmode"],
-        t8_user=ctx.obj["T8_USER"],
-        t8_password=ctx.obj["T8_PASSWORD"],
     ):
         print(spectra)
 
@@ -91,14 +167,11 @@ def get_wave(ctx, machine, point, pmode, time):
     if point and ":" in point:
         parse_combined_tag(ctx, None, point)
     waveform, _ = get_data.get_wave(
-        host=ctx.obj["HOST"],
-        id=ctx.obj["ID"],
+        **connection_params(ctx),
         machine=ctx.params["machine"],
         point=ctx.params["point"],
         pmode=ctx.params["pmode"],
         time=time,
-        t8_user=ctx.obj["T8_USER"],
-        t8_password=ctx.obj["T8_PASSWORD"],
     )
 
     # Print the waveform data
@@ -110,7 +183,7 @@ def get_wave(ctx, machine, point, pmode, time):
         f"wave_{ctx.params['machine']}_{ctx.params['point']}_"
         + f"{ctx.params['pmode']}_{time}.csv"
     )
-    file_path = os.path.join("output", filename)
+    file_path = resolve_path(ctx, os.path.join("output", filename))
     save_array_to_csv(file_path, waveform, "Samples")
 
 
@@ -125,14 +198,11 @@ def get_spectrum(ctx, machine, point, pmode, time):
     if point and ":" in point:
         parse_combined_tag(ctx, None, point)
     spectrum = get_data.get_spectrum(
-        host=ctx.obj["HOST"],
-        id=ctx.obj["ID"],
+        **connection_params(ctx),
         machine=ctx.params["machine"],
         point=ctx.params["point"],
         pmode=ctx.params["pmode"],
         time=time,
-        t8_user=ctx.obj["T8_USER"],
-        t8_password=ctx.obj["T8_PASSWORD"],
     )[0]
 
     # Print the spectrum data
@@ -144,7 +214,7 @@ def get_spectrum(ctx, machine, point, pmode, time):
         f"spectrum_{ctx.params['machine']}_{ctx.params['point']}_"
         + f"{ctx.params['pmode']}_{time}.csv"
     )
-    file_path = os.path.join("output", filename)
+    file_path = resolve_path(ctx, os.path.join("output", filename))
     save_array_to_csv(file_path, spectrum, "Samples")
 
 
@@ -159,14 +229,11 @@ def plot_wave(ctx, machine, point, pmode, time):
     if point and ":" in point:
         parse_combined_tag(ctx, None, point)
     waveform, sample_rate = get_data.get_wave(
-        host=ctx.obj["HOST"],
-        id=ctx.obj["ID"],
+        **connection_params(ctx),
         machine=ctx.params["machine"],
         point=ctx.params["point"],
         pmode=ctx.params["pmode"],
         time=time,
-        t8_user=ctx.obj["T8_USER"],
-        t8_password=ctx.obj["T8_PASSWORD"],
     )
 
     plot_waveform(waveform, sample_rate)
@@ -184,14 +251,11 @@ def plot_spectrum_cmd(ctx, machine, point, pmode, time):
     if point and ":" in point:
         parse_combined_tag(ctx, None, point)
     spectrum, fmin, fmax = get_data.get_spectrum(
-        host=ctx.obj["HOST"],
-        id=ctx.obj["ID"],
+        **connection_params(ctx),
         machine=ctx.params["machine"],
         point=ctx.params["point"],
         pmode=ctx.params["pmode"],
         time=time,
-        t8_user=ctx.obj["T8_USER"],
-        t8_password=ctx.obj["T8_PASSWORD"],
     )
 
     freqs = np.linspace(fmin, fmax, len(spectrum))
@@ -199,5 +263,341 @@ def plot_spectrum_cmd(ctx, machine, point, pmode, time):
     plot_spectrum(spectrum, freqs, 0, 500)
 
 
+@cli.command(
+    name="export-parquet",
+    help="Export all the waves or spectra of a machine, point, and processing mode"
+    + " within a time range to a partitioned Parquet dataset.",
+)
+@pmode_params
+@click.option("-k", "--kind", type=click.Choice(["waves", "spectra"]), default="waves")
+@click.option("-s", "--start", help="Start of the time range")
+@click.option("-e", "--end", help="End of the time range")
+@click.option(
+    "--dtype",
+    type=click.Choice(["float32", "float16"]),
+    default="float32",
+    help="Storage type of the samples",
+)
+@click.option(
+    "-o", "--output", default=os.path.join("output", "parquet"), help="Dataset root"
+)
+@click.pass_context
+def export_parquet(ctx, machine, point, pmode, kind, start, end, dtype, output):
+    from t8_client.export import export_parquet as export
+
+    if point and ":" in point:
+        parse_combined_tag(ctx, None, point)
+    count = export(
+        resolve_path(ctx, output),
+        kind=kind,
+        start=start,
+        end=end,
+        dtype=dtype,
+        **connection_params(ctx),
+        machine=ctx.params["machine"],
+        point=ctx.params["point"],
+        pmode=ctx.params["pmode"],
+    )
+    print(f"Exported {count} {kind} to {os.path.join(output, kind)}")
+
+
+@cli.command(
+    name="index-spectra",
+    help="Add the spectra of a machine, point, and processing mode within a time range"
+    + " to the local similarity index.",
+)
+@pmode_params
+@click.option("-s", "--start", help="Start of the time range")
+@click.option("-e", "--end", help="End of the time range")
+@click.option(
+    "-i",
+    "--index",
+    "index_path",
+    default=os.path.join("output", "spectra_index.npz"),
+    help="Path of the similarity index",
+)
+@click.pass_context
+def index_spectra(ctx, machine, point, pmode, start, end, index_path):
+    if point and ":" in point:
+        parse_combined_tag(ctx, None, point)
+    url_params = {
+        **connection_params(ctx),
+        "machine": ctx.params["machine"],
+        "point": ctx.params["point"],
+        "pmode": ctx.params["pmode"],
+    }
+    index_path = resolve_path(ctx, index_path)
+    index = SpectrumIndex.load(index_path) if os.path.exists(index_path) else None
+
+    tag = f"{url_params['machine']}:{url_params['point']}:{url_params['pmode']}"
+    added = 0
+    for time in get_data.list_captures("spectra", start, end, **url_params):
+        # Only fetch the spectra that are not indexed yet
+        if index is not None and (tag, iso_string_to_timestamp(time)) in index:
+            continue
+        capture = get_data.get_spectrum_capture(**url_params, time=time)
+        if index is None:
+            index = SpectrumIndex(capture.fmax / 1000, capture.fmax)
+        index.add(capture.tag, capture.timestamp, capture.data, capture.freqs)
+        added += 1
+
+    if index is not None:
+        index.save(index_path)
+    print(f"Added {added} spectra, the index has {len(index or [])} spectra")
+
+
+@cli.command(
+    name="similar",
+    help="Find the indexed spectra most similar to the spectrum of a machine, point,"
+    + " and processing mode at a given time.",
+)
+@pmode_params
+@click.option("-t", "--time", required=True, help="Time of the spectrum")
+@click.option("-k", "--neighbours", default=10, help="Number of spectra to list")
+@click.option(
+    "-i",
+    "--index",
+    "index_path",
+    default=os.path.join("output", "spectra_index.npz"),
+    help="Path of the similarity index",
+)
+@click.option(
+    "--approximate", is_flag=True, help="Use the hash tables instead of a full scan"
+)
+@click.pass_context
+def similar(ctx, machine, point, pmode, time, neighbours, index_path, approximate):
+    if point and ":" in point:
+        parse_combined_tag(ctx, None, point)
+    index = SpectrumIndex.load(resolve_path(ctx, index_path))
+    capture = get_data.get_spectrum_capture(
+        **connection_params(ctx),
+        machine=ctx.params["machine"],
+        point=ctx.params["point"],
+        pmode=ctx.params["pmode"],
+        time=time,
+    )
+
+    results = index.query(
+        capture.data, capture.freqs, neighbours + 1, approximate=approximate
+    )
+    results = [r for r in results if r[:2] != (capture.tag, capture.timestamp)]
+    for tag, timestamp, distance in results[:neighbours]:
+        print(f"{tag} {timestamp_to_iso_string(timestamp)} {distance:.4f}")
+
+
+@cli.command(
+    name="watch",
+    help="Watch one or more tags and print every new wave or spectrum as soon as it"
+    + " is captured.",
+)
+@click.option(
+    "-T",
+    "--tag",
+    "tags",
+    multiple=True,
+    required=True,
+    help="Combined tag in the format M1:P1:PM1. Can be given several times",
+)
+@click.option(
+    "-k",
+    "--kind",
+    "kinds",
+    type=click.Choice(["waves", "spectra"]),
+    multiple=True,
+    default=["waves"],
+    help="Kind of captures to watch. Can be given several times",
+)
+@click.option("-s", "--since", help="Also report captures after this time")
+@click.option(
+    "--min-interval", default=1.0, help="Minimum seconds between polls of a tag"
+)
+@click.option(
+    "--max-interval", default=60.0, help="Maximum seconds between polls of a tag"
+)
+@click.option("--save", is_flag=True, help="Save every new capture to a CSV file")
+@click.pass_context
+def watch(ctx, tags, kinds, since, min_interval, max_interval, save):
+    for kind, tag, time, result in watch_captures(
+        tags,
+        kinds=kinds,
+        since=since,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        **connection_params(ctx),
+    ):
+        event = f"{kind} {tag} {time}" if time else f"{kind} {tag}"
+        if isinstance(result, Exception):
+            click.echo(f"{event} error: {result}", err=True)
+            continue
+        print(event, flush=True)
+
+        if save:
+            machine, point, pmode = tag.split(":")
+            prefix = "wave" if kind == "waves" else "spectrum"
+            filename = f"{prefix}_{machine}_{point}_{pmode}_{time}.csv"
+            file_path = resolve_path(ctx, os.path.join("output", filename))
+            save_array_to_csv(file_path, result[0], "Samples")
+
+
+@cli.command(
+    help="Print the overall values (RMS, peak, peak to peak, crest factor and"
+    + " kurtosis) of every wave of a machine, point, and processing mode within a"
+    + " time range as CSV, decoding each wave in chunks.",
+)
+@pmode_params
+@click.option("-s", "--start", help="Start of the time range")
+@click.option("-e", "--end", help="End of the time range")
+@click.option(
+    "--chunk-size", default=65536, help="Number of samples decompressed at a time"
+)
+@click.pass_context
+def stats(ctx, machine, point, pmode, start, end, chunk_size):
+    if point and ":" in point:
+        parse_combined_tag(ctx, None, point)
+    print(",".join(["time", *STATISTICS]))
+    for time, values in iter_statistics(
+        start,
+        end,
+        chunk_size,
+        **connection_params(ctx),
+        machine=ctx.params["machine"],
+        point=ctx.params["point"],
+        pmode=ctx.params["pmode"],
+    ):
+        row = [f"{values[name]:.6g}" for name in STATISTICS]
+        print(",".join([time, *row]), flush=True)
+
+
+@cli.command(
+    help="Run a background daemon that keeps HTTP connections, data sources and"
+    + " decoded captures warm. While it runs, t8-client commands are forwarded to it"
+    + " instead of starting a new process each time.",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    envvar="T8_DAEMON_SOCKET",
+    help="Path of the Unix socket (or the T8_DAEMON_SOCKET variable)",
+)
+@click.option(
+    "--max-captures",
+    default=256,
+    help="Number of captures kept in memory by every data source",
+)
+def daemon(socket_path, max_captures):
+    from t8_client.daemon import serve
+
+    try:
+        serve(socket_path, max_captures)
+    except RuntimeError as error:
+        raise click.ClickException(str(error)) from error
+
+
+@cli.group(
+    help="Run commands on every device of a fleet described in a TOML profiles file."
+)
+@click.option(
+    "-P",
+    "--profiles",
+    help="Path of the device profiles file, t8_profiles.toml by default (or the"
+    + " T8_PROFILES variable)",
+)
+@click.option(
+    "-d",
+    "--device",
+    "devices",
+    multiple=True,
+    help="Name of a device to use. Can be given several times, defaults to all",
+)
+@click.option(
+    "-T",
+    "--tag",
+    "tags",
+    multiple=True,
+    help="Combined tag in the format M1:P1:PM1 to use instead of the profile tags."
+    + " Can be given several times",
+)
+@click.pass_context
+def fleet(ctx, profiles, devices, tags):
+    profiles = profiles or getenv(ctx, "T8_PROFILES") or "t8_profiles.toml"
+    ctx.obj["FLEET"] = Fleet.from_file(resolve_path(ctx, profiles), ctx.obj.get("ENV"))
+    ctx.obj["DEVICES"] = list(devices) or None
+    ctx.obj["TAGS"] = list(tags) or None
+    ctx.call_on_close(ctx.obj["FLEET"].close)
+
+
+def run_fleet(ctx, function):
+    """
+    Runs a function on the devices and tags selected in the `fleet` group and
+    yields its results, printing the errors of the devices that fail.
+    """
+    # The sessions of the devices take precedence over a shared one
+    data_source = ctx.obj["DATA_SOURCE"]
+    for device, tag, result in ctx.obj["FLEET"].run(
+        lambda **params: function(**{**data_source, **params}),
+        tags=ctx.obj["TAGS"],
+        devices=ctx.obj["DEVICES"],
+    ):
+        if isinstance(result, Exception):
+            click.echo(f"{device} {tag} error: {result}", err=True)
+        else:
+            yield device, tag, result
+
+
+@fleet.command(
+    name="list",
+    help="List the waves or spectra of every device and tag as a list of dates.",
+)
+@click.option("-k", "--kind", type=click.Choice(["waves", "spectra"]), default="waves")
+@click.option("-s", "--start", help="Start of the time range")
+@click.option("-e", "--end", help="End of the time range")
+@click.pass_context
+def fleet_list(ctx, kind, start, end):
+    def list_times(**params):
+        return list(get_data.list_captures(kind, start, end, **params))
+
+    for device, tag, times in run_fleet(ctx, list_times):
+        for time in times:
+            print(f"{device} {tag} {time}", flush=True)
+
+
+@fleet.command(
+    name="latest",
+    help="Fetch the latest wave or spectrum of every device and tag and print its"
+    + " overall value (RMS of the wave, peak of the spectrum).",
+)
+@click.option("-k", "--kind", type=click.Choice(["waves", "spectra"]), default="waves")
+@click.option("--save", is_flag=True, help="Save every capture to a CSV file")
+@click.pass_context
+def fleet_latest(ctx, kind, save):
+    get_capture = (
+        get_data.get_wave_capture if kind == "waves" else get_data.get_spectrum_capture
+    )
+
+    def latest(**params):
+        times = list(get_data.list_captures(kind, **params))
+        if not times:
+            return None
+        return get_capture(**params, time=max(times))
+
+    for device, tag, capture in run_fleet(ctx, latest):
+        if capture is None:
+            continue
+        time = capture.time
+        data = capture.data
+        if kind == "waves":
+            overall = f"rms {np.sqrt(np.mean(np.square(data))):.4f}"
+        else:
+            peak = int(np.argmax(data))
+            overall = f"peak {data[peak]:.4f} at {capture.freqs[peak]:.2f} Hz"
+        print(f"{device} {tag} {time} {overall}", flush=True)
+
+        if save:
+            prefix = "wave" if kind == "waves" else "spectrum"
+            filename = f"{prefix}_{device}_{tag.replace(':', '_')}_{time}.csv"
+            file_path = resolve_path(ctx, os.path.join("output", filename))
+            save_array_to_csv(file_path, data, "Samples")
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,164 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import get_window
+
+from t8_client import get_data
+from t8_client.scheduler import default_scheduler
+from t8_client.watch import parse_tag
+
+
+def common_times(tags, **kwargs) -> list[str]:
+    """
+    Lists the timestamps at which every one of several tags has a wave, that is,
+    the instants captured simultaneously at all of their points.
+
+    The listings are fetched concurrently.
+
+    Args:
+        tags (list[str]): The combined tags in the format M1:P1:PM1.
+        kwargs: The connection parameters as keyword arguments.
+
+    Returns:
+        list[str]: The ISO formatted timestamps shared by all the tags, sorted.
+
+    Raises:
+        T8Error: If a request to the server fails.
+    """
+    scheduler = kwargs.get("scheduler") or default_scheduler
+
+    def list_waves(tag):
+        machine, point, pmode = parse_tag(tag)
+        params = {**kwargs, "machine": machine, "point": point, "pmode": pmode}
+        return set(get_data.get_wave_list(**params))
+
+    listings = scheduler.map(list_waves, tags)
+    return sorted(set.intersection(*listings)) if listings else []
+
+
+def get_synchronous_waves(tags, time=None, **kwargs) -> tuple[np.ndarray, int]:
+    """
+    Fetches the waves of several points captured at the same instant, such as the
+    bearings of a machine, concurrently through `get_data`.
+
+    Args:
+        tags (list[str]): The combined tags in the format M1:P1:PM1, one per
+            channel.
+        time (str): ISO formatted timestamp of the waves. Defaults to the latest
+            instant captured at all the tags.
+        kwargs: The connection parameters as keyword arguments.
+
+    Returns:
+        tuple[np.ndarray, int]: The waveforms, one row per tag, and their sample
+            rate.
+
+    Raises:
+        ValueError: If no instant was captured at every tag, or the waves differ
+            in length or sample rate.
+        T8Error: If a request to the server fails.
+    """
+    if time is None:
+        times = common_times(tags, **kwargs)
+        if not times:
+            raise ValueError("No wave was captured at the same time at every tag")
+        time = times[-1]
+
+    def get_wave(tag):
+        machine, point, pmode = parse_tag(tag)
+        params = {**kwargs, "machine": machine, "point": point, "pmode": pmode}
+        return get_data.get_wave_capture(**params, time=time)
+
+    scheduler = kwargs.get("scheduler") or default_scheduler
+    captures = scheduler.map(get_wave, tags)
+
+    sample_rates = {capture.sample_rate for capture in captures}
+    lengths = {capture.n_samples for capture in captures}
+    if len(sample_rates) > 1 or len(lengths) > 1:
+        raise ValueError(
+            f"The waves at {time} differ in length or sample rate and cannot be "
+            "compared"
+        )
+    return np.stack([capture.data for capture in captures]), sample_rates.pop()
+
+
+def cross_spectral_matrix(
+    waveforms, sample_rate, nperseg=1024, noverlap=None, window="hann"
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the auto and cross spectral densities of every pair of channels with
+    Welch's method, for all the pairs at once.
+
+    The waveforms are split into overlapping segments through a strided view; the
+    segments are then copied once their mean is removed and they are windowed,
+    and all the segments of all the channels are transformed in a single FFT. The
+    spectral matrix of every frequency is then the average over the segments of
+    the outer products of the channel spectra, computed as one batched matrix
+    product, so its cost grows with the number of pairs without any Python loop
+    over them.
+
+    Element `[f, i, j]` equals `scipy.signal.csd(waveforms[i], waveforms[j])` at
+    frequency `f`, so the diagonal holds the power spectral densities of the
+    channels and the matrix of every frequency is Hermitian.
+
+    Args:
+        waveforms (np.ndarray): The time-aligned waveforms, one row per channel.
+        sample_rate (float): The sampling rate of the waveforms in Hz.
+        nperseg (int): The length of the segments. Limited to the waveform length.
+        noverlap (int): The number of samples shared by consecutive segments, less
+            than `nperseg`. Defaults to half a segment.
+        window (str): The window applied to every segment, as accepted by
+            `scipy.signal.get_window`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The complex spectral densities, with shape
+            (frequencies, channels, channels), and the frequencies in Hz.
+
+    Raises:
+        ValueError: If `noverlap` is not less than the segment length.
+    """
+    waveforms = np.atleast_2d(np.asarray(waveforms, dtype=float))
+    nperseg = min(nperseg, waveforms.shape[-1])
+    noverlap = nperseg // 2 if noverlap is None else noverlap
+    if noverlap >= nperseg:
+        raise ValueError(
+            f"noverlap ({noverlap}) must be less than the segment length ({nperseg})"
+        )
+    win = get_window(window, nperseg)
+
+    # (channels, segments, nperseg)
+    segments = sliding_window_view(waveforms, nperseg, axis=-1)[
+        :, :: nperseg - noverlap
+    ]
+    segments = segments - segments.mean(axis=-1, keepdims=True)
+    spectra = rfft(segments * win, axis=-1)
+
+    # (frequencies, channels, segments), averaged over the segments
+    spectra = spectra.transpose(2, 0, 1)
+    matrix = np.conj(spectra) @ spectra.transpose(0, 2, 1)
+    matrix *= 1 / (sample_rate * np.sum(win**2) * segments.shape[1])
+    # One-sided densities: double every bin but DC and, for even lengths, Nyquist
+    matrix[1 : None if nperseg % 2 else -1] *= 2
+
+    return matrix, rfftfreq(nperseg, 1 / sample_rate)
+
+
+def coherence_matrix(matrix: np.ndarray) -> np.ndarray:
+    """
+    Computes the magnitude squared coherence of every pair of channels from their
+    spectral matrix.
+
+    Args:
+        matrix (np.ndarray): The spectral densities, as returned by
+            `cross_spectral_matrix`.
+
+    Returns:
+        np.ndarray: The coherence of every pair at every frequency, between 0 and
+            1, with shape (frequencies, channels, channels). Frequencies at which a
+            channel has no power have a coherence of 0.
+    """
+    power = np.real(np.diagonal(matrix, axis1=1, axis2=2))
+    normalization = power[:, :, None] * power[:, None, :]
+    coherence = np.abs(matrix) ** 2
+    np.divide(coherence, normalization, out=coherence, where=normalization > 0)
+    coherence[normalization <= 0] = 0
+    return coherence
@@ -0,0 +1,392 @@
+"""
+Optional background daemon that runs `t8-client` commands in a long-lived process.
+
+Every invocation of `t8-client` otherwise starts a new interpreter, imports NumPy,
+SciPy and Matplotlib, opens new HTTPS connections and starts with empty caches.
+The daemon keeps all of that warm: one HTTP session with its connection pool,
+the data sources with their payload stores and the recently used captures
+already decoded (see `CachedSource`), and the listing validators of `get_data`.
+
+The `t8-client` entry point (`main`) only imports this module, forwards the
+command line, the environment variables read by the commands and the working
+directory to the daemon over a Unix socket and relays its output and exit code;
+when no daemon is running it runs the command in-process as usual. The socket is
+only accessible to the user running the daemon, and the client checks that the
+daemon runs as the same user before sending anything, credentials included.
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import traceback
+from contextlib import redirect_stderr, redirect_stdout, suppress
+
+# Commands always run in the calling process: the daemon itself, and the
+# commands that open plot windows or run indefinitely
+LOCAL_COMMANDS = {"daemon", "plot-wave", "plot-spectrum", "watch"}
+
+# Options of the `t8-client` group that take a value, skipped when looking for the
+# command of a command line
+GROUP_OPTIONS = {"--source", "--store"}
+
+# Environment variables read by the commands, forwarded to the daemon
+FORWARDED_VARIABLES = (
+    "HOST",
+    "ID",
+    "T8_USER",
+    "T8_PASSWORD",
+    "T8_SOURCE",
+    "T8_STORE",
+    "T8_PROFILES",
+)
+
+# Output is sent to the client when flushed or when this many characters are
+# buffered
+BUFFER_SIZE = 65536
+
+
+def socket_path() -> str:
+    """
+    Returns the path of the Unix socket of the daemon: the T8_DAEMON_SOCKET
+    variable, or a socket in a directory of the current user in the runtime or
+    temporary directory (see `private_directory`).
+    """
+    path = os.getenv("T8_DAEMON_SOCKET")
+    if path:
+        return path
+    directory = os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"t8-client-{os.getuid()}", "daemon.sock")
+
+
+def private_directory(path) -> None:
+    """
+    Creates a directory only accessible to the current user, or checks that an
+    existing one is.
+
+    Raises:
+        RuntimeError: If the path is not a directory, belongs to another user or
+            is accessible to other users.
+    """
+    with suppress(FileExistsError):
+        os.mkdir(path, 0o700)
+    info = os.lstat(path)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise RuntimeError(f"{path} is not a private directory of the current user")
+
+
+def _peer_uid(client, path) -> int:
+    """
+    Returns the user running the process at the other end of a connected Unix
+    socket, or the owner of the socket where the system does not report it.
+    """
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = struct.Struct("3i")
+        pid, uid, gid = credentials.unpack(
+            client.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, credentials.size)
+        )
+        return uid
+    return os.stat(path).st_uid
+
+
+def forward(args, path=None) -> int | None:
+    """
+    Runs a command line in the daemon, relaying its output to the standard output
+    and error of this process.
+
+    Args:
+        args (list[str]): The arguments of `t8-client`.
+        path (str): The socket of the daemon. Defaults to `socket_path()`.
+
+    Returns:
+        int | None: The exit code of the command, or None if no daemon of the
+            current user is running.
+    """
+    path = path or socket_path()
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        peer_uid = _peer_uid(client, path)
+    except OSError:
+        client.close()
+        return None
+    if peer_uid != os.getuid():
+        client.close()
+        print(f"t8-client: ignoring {path}, run by another user", file=sys.stderr)
+        return None
+
+    env = {name: os.environ[name] for name in FORWARDED_VARIABLES if name in os.environ}
+    request = {"args": list(args), "env": env, "cwd": os.getcwd()}
+    # Bound before the daemon redirects its own streams, in case it runs in this
+    # same process
+    outputs = {"stdout": sys.stdout, "stderr": sys.stderr}
+    with client, client.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        for line in stream:
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            output = outputs[message["stream"]]
+            output.write(message["data"])
+            output.flush()
+
+    print("t8-client: lost the connection to the daemon", file=sys.stderr)
+    return 1
+
+
+def command_name(args) -> str | None:
+    """
+    Returns the command of a `t8-client` command line, without importing the
+    command line interface.
+
+    Args:
+        args (list[str]): The arguments of `t8-client`.
+
+    Returns:
+        str | None: The first argument that is neither a group option nor the value
+            of one, or None if there is no command.
+    """
+    args = iter(args)
+    for arg in args:
+        if arg in GROUP_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def main(args=None):
+    """
+    Entry point of `t8-client`: forwards the command to the daemon if it is
+    running, unless T8_NO_DAEMON is set, and runs it in-process otherwise.
+    """
+    args = sys.argv[1:] if args is None else list(args)
+    if not os.getenv("T8_NO_DAEMON") and command_name(args) not in LOCAL_COMMANDS:
+        code = forward(args)
+        if code is not None:
+            sys.exit(code)
+
+    from t8_client.cli import cli
+
+    cli(args, prog_name="t8-client")
+
+
+class _Output(io.TextIOBase):
+    """
+    Text stream that sends what is written to it to the client of a request.
+    """
+
+    def __init__(self, name, send):
+        self.name = name
+        self._send = send
+        self._buffer = []
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text) -> int:
+        if isinstance(text, bytes | bytearray):
+            text = text.decode(errors="replace")
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= BUFFER_SIZE:
+            self.flush()
+        return len(text)
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._send({"stream": self.name, "data": "".join(self._buffer)})
+            self._buffer.clear()
+            self._size = 0
+
+
+class Daemon:
+    """
+    Runs the `t8-client` commands sent to a Unix socket in this process.
+
+    Every command gets the environment variables and working directory of its
+    client through the context object of the command line interface (`ENV` and
+    `CWD`), without changing those of the process. Commands run one at a time,
+    because their output is captured by redirecting the standard streams of the
+    process. Every command gets the shared HTTP session and the data source of its
+    `--source` and `--store` options, which is opened once and then reused with
+    its cache of captures. Payload stores load the captures recorded by other
+    processes before every lookup, so an archive served by the daemon stays up to
+    date.
+
+    Args:
+        path (str): The socket to listen on. Defaults to `socket_path()`.
+        max_captures (int): The number of captures kept in memory by every data
+            source.
+
+    Raises:
+        RuntimeError: If another daemon is already listening on the socket.
+    """
+
+    def __init__(self, path=None, max_captures=256):
+        import requests
+
+        if path is None:
+            path = socket_path()
+            if not os.getenv("T8_DAEMON_SOCKET"):
+                private_directory(os.path.dirname(path))
+        self.path = path
+        self.max_captures = max_captures
+        self.session = requests.Session()
+        self._sources = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            if is_running(self.path):
+                raise RuntimeError(f"A daemon is already running on {self.path}")
+            # Left by a daemon that did not exit cleanly
+            os.unlink(self.path)
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                daemon.handle(self.rfile, self.wfile)
+
+        # Only the user running the daemon can connect to it
+        umask = os.umask(0o177)
+        try:
+            self.server = socketserver.ThreadingUnixStreamServer(self.path, Handler)
+        finally:
+            os.umask(umask)
+        self.server.daemon_threads = True
+
+    def open_source(self, name, archive):
+        """
+        Returns the long-lived data source of a `--source` and `--store`
+        configuration, opening it on first use.
+        """
+        from t8_client.sources import CachedSource, open_source
+
+        key = (name, os.path.abspath(archive) if archive else None)
+        source = self._sources.get(key)
+        if source is None:
+            source = CachedSource(open_source(name, key[1]), self.max_captures)
+            self._sources[key] = source
+        return source
+
+    def handle(self, rfile, wfile) -> None:
+        """
+        Runs the command of a request and sends its output and exit code.
+        """
+
+        def send(message):
+            wfile.write(json.dumps(message).encode() + b"\n")
+            wfile.flush()
+
+        line = rfile.readline()
+        if not line:
+            # A connection that only checked whether the daemon is running
+            return
+        request = json.loads(line)
+        with self._lock:
+            code = self._run(request, send)
+        send({"exit": code})
+
+    def _run(self, request, send) -> int:
+        from t8_client.cli import cli
+
+        stdout = _Output("stdout", send)
+        stderr = _Output("stderr", send)
+        obj = {
+            "OPEN_SOURCE": self.open_source,
+            "SHARED": {"session": self.session},
+            "ENV": request["env"],
+            "CWD": request["cwd"],
+        }
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                cli.main(request["args"], prog_name="t8-client", obj=obj)
+            except SystemExit as error:
+                if error.code is None or isinstance(error.code, int):
+                    return error.code or 0
+                print(error.code, file=sys.stderr)
+                return 1
+            except Exception:
+                traceback.print_exc()
+                return 1
+            finally:
+                stdout.flush()
+                stderr.flush()
+            return 0
+
+    def serve_forever(self) -> None:
+        """
+        Serves requests until `shutdown` is called.
+        """
+        self.server.serve_forever()
+
+    def shutdown(self) -> None:
+        """
+        Stops serving requests. Must be called from another thread than the one
+        running `serve_forever`.
+        """
+        self.server.shutdown()
+
+    def close(self) -> None:
+        """
+        Closes the socket, the data sources and the HTTP session.
+        """
+        self.server.server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        for source in self._sources.values():
+            source.close()
+        self._sources.clear()
+        self.session.close()
+
+
+def is_running(path=None) -> bool:
+    """
+    Returns whether a daemon is accepting connections on a socket, by default
+    `socket_path()`.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(path or socket_path())
+        except OSError:
+            return False
+    return True
+
+
+def serve(path=None, max_captures=256) -> None:
+    """
+    Runs a daemon in the foreground until interrupted or terminated.
+
+    Args:
+        path (str): The socket to listen on. Defaults to `socket_path()`.
+        max_captures (int): The number of captures kept in memory by every data
+            source.
+    """
+    import signal
+
+    daemon = Daemon(path, max_captures)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Listening on {daemon.path}", file=sys.stderr, flush=True)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.fft import ifft, next_fast_len, rfft, rfftfreq
+from scipy.signal import butter, sosfreqz
+
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+
+@lru_cache(maxsize=64)
+def _envelope_response(
+    n_fft: int, sample_rate: float, band: tuple[float, float], order: int, dtype
+) -> np.ndarray:
+    """
+    Designs the one-sided frequency response that band-pass filters a signal and
+    turns it into its analytic signal in a single multiplication of its FFT.
+
+    The band-pass is a Butterworth filter applied with zero phase (its squared
+    magnitude, as `sosfiltfilt` would do), and the analytic signal doubles the
+    positive frequencies and drops the negative ones.
+
+    Parameters:
+    n_fft (int): The length of the FFT.
+    sample_rate (float): The sampling rate of the waveforms in Hz.
+    band (tuple[float, float]): The pass band in Hz.
+    order (int): The order of the Butterworth filter.
+    dtype (np.dtype): The real data type of the response.
+
+    Returns:
+    np.ndarray: The read-only response for each bin of the real FFT.
+    """
+    sos = butter(order, band, btype="bandpass", fs=sample_rate, output="sos")
+    freqs = rfftfreq(n_fft, 1 / sample_rate)
+    _, response = sosfreqz(sos, worN=freqs, fs=sample_rate)
+    response = np.abs(response) ** 2
+    response[1 : (n_fft + 1) // 2] *= 2
+    response = response.astype(dtype)
+    response.flags.writeable = False
+    return response
+
+
+def calculate_envelope(
+    waveforms: np.ndarray, sample_rate: float, band: tuple[float, float], order=4
+) -> np.ndarray:
+    """
+    Calculates the envelope of one or more waveforms in a frequency band, i.e. the
+    magnitude of the analytic signal of the band-pass filtered waveforms.
+
+    Filtering and the Hilbert transform are both done in the frequency domain with
+    one real FFT and one inverse FFT per waveform, over the whole batch at once.
+    The filter designs are cached per length, sample rate and band.
+
+    Parameters:
+    waveforms (np.ndarray): The waveform, or a 2-D batch of waveforms of the same
+        length and sample rate, one per row.
+    sample_rate (float): The sampling rate of the waveforms in Hz.
+    band (tuple[float, float]): The pass band in Hz.
+    order (int): The order of the Butterworth band-pass filter.
+
+    Returns:
+    np.ndarray: The envelope of each waveform, with the same shape as the input.
+    """
+    waveforms = np.asarray(waveforms)
+    n_samples = waveforms.shape[-1]
+    n_fft = next_fast_len(n_samples, real=True)
+    real_dtype = np.float32 if waveforms.dtype == np.float32 else np.float64
+
+    response = _envelope_response(
+        n_fft, float(sample_rate), (float(band[0]), float(band[1])), order, real_dtype
+    )
+    half_spectrum = rfft(waveforms, n=n_fft, axis=-1)
+    half_spectrum *= response
+
+    analytic_spectrum = np.zeros(
+        half_spectrum.shape[:-1] + (n_fft,), half_spectrum.dtype
+    )
+    analytic_spectrum[..., : half_spectrum.shape[-1]] = half_spectrum
+    analytic = ifft(analytic_spectrum, axis=-1, overwrite_x=True)
+    return np.abs(analytic[..., :n_samples])
+
+
+def calculate_envelope_spectrum(
+    waveforms: np.ndarray,
+    sample_rate: float,
+    band: tuple[float, float],
+    fmin: float,
+    fmax: float,
+    order=4,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the envelope (demodulation) spectrum of one or more waveforms, used
+    to detect the repetition frequencies of bearing faults.
+
+    Parameters:
+    waveforms (np.ndarray): The waveform, or a 2-D batch of waveforms of the same
+        length and sample rate, one per row.
+    sample_rate (float): The sampling rate of the waveforms in Hz.
+    band (tuple[float, float]): The demodulation band in Hz.
+    fmin (float): The minimum frequency of interest of the envelope spectrum in Hz.
+    fmax (float): The maximum frequency of interest of the envelope spectrum in Hz.
+    order (int): The order of the Butterworth band-pass filter.
+
+    Returns:
+    tuple[np.ndarray, np.ndarray]: A tuple containing:
+        - envelope_spectrum (np.ndarray): The magnitude of the spectrum of the
+            envelope, one row per waveform for batches.
+        - freqs (np.ndarray): The corresponding frequencies.
+    """
+    envelope = calculate_envelope(waveforms, sample_rate, band, order)
+    envelope -= envelope.mean(axis=-1, keepdims=True)
+    return calculate_spectrum(preprocess_waveform(envelope), sample_rate, fmin, fmax)
@@ -0,0 +1,36 @@
+class T8Error(Exception):
+    """
+    Base class of the errors raised when a request to a T8 fails.
+
+    Args:
+        message (str): Description of the error.
+        status_code (int): The HTTP status code of the response, if any.
+        retry_after (float): Seconds the device asked to wait before retrying, if
+            any.
+    """
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class T8RetryableError(T8Error):
+    """
+    A transient failure (connection error, timeout, 429 or 5xx response) that may
+    succeed if the request is retried later.
+    """
+
+
+class T8CircuitOpenError(T8RetryableError):
+    """
+    The request was not sent because too many consecutive requests to the host
+    failed, and the host is given time to recover.
+    """
+
+
+class T8FatalError(T8Error):
+    """
+    A failure that retrying will not fix, such as a missing resource or invalid
+    credentials.
+    """
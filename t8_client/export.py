@@ -0,0 +1,71 @@
+import os
+
+import requests
+
+from t8_client import get_data
+from t8_client.util.parquet import ParquetCaptureWriter
+
+
+def export_parquet(
+    root,
+    kind="waves",
+    start=None,
+    end=None,
+    dtype="float32",
+    row_group_size=64,
+    **kwargs,
+) -> int:
+    """
+    Exports every wave or spectrum of a point captured within a time range to a
+    partitioned Parquet dataset under `root/kind`.
+
+    Captures are fetched one at a time over a shared session and streamed into the
+    dataset, so memory usage does not depend on the length of the time range.
+
+    Args:
+        root (str): Root directory of the datasets.
+        kind (str): The kind of capture, either "waves" or "spectra".
+        start (str): ISO formatted inclusive lower bound. None for no lower bound.
+        end (str): ISO formatted inclusive upper bound. None for no upper bound.
+        dtype (str): Storage type of the samples, "float32" or "float16".
+        row_group_size (int): Number of captures per row group.
+        kwargs: The URL parameters as keyword arguments.
+
+    Returns:
+        int: The number of exported captures.
+
+    Raises:
+        T8Error: If a request to the server fails.
+    """
+    kwargs = dict(kwargs)
+    own_session = kwargs.get("session") is None
+    if own_session:
+        kwargs["session"] = requests.Session()
+
+    count = 0
+    try:
+        with ParquetCaptureWriter(
+            os.path.join(root, kind), dtype=dtype, row_group_size=row_group_size
+        ) as writer:
+            for time in get_data.list_captures(kind, start, end, **kwargs):
+                if kind == "waves":
+                    capture = get_data.get_wave_capture(**kwargs, time=time)
+                    metadata = {"sample_rate": capture.sample_rate}
+                else:
+                    capture = get_data.get_spectrum_capture(**kwargs, time=time)
+                    metadata = {"fmin": capture.fmin, "fmax": capture.fmax}
+                writer.write(
+                    capture.machine,
+                    capture.point,
+                    capture.pmode,
+                    capture.timestamp,
+                    capture.data,
+                    capture.factor,
+                    **metadata,
+                )
+                count += 1
+    finally:
+        if own_session:
+            kwargs["session"].close()
+
+    return count
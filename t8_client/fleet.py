@@ -0,0 +1,204 @@
+import os
+import tomllib
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from t8_client.exceptions import T8Error
+from t8_client.scheduler import RequestScheduler
+from t8_client.watch import parse_tag
+
+# Keys a device profile may set, besides `tags`
+PROFILE_KEYS = {
+    "host",
+    "id",
+    "t8_user",
+    "t8_password",
+    "scheme",
+    "timeout",
+    "max_connections",
+}
+
+
+def load_profiles(path, environ=None) -> dict[str, dict]:
+    """
+    Loads the connection profiles of a fleet of T8 devices from a TOML file.
+
+    Every device is a `[devices.<name>]` table with its `host`, `id`, optional
+    credentials, `scheme`, `timeout`, `max_connections` (the number of requests sent
+    to the device at once, 4 by default) and the combined `tags` (M1:P1:PM1) to work
+    on. Values in an optional `[defaults]` table apply to every device, and missing
+    credentials are taken from the `T8_USER` and `T8_PASSWORD` environment
+    variables.
+
+    Args:
+        path (str): Path of the TOML file.
+        environ (Mapping[str, str]): The environment variables with the default
+            credentials. Defaults to `os.environ`.
+
+    Returns:
+        dict[str, dict]: The profile of every device, keyed by its name.
+
+    Raises:
+        ValueError: If a profile is incomplete or has unknown keys or invalid tags.
+    """
+    with open(path, "rb") as file:
+        config = tomllib.load(file)
+
+    environ = os.environ if environ is None else environ
+    defaults = {
+        "t8_user": environ.get("T8_USER"),
+        "t8_password": environ.get("T8_PASSWORD"),
+        "max_connections": 4,
+        "tags": [],
+        **config.get("defaults", {}),
+    }
+    profiles = {}
+    for name, device in config.get("devices", {}).items():
+        profile = {**defaults, **device}
+        unknown = set(profile) - PROFILE_KEYS - {"tags"}
+        if unknown:
+            raise ValueError(f"Unknown keys {sorted(unknown)} in device '{name}'")
+        for key in ("host", "id"):
+            if not profile.get(key):
+                raise ValueError(f"Missing '{key}' in device '{name}'")
+        for tag in profile["tags"]:
+            parse_tag(tag)
+        profiles[name] = profile
+    return profiles
+
+
+class Fleet:
+    """
+    Runs requests and analyses against many T8 devices at once.
+
+    Every device gets its own HTTP session, with a connection pool sized to its
+    `max_connections`, and its own `RequestScheduler`, so the concurrency is adapted
+    to each device independently and a slow or failing device does not hold back
+    the others. Use it as a context manager to close the sessions when done.
+
+    Args:
+        profiles (dict[str, dict]): The device profiles, as returned by
+            `load_profiles`.
+        max_workers (int): The number of threads shared by all the devices. Defaults
+            to the sum of the `max_connections` of the devices.
+    """
+
+    def __init__(self, profiles, max_workers=None):
+        self.devices = {}
+        for name, profile in profiles.items():
+            max_connections = profile.get("max_connections", 4)
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=max_connections
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            params = {
+                key: value
+                for key, value in profile.items()
+                if key in PROFILE_KEYS - {"max_connections"}
+            }
+            params["session"] = session
+            params["scheduler"] = RequestScheduler(max_limit=max_connections)
+            self.devices[name] = {
+                "params": params,
+                "max_connections": max_connections,
+                "tags": list(profile.get("tags", [])),
+            }
+        self.max_workers = max_workers or max(
+            sum(device["max_connections"] for device in self.devices.values()), 1
+        )
+
+    @classmethod
+    def from_file(cls, path, environ=None, **kwargs) -> "Fleet":
+        """
+        Creates a fleet from the profiles stored in a TOML file (see
+        `load_profiles`).
+        """
+        return cls(load_profiles(path, environ), **kwargs)
+
+    def close(self) -> None:
+        """
+        Closes the HTTP sessions of every device.
+        """
+        for device in self.devices.values():
+            device["params"]["session"].close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, function, tags=None, devices=None):
+        """
+        Calls a function for every tag of every device and yields the results as
+        soon as they are available, in completion order.
+
+        Each device has at most `max_connections` calls running at once, and the
+        pending calls of a device wait in their own queue, so a device with many
+        tags or slow responses does not use up the threads of the others.
+
+        Args:
+            function (callable): Function called with the connection parameters of
+                the device (including its `session` and `scheduler`) and the
+                `machine`, `point` and `pmode` of the tag as keyword arguments, for
+                example `get_data.get_wave_list`.
+            tags (list[str]): Combined tags to use on every device instead of the
+                tags of its profile.
+            devices (list[str]): Names of the devices to use. Defaults to all.
+
+        Yields:
+            tuple[str, str, object]: The device name, the tag and the value returned
+                by the function, or the `T8Error` it raised, so that a failing
+                device does not interrupt the results of the others.
+
+        Raises:
+            KeyError: If a device name is unknown.
+        """
+        names = list(self.devices) if devices is None else list(devices)
+        pending = {}
+        for name in names:
+            device = self.devices[name]
+            queue = deque()
+            for tag in device["tags"] if tags is None else tags:
+                machine, point, pmode = parse_tag(tag)
+                params = {
+                    **device["params"],
+                    "machine": machine,
+                    "point": point,
+                    "pmode": pmode,
+                }
+                queue.append((tag, params))
+            pending[name] = queue
+
+        def call(params):
+            try:
+                return function(**params)
+            except T8Error as error:
+                return error
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            in_flight = dict.fromkeys(names, 0)
+
+            def submit(name):
+                while (
+                    pending[name]
+                    and in_flight[name] < self.devices[name]["max_connections"]
+                ):
+                    tag, params = pending[name].popleft()
+                    running[executor.submit(call, params)] = (name, tag)
+                    in_flight[name] += 1
+
+            for name in names:
+                submit(name)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, tag = running.pop(future)
+                    in_flight[name] -= 1
+                    submit(name)
+                    yield name, tag, future.result()
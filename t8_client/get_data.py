@@ -1,9 +1,249 @@
+import hashlib
+import threading
+import time as time_module
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+
 import numpy as np
 import requests
 
-from t8_client.util.decoder import zint_to_float
+from t8_client.capture import SpectrumCapture, WaveCapture
+from t8_client.exceptions import T8FatalError, T8RetryableError
+from t8_client.scheduler import default_scheduler
 from t8_client.util.timestamp import iso_string_to_timestamp, timestamp_to_iso_string
 
+# Response status codes worth retrying: the device is busy or temporarily failing
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Validators and parsed bodies of the last successful listing responses, keyed by
+# URL and credentials (see `_conditional_key`), so that unchanged listings can be
+# revalidated with a body-less 304 response. Bounded to the most recently used
+# keys.
+CONDITIONAL_CACHE_SIZE = 256
+_conditional_cache = OrderedDict()
+_conditional_cache_lock = threading.Lock()
+
+
+def clear_conditional_cache():
+    """
+    Forgets every ETag/Last-Modified validator stored for previously fetched URLs.
+    """
+    with _conditional_cache_lock:
+        _conditional_cache.clear()
+
+
+def _conditional_key(url, kwargs) -> tuple[str, str]:
+    """
+    Returns the key of a listing in the conditional cache: its URL and a digest of
+    the credentials, so that a 304 never reuses the body fetched with other
+    credentials and the passwords are not kept in memory.
+    """
+    credentials = f"{kwargs['t8_user']}\0{kwargs['t8_password']}".encode()
+    return url, hashlib.sha256(credentials).hexdigest()
+
+
+def _base_url(kwargs) -> str:
+    """
+    Builds the base URL of the T8 REST API from the connection parameters.
+
+    Args:
+        kwargs: The URL parameters as keyword arguments. The optional `scheme`
+            parameter (defaults to "https") allows pointing the client at plain HTTP
+            stand-in servers.
+
+    Returns:
+        str: The base URL of the REST API, without trailing slash.
+    """
+    scheme = kwargs.get("scheme", "https")
+    return f"{scheme}://{kwargs['host']}/{kwargs['id']}/rest"
+
+
+def _parse_retry_after(value):
+    """
+    Parses the value of a `Retry-After` header.
+
+    Args:
+        value (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+        float | None: The number of seconds to wait, or None if missing or invalid.
+    """
+    if not isinstance(value, str):
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time_module.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fetch_json(url, error_message, conditional=False, **kwargs) -> dict:
+    """
+    Performs a GET request against the T8 API and returns the decoded JSON body.
+
+    The request goes through a `RequestScheduler` (the shared default one unless a
+    `scheduler` is given), which adapts the concurrency per host, retries transient
+    failures honouring `Retry-After` and stops sending requests to hosts that keep
+    failing.
+
+    When `conditional` is set, the ETag and Last-Modified validators of the
+    response are remembered and sent back on the next request to the same URL, so
+    an unchanged resource costs a 304 response with no body and the previously
+    parsed body is reused. Validators are kept for the `CONDITIONAL_CACHE_SIZE`
+    most recently used URLs.
+
+    Args:
+        url (str): The URL to fetch.
+        error_message (str): Prefix of the exception message if the request fails.
+        conditional (bool): Whether to revalidate the URL with conditional headers.
+        kwargs: The URL parameters as keyword arguments. An optional `session`
+            (e.g. a `requests.Session`) can be given to reuse pooled connections,
+            and an optional `timeout` in seconds (30 by default). The listing and
+            capture functions also accept a `source` (a
+            `t8_client.sources.DataSource`) to read from instead of the T8, or a
+            `store` (a `t8_client.store.PayloadStore`) that records every fetched
+            capture, with `offline` to replay it without contacting the T8.
+
+    Returns:
+        dict: The decoded JSON body of the response.
+
+    Raises:
+        T8RetryableError: If the request keeps failing with transient errors.
+        T8FatalError: If the request fails with an error retrying cannot fix.
+    """
+    scheduler = kwargs.get("scheduler") or default_scheduler
+    return scheduler.request(
+        kwargs["host"],
+        lambda: _get_json(url, error_message, conditional, kwargs),
+        # Listings are revalidated and mostly answered with a 304
+        kind="list" if conditional else "capture",
+    )
+
+
+def _get_json(url, error_message, conditional, kwargs) -> dict:
+    """
+    Sends a single GET request for `_fetch_json` and classifies its failures.
+    """
+    http = kwargs.get("session") or requests
+    headers = {}
+
+    cached = None
+    if conditional:
+        key = _conditional_key(url, kwargs)
+        with _conditional_cache_lock:
+            cached = _conditional_cache.get(key)
+            if cached is not None:
+                _conditional_cache.move_to_end(key)
+    if cached is not None:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    try:
+        response = http.get(
+            url,
+            auth=(kwargs["t8_user"], kwargs["t8_password"]),
+            headers=headers,
+            timeout=kwargs.get("timeout", 30),
+        )
+    except (requests.ConnectionError, requests.Timeout) as error:
+        raise T8RetryableError(f"{error_message}: {error}") from error
+
+    if response.status_code == 304 and cached is not None:
+        return cached[2]
+    if response.status_code in RETRYABLE_STATUS_CODES:
+        raise T8RetryableError(
+            f"{error_message}: {response.text}",
+            status_code=response.status_code,
+            retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+        )
+    if response.status_code != 200:
+        raise T8FatalError(
+            f"{error_message}: {response.text}", status_code=response.status_code
+        )
+    body = response.json()
+
+    if conditional:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            with _conditional_cache_lock:
+                _conditional_cache[key] = (etag, last_modified, body)
+                _conditional_cache.move_to_end(key)
+                if len(_conditional_cache) > CONDITIONAL_CACHE_SIZE:
+                    _conditional_cache.popitem(last=False)
+
+    return body
+
+
+def _list_timestamps(response: dict):
+    """
+    Extracts the non-zero capture timestamps from a T8 listing response.
+
+    Args:
+        response (dict): The decoded JSON body of a waves or spectra listing.
+
+    Yields:
+        str: ISO formatted timestamp string for each valid item.
+    """
+    for item in response["_items"]:
+        timestamp = int(item["_links"]["self"].split("/")[-1])
+        if timestamp != 0:
+            yield timestamp_to_iso_string(timestamp)
+
+
+def _source(kwargs):
+    """
+    Returns the data source of a request: the `source` keyword argument if given,
+    a `Recorder` (or an `ArchiveSource` if `offline` is set) over the payload store
+    given as `store`, or else the T8 itself.
+    """
+    # Imported here because the sources are built on the HTTP functions of this
+    # module
+    from t8_client import sources
+
+    source = kwargs.get("source")
+    if source is not None:
+        return source
+    store = kwargs.get("store")
+    if store is None:
+        return sources.HttpSource()
+    if kwargs.get("offline"):
+        return sources.ArchiveSource(store)
+    return sources.Recorder(store)
+
+
+def fetch_capture_list(kind, **kwargs):
+    """
+    Fetches the listing of the waves or spectra of a tag from the T8.
+
+    Args:
+        kind (str): The kind of capture, either "waves" or "spectra".
+        kwargs: The URL parameters as keyword arguments.
+
+    Yields:
+        str: ISO formatted timestamp string for each capture.
+
+    Raises:
+        T8Error: If the request to the server fails.
+    """
+    machine = kwargs["machine"]
+    point = kwargs["point"]
+    pmode = kwargs["pmode"]
+
+    error_message = (
+        "Failed to get waveform" if kind == "waves" else "Failed to get spectra list"
+    )
+    url = f"{_base_url(kwargs)}/{kind}/{machine}/{point}/{pmode}"
+    response = _fetch_json(url, error_message, conditional=True, **kwargs)
+
+    yield from _list_timestamps(response)
+
 
 def get_wave_list(**kwargs):
     """
@@ -23,26 +263,72 @@ def get_wave_list(**kwargs):
         str: ISO formatted timestamp string for each valid wave item.
 
     Raises:
-        Exception: If the request to the server fails.
+        T8Error: If the request to the server fails.
+    """
+    yield from _source(kwargs).list_captures("waves", **kwargs)
+
+
+def fetch_capture(kind, **kwargs) -> dict:
+    """
+    Fetches the raw JSON body of a wave or spectrum, as returned by the T8.
+
+    Args:
+        kind (str): The kind of capture, either "waves" or "spectra".
+        kwargs: The URL parameters as keyword arguments.
+
+    Returns:
+        dict: The capture with its base64 encoded compressed `data` and metadata such
+            as `factor`, `sample_rate`, `min_freq` or `max_freq`.
+
+    Raises:
+        T8Error: If the request to the server fails.
     """
-    host = kwargs["host"]
-    id_ = kwargs["id"]
     machine = kwargs["machine"]
     point = kwargs["point"]
     pmode = kwargs["pmode"]
-    t8_user = kwargs["t8_user"]
-    t8_password = kwargs["t8_password"]
+    time = iso_string_to_timestamp(kwargs["time"])
 
-    url = f"https://{host}/{id_}/rest/waves/{machine}/{point}/{pmode}"
-    response = requests.get(url, auth=(t8_user, t8_password))
-    if response.status_code != 200:
-        raise Exception(f"Failed to get waveform: {response.text}")
-    response = response.json()
+    error_message = (
+        "Failed to get waveform" if kind == "waves" else "Failed to get spectra"
+    )
+    url = f"{_base_url(kwargs)}/{kind}/{machine}/{point}/{pmode}/{time}"
+    return _fetch_json(url, error_message, **kwargs)
 
-    for item in response["_items"]:
-        timestamp = int(item["_links"]["self"].split("/")[-1])
-        if timestamp != 0:
-            yield timestamp_to_iso_string(timestamp)
+
+def list_captures(kind, start=None, end=None, **kwargs):
+    """
+    Lists the timestamps of the waves or spectra captured within a time range.
+
+    Args:
+        kind (str): The kind of capture, either "waves" or "spectra".
+        start (str): ISO formatted inclusive lower bound. None for no lower bound.
+        end (str): ISO formatted inclusive upper bound. None for no upper bound.
+        kwargs: The URL parameters as keyword arguments.
+
+    Yields:
+        str: ISO formatted timestamp string for each capture within the range.
+
+    Raises:
+        T8Error: If the request to the server fails.
+    """
+    yield from _source(kwargs).list_captures(kind, start, end, **kwargs)
+
+
+def get_wave_capture(**kwargs) -> WaveCapture:
+    """
+    Fetches a waveform from a specified host, keeping it compressed until its data
+    are accessed.
+
+    Args:
+        kwargs: The URL parameters as keyword arguments.
+
+    Returns:
+        WaveCapture: The waveform with its metadata.
+
+    Raises:
+        T8Error: If the request to fetch the waveform data fails.
+    """
+    return _source(kwargs).get_capture("waves", **kwargs)
 
 
 def get_wave(**kwargs) -> tuple[np.ndarray, int]:
@@ -57,28 +343,9 @@ def get_wave(**kwargs) -> tuple[np.ndarray, int]:
             and the sample rate as an integer.
 
     Raises:
-        Exception: If the request to fetch the waveform data fails.
+        T8Error: If the request to fetch the waveform data fails.
     """
-    host = kwargs["host"]
-    id_ = kwargs["id"]
-    machine = kwargs["machine"]
-    point = kwargs["point"]
-    pmode = kwargs["pmode"]
-    time = iso_string_to_timestamp(kwargs["time"])
-    t8_user = kwargs["t8_user"]
-    t8_password = kwargs["t8_password"]
-
-    url = f"https://{host}/{id_}/rest/waves/{machine}/{point}/{pmode}/{time}"
-    response = requests.get(url, auth=(t8_user, t8_password))
-    if response.status_code != 200:
-        raise Exception(f"Failed to get waveform: {response.text}")
-    response = response.json()
-
-    waveform = zint_to_float(response["data"])
-    factor = response["factor"]
-    sample_rate = response["sample_rate"]
-
-    return waveform * factor, sample_rate
+    return get_wave_capture(**kwargs).to_tuple()
 
 
 def get_spectra(**kwargs):
@@ -98,26 +365,26 @@ def get_spectra(**kwargs):
         str: Timestamps in ISO format.
 
     Raises:
-        Exception: If the request to get spectra list fails.
+        T8Error: If the request to get spectra list fails.
     """
-    host = kwargs["host"]
-    id_ = kwargs["id"]
-    machine = kwargs["machine"]
-    point = kwargs["point"]
-    pmode = kwargs["pmode"]
-    t8_user = kwargs["t8_user"]
-    t8_password = kwargs["t8_password"]
+    yield from _source(kwargs).list_captures("spectra", **kwargs)
 
-    url = f"https://{host}/{id_}/rest/spectra/{machine}/{point}/{pmode}"
-    response = requests.get(url, auth=(t8_user, t8_password))
-    if response.status_code != 200:
-        raise Exception(f"Failed to get spectra list: {response.text}")
-    response = response.json()
 
-    for item in response["_items"]:
-        timestamp = int(item["_links"]["self"].split("/")[-1])
-        if timestamp != 0:
-            yield timestamp_to_iso_string(timestamp)
+def get_spectrum_capture(**kwargs) -> SpectrumCapture:
+    """
+    Fetches a spectrum from a specified host, keeping it compressed until its data
+    are accessed.
+
+    Args:
+        kwargs: The URL parameters as keyword arguments.
+
+    Returns:
+        SpectrumCapture: The spectrum with its metadata.
+
+    Raises:
+        T8Error: If the request to the server fails.
+    """
+    return _source(kwargs).get_capture("spectra", **kwargs)
 
 
 def get_spectrum(**kwargs) -> tuple[np.ndarray]:
@@ -131,26 +398,29 @@ def get_spectrum(**kwargs) -> tuple[np.ndarray]:
         tuple[np.ndarray]: A tuple containing the spectral data as numpy arrays.
 
     Raises:
-        Exception: If the request to the server fails.
+        T8Error: If the request to the server fails.
     """
-    host = kwargs["host"]
-    id_ = kwargs["id"]
-    machine = kwargs["machine"]
-    point = kwargs["point"]
-    pmode = kwargs["pmode"]
-    time = iso_string_to_timestamp(kwargs["time"])
-    t8_user = kwargs["t8_user"]
-    t8_password = kwargs["t8_password"]
+    return get_spectrum_capture(**kwargs).to_tuple()
 
-    url = f"https://{host}/{id_}/rest/spectra/{machine}/{point}/{pmode}/{time}"
-    response = requests.get(url, auth=(t8_user, t8_password))
-    if response.status_code != 200:
-        raise Exception(f"Failed to get spectra: {response.text}")
-    response = response.json()
 
-    spectrum = zint_to_float(response["data"])
-    factor = response["factor"]
-    fmin = response.get("min_freq", 0)
-    fmax = response["max_freq"]
+def get_captures(kind, times, **kwargs) -> list:
+    """
+    Fetches many waves or spectra of a point concurrently.
+
+    The concurrency is adapted to the device by the request scheduler, so bulk
+    downloads run close to the capacity of the device without overloading it.
+
+    Args:
+        kind (str): The kind of capture, either "waves" or "spectra".
+        times (list[str]): ISO formatted timestamps of the captures.
+        kwargs: The URL parameters as keyword arguments.
 
-    return spectrum * factor, fmin, fmax
+    Returns:
+        list[Capture]: The captures, in the same order as `times`.
+
+    Raises:
+        T8Error: If a request to the server fails.
+    """
+    get_capture = get_wave_capture if kind == "waves" else get_spectrum_capture
+    scheduler = kwargs.get("scheduler") or default_scheduler
+    return scheduler.map(lambda time: get_capture(**{**kwargs, "time": time}), times)
@@ -0,0 +1,214 @@
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft, rfftfreq
+
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+# Cutoff of the anti-alias filter, as a fraction of the Nyquist order of the
+# resampling at the lowest speed
+ANTI_ALIAS_CUTOFF = 0.8
+ANTI_ALIAS_ORDER = 8
+
+
+def speed_from_tachometer(
+    pulse_times: np.ndarray, n_samples: int, sample_rate: float, pulses_per_rev=1
+) -> np.ndarray:
+    """
+    Derives the instantaneous rotating speed at every sample of a waveform from the
+    times of the tachometer pulses.
+
+    Parameters:
+    pulse_times (np.ndarray): Times of the tachometer pulses in seconds, relative to
+        the first sample of the waveform.
+    n_samples (int): The number of samples of the waveform.
+    sample_rate (float): The sampling rate of the waveform in Hz.
+    pulses_per_rev (int): The number of tachometer pulses per revolution.
+
+    Returns:
+    np.ndarray: The speed in RPM at every sample, linearly interpolated between the
+        midpoints of consecutive pulses and held constant beyond them.
+
+    Raises:
+    ValueError: If there are fewer than two pulses.
+    """
+    pulse_times = np.asarray(pulse_times, dtype=float)
+    if len(pulse_times) < 2:
+        raise ValueError("At least two tachometer pulses are needed")
+
+    periods = np.diff(pulse_times) * pulses_per_rev
+    midpoints = (pulse_times[:-1] + pulse_times[1:]) / 2
+    instants = np.arange(n_samples) / sample_rate
+    return np.interp(instants, midpoints, 60 / periods)
+
+
+def _revolutions(speed: np.ndarray, n_samples: int, sample_rate: float) -> np.ndarray:
+    """
+    Integrates a speed profile in RPM into the cumulative number of revolutions at
+    every sample, using the trapezoidal rule along the last axis.
+    """
+    if speed.shape[-1] == 1:
+        return np.arange(n_samples) * (speed / 60 / sample_rate)
+
+    revolutions = np.empty(speed.shape)
+    revolutions[..., 0] = 0
+    np.add(speed[..., 1:], speed[..., :-1], out=revolutions[..., 1:])
+    revolutions[..., 1:] *= 1 / (120 * sample_rate)
+    np.cumsum(revolutions[..., 1:], axis=-1, out=revolutions[..., 1:])
+    return revolutions
+
+
+def _anti_alias(
+    waveforms: np.ndarray, sample_rate: float, speed: np.ndarray, samples_per_rev
+) -> np.ndarray:
+    """
+    Low-pass filters waveforms below the Nyquist order of the angle domain
+    resampling, so that orders above half of `samples_per_rev` do not fold back.
+
+    The cutoff follows from the lowest speed of every waveform, where the Nyquist
+    order is the lowest in Hz. The filter is a zero-phase Butterworth low-pass
+    (its squared magnitude, as `sosfiltfilt` would do) applied with one real FFT
+    and one inverse FFT over the whole batch. Waveforms that cannot alias at their
+    sample rate are returned unchanged.
+    """
+    nyquist = samples_per_rev / 2 * speed.min(axis=-1) / 60
+    if np.all(nyquist >= sample_rate / 2):
+        return waveforms
+
+    n_samples = waveforms.shape[-1]
+    n_fft = next_fast_len(n_samples, real=True)
+    cutoff = np.where(nyquist >= sample_rate / 2, np.inf, ANTI_ALIAS_CUTOFF * nyquist)
+    freqs = rfftfreq(n_fft, 1 / sample_rate)
+    response = 1 / (1 + (freqs / cutoff[..., np.newaxis]) ** (2 * ANTI_ALIAS_ORDER))
+
+    real_dtype = np.float32 if waveforms.dtype == np.float32 else np.float64
+    half_spectrum = rfft(waveforms, n=n_fft, axis=-1)
+    half_spectrum *= response.astype(real_dtype)
+    return irfft(half_spectrum, n=n_fft, axis=-1, overwrite_x=True)[..., :n_samples]
+
+
+def angle_domain_resample(
+    waveforms: np.ndarray, sample_rate: float, speed, samples_per_rev=64
+) -> np.ndarray:
+    """
+    Resamples waveforms from the time domain to the angle domain, so that every
+    revolution of the shaft is covered by the same number of samples.
+
+    The waveforms are first low-pass filtered below the Nyquist order of the
+    output at their lowest speed, which keeps orders up to about 0.8 times half of
+    `samples_per_rev` and prevents higher orders from aliasing. They are then
+    linearly interpolated at uniformly spaced shaft angles. The interpolation is
+    fully vectorized: when the speed profile is shared by every waveform, the
+    interpolation positions are computed once and gathered for the whole batch;
+    otherwise the per-waveform angle curves are searched at once by offsetting
+    each row into its own disjoint range.
+
+    Parameters:
+    waveforms (np.ndarray): The waveform, or a 2-D batch of waveforms of the same
+        length and sample rate, one per row.
+    sample_rate (float): The sampling rate of the waveforms in Hz.
+    speed (float | np.ndarray): The rotating speed in RPM. Either a constant, an
+        array with the speed at every sample shared by the whole batch, or a 2-D
+        array with one speed profile per waveform.
+    samples_per_rev (int): The number of samples per revolution of the output.
+
+    Returns:
+    np.ndarray: The resampled waveforms. For batches, all rows are truncated to the
+        number of whole samples available in the slowest waveform.
+
+    Raises:
+    ValueError: If the speed is not strictly positive, or its shape is not that of
+        a scalar, of one waveform or of the batch.
+    """
+    waveforms = np.asarray(waveforms)
+    n_samples = waveforms.shape[-1]
+    speed = np.asarray(speed, dtype=float)
+    if speed.ndim > 0 and speed.shape not in {(n_samples,), waveforms.shape[-2:]}:
+        raise ValueError(
+            f"The speed must be a scalar, have {n_samples} samples or the shape of "
+            f"the waveforms {waveforms.shape}, got {speed.shape}"
+        )
+    if np.any(speed <= 0):
+        raise ValueError("The speed must be strictly positive")
+    if speed.ndim == 0:
+        speed = speed[np.newaxis]
+
+    waveforms = _anti_alias(waveforms, sample_rate, speed, samples_per_rev)
+
+    revolutions = _revolutions(speed, n_samples, sample_rate)
+    n_out = int(np.floor(revolutions[..., -1].min() * samples_per_rev)) + 1
+    angles = np.arange(n_out) / samples_per_rev
+
+    if revolutions.ndim == 1:
+        # Same angle curve for every waveform: locate the positions only once
+        index = np.clip(
+            np.searchsorted(revolutions, angles, "right") - 1, 0, n_samples - 2
+        )
+        fraction = (angles - revolutions[index]) / (
+            revolutions[index + 1] - revolutions[index]
+        )
+        left = waveforms[..., index]
+        right = waveforms[..., index + 1]
+        return left + fraction * (right - left)
+
+    # One angle curve per waveform: shift every row into a disjoint range so that a
+    # single search over the flattened, globally sorted curves serves the batch
+    n_rows = revolutions.shape[0]
+    offset = np.ceil(revolutions[:, -1].max()) + 1
+    rows = np.arange(n_rows)[:, np.newaxis]
+    revolutions += rows * offset
+    flat_revolutions = revolutions.ravel()
+    flat_angles = (angles + rows * offset).ravel()
+
+    index = np.searchsorted(flat_revolutions, flat_angles, "right") - 1
+    row_start = (rows * n_samples).repeat(n_out, axis=1).ravel()
+    index = np.clip(index, row_start, row_start + n_samples - 2)
+    fraction = (flat_angles - flat_revolutions[index]) / (
+        flat_revolutions[index + 1] - flat_revolutions[index]
+    )
+    flat_waveforms = np.broadcast_to(waveforms, revolutions.shape).ravel()
+    left = flat_waveforms[index]
+    right = flat_waveforms[index + 1]
+    return (left + fraction * (right - left)).reshape(n_rows, n_out)
+
+
+def calculate_order_spectrum(
+    waveforms: np.ndarray,
+    sample_rate: float,
+    speed,
+    max_order: float,
+    samples_per_rev=64,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the order spectrum of one or more waveforms captured at variable
+    speed, by resampling them to the angle domain and applying the same window,
+    zero padding and RMS spectrum used for time-domain spectra.
+
+    Parameters:
+    waveforms (np.ndarray): The waveform, or a 2-D batch of waveforms of the same
+        length and sample rate, one per row.
+    sample_rate (float): The sampling rate of the waveforms in Hz.
+    speed (float | np.ndarray): The rotating speed in RPM, as accepted by
+        `angle_domain_resample`.
+    max_order (float): The maximum order of interest. Must not exceed half of
+        `samples_per_rev`; orders above 0.8 times that are attenuated by the
+        anti-alias filter.
+    samples_per_rev (int): The number of samples per revolution of the resampling.
+
+    Returns:
+    tuple[np.ndarray, np.ndarray]: A tuple containing:
+        - order_spectrum (np.ndarray): The magnitude of the order spectrum, one row
+            per waveform for batches.
+        - orders (np.ndarray): The corresponding orders (cycles per revolution).
+
+    Raises:
+    ValueError: If `max_order` is above the Nyquist order of the resampling.
+    """
+    if max_order > samples_per_rev / 2:
+        raise ValueError(
+            f"max_order must not exceed half of samples_per_rev ({samples_per_rev / 2})"
+        )
+
+    resampled = angle_domain_resample(waveforms, sample_rate, speed, samples_per_rev)
+    return calculate_spectrum(
+        preprocess_waveform(resampled), samples_per_rev, 0, max_order
+    )
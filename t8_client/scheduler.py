@@ -0,0 +1,308 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from t8_client.exceptions import T8CircuitOpenError, T8RetryableError
+
+
+class HostLimiter:
+    """
+    Adaptive concurrency limit and circuit breaker for the requests to one host.
+
+    The number of requests allowed in flight follows an AIMD policy: every
+    successful request adds `1 / limit` (about one more request per round trip),
+    a response much slower than the fastest one seen for the same kind of request
+    shrinks the limit by `slow_decrease`, and a retryable failure halves it, once
+    per overload episode. The highest concurrency that did not fail is remembered
+    as a ceiling that the limit quickly recovers to; going above it is only probed
+    after `probe_after` successful requests at the ceiling, an interval that
+    doubles every time a probe fails, because an overloaded embedded device
+    usually asks to back off for whole seconds.
+
+    After `failure_threshold` consecutive failures the circuit opens and requests
+    fail fast for `cooldown` seconds; then a single trial request is let through,
+    which closes the circuit again if it succeeds.
+
+    Args:
+        initial_limit (float): The initial number of concurrent requests.
+        min_limit (float): The minimum number of concurrent requests.
+        max_limit (float): The maximum number of concurrent requests.
+        latency_factor (float): Latency, relative to the fastest response seen for
+            the same kind of request, above which a response is considered a sign
+            of overload.
+        slow_decrease (float): Factor applied to the limit after a slow response.
+        probe_after (int): Successful requests at the ceiling before trying one
+            more concurrent request.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds the circuit stays open.
+        clock (callable): Monotonic clock.
+        sleep (callable): Function used to wait while the host asked not to
+            receive requests (`Retry-After`).
+    """
+
+    def __init__(
+        self,
+        initial_limit=2.0,
+        min_limit=1.0,
+        max_limit=8.0,
+        latency_factor=3.0,
+        slow_decrease=0.9,
+        probe_after=20,
+        failure_threshold=5,
+        cooldown=30.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.limit = min(initial_limit, max_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_factor = latency_factor
+        self.slow_decrease = slow_decrease
+        self.probe_after = probe_after
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.sleep = sleep
+
+        self.in_flight = 0
+        self.ceiling = None
+        # Fastest response per kind of request, since a 304 listing returns much
+        # sooner than a large wave
+        self.min_latency = {}
+        self.consecutive_failures = 0
+        self.open_until = None
+        self.blocked_until = 0.0
+        self._trial_in_flight = False
+        self._successes_at_ceiling = 0
+        self._last_decrease = float("-inf")
+        self._condition = threading.Condition()
+
+    @property
+    def state(self) -> str:
+        """
+        str: The state of the circuit breaker, "closed", "open" or "half-open".
+        """
+        if self.open_until is None:
+            return "closed"
+        return "open" if self.clock() < self.open_until else "half-open"
+
+    def acquire(self) -> bool:
+        """
+        Waits until a new request to the host is allowed.
+
+        Returns:
+            bool: True if the request is the single trial request of a half-open
+                circuit, to be passed on to `release`.
+
+        Raises:
+            T8CircuitOpenError: If the circuit is open.
+        """
+        with self._condition:
+            while True:
+                state = self.state
+                if state == "open" or (state == "half-open" and self._trial_in_flight):
+                    raise T8CircuitOpenError(
+                        "Circuit open after repeated failures, not sending request",
+                        retry_after=max(self.open_until - self.clock(), 0),
+                    )
+
+                wait = self.blocked_until - self.clock()
+                if wait > 0:
+                    self._condition.release()
+                    try:
+                        self.sleep(wait)
+                    finally:
+                        self._condition.acquire()
+                    continue
+                if self.in_flight < max(int(self.limit), 1):
+                    break
+                self._condition.wait()
+
+            trial = state == "half-open"
+            if trial:
+                self._trial_in_flight = True
+            self.in_flight += 1
+            return trial
+
+    def release(
+        self, success, latency=None, retry_after=None, kind=None, trial=False
+    ) -> None:
+        """
+        Records the outcome of a request acquired with `acquire`.
+
+        Args:
+            success (bool | None): True if the request succeeded, False if it failed
+                with a retryable error, None if the outcome says nothing about the
+                health of the host (e.g. a 404 response).
+            latency (float): Duration of the request in seconds.
+            retry_after (float): Seconds the host asked to wait before new requests.
+            kind (str): The kind of request, such as "list" or "capture". The
+                latency is only compared with requests of the same kind.
+            trial (bool): The value returned by `acquire` for the request.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if trial:
+                self._trial_in_flight = False
+
+            if success is True:
+                self.consecutive_failures = 0
+                self.open_until = None
+                if latency is not None:
+                    fastest = min(self.min_latency.get(kind, latency), latency)
+                    self.min_latency[kind] = fastest
+                    slow = latency > self.latency_factor * fastest
+                else:
+                    slow = False
+                if slow:
+                    self.limit = max(self.limit * self.slow_decrease, self.min_limit)
+                else:
+                    self._increase()
+            elif success is False:
+                self.consecutive_failures += 1
+                now = self.clock()
+                # Requests sent before the last decrease failed under the old limit
+                if now - (latency or 0) >= self._last_decrease:
+                    self._decrease()
+                    self._last_decrease = now
+                if self.consecutive_failures >= self.failure_threshold:
+                    self.open_until = now + self.cooldown
+
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, self.clock() + retry_after)
+            self._condition.notify_all()
+
+    def _increase(self) -> None:
+        ceiling = self.max_limit if self.ceiling is None else self.ceiling
+        if self.limit < ceiling:
+            self.limit = min(self.limit + 1 / self.limit, ceiling)
+        elif ceiling < self.max_limit:
+            self._successes_at_ceiling += 1
+            if self._successes_at_ceiling >= self.probe_after:
+                self.ceiling += 1
+                self._successes_at_ceiling = 0
+
+    def _decrease(self) -> None:
+        safe = max(int(self.limit) - 1, int(self.min_limit))
+        if self.ceiling is not None and safe <= self.ceiling:
+            # A probe above the ceiling failed again: wait longer for the next one
+            self.probe_after = min(self.probe_after * 2, 10000)
+        self.ceiling = safe
+        self.limit = max(self.limit / 2, self.min_limit)
+        self._successes_at_ceiling = 0
+
+
+class RequestScheduler:
+    """
+    Schedules the requests to T8 devices so that bulk access runs close to the
+    capacity of each device without overloading it.
+
+    Every host gets its own `HostLimiter`. Requests failing with a
+    `T8RetryableError` are retried with jittered exponential backoff, or after the
+    delay given by the `Retry-After` header of the response, during which no other
+    request is sent to that host either.
+
+    Args:
+        max_retries (int): Maximum number of retries of a request.
+        backoff (float): Delay before the first retry, in seconds. It doubles on
+            every further retry.
+        clock (callable): Monotonic clock.
+        sleep (callable): Function used to wait before retrying.
+        limiter_options: Options of the `HostLimiter` created for every host.
+    """
+
+    def __init__(
+        self,
+        max_retries=3,
+        backoff=0.5,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        **limiter_options,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.clock = clock
+        self.sleep = sleep
+        self.limiter_options = limiter_options
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host) -> HostLimiter:
+        """
+        Returns the limiter of a host, creating it on first use.
+        """
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(
+                    clock=self.clock, sleep=self.sleep, **self.limiter_options
+                )
+            return self._limiters[host]
+
+    def request(self, host, function, kind=None):
+        """
+        Runs a request to a host under its concurrency limit, retrying it on
+        retryable failures.
+
+        Args:
+            host (str): The host the request is sent to.
+            function (callable): Function without arguments that sends the request,
+                returns its result and raises `T8Error` subclasses on failure.
+            kind (str): The kind of request, whose latency is compared with the
+                fastest request of the same kind (see `HostLimiter.release`).
+
+        Returns:
+            The result of `function`.
+
+        Raises:
+            T8RetryableError: If the request still fails after all the retries, or
+                the circuit of the host is open.
+            T8FatalError: If the request fails with a non-retryable error.
+        """
+        limiter = self.limiter(host)
+        for attempt in range(self.max_retries + 1):
+            trial = limiter.acquire()
+            start = self.clock()
+            try:
+                result = function()
+            except T8RetryableError as error:
+                limiter.release(
+                    False,
+                    latency=self.clock() - start,
+                    retry_after=error.retry_after,
+                    trial=trial,
+                )
+                if attempt == self.max_retries:
+                    raise
+                if error.retry_after is None:
+                    self.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.5))
+                # Otherwise the limiter holds the next acquire until Retry-After
+                continue
+            except BaseException:
+                limiter.release(None, trial=trial)
+                raise
+            limiter.release(True, latency=self.clock() - start, kind=kind, trial=trial)
+            return result
+
+    def map(self, function, items, max_workers=None) -> list:
+        """
+        Applies a function that performs requests to every item concurrently and
+        returns the results in order. The actual concurrency is governed by the
+        host limiters; `max_workers` only bounds the number of threads.
+
+        Args:
+            function (callable): Function called with every item.
+            items (iterable): The items.
+            max_workers (int): The number of threads. Defaults to the maximum limit
+                of the host limiters.
+
+        Returns:
+            list: The result for every item.
+        """
+        max_workers = max_workers or int(self.limiter_options.get("max_limit", 8))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(function, items))
+
+
+# Scheduler shared by every request of the client that does not specify its own
+default_scheduler = RequestScheduler()
@@ -0,0 +1,326 @@
+import os
+
+import numpy as np
+
+
+def band_edges(fmin: float, fmax: float, n_bands: int) -> np.ndarray:
+    """
+    Computes logarithmically spaced band edges between two frequencies.
+
+    Args:
+        fmin (float): The lower edge of the first band in Hz, greater than 0.
+        fmax (float): The upper edge of the last band in Hz.
+        n_bands (int): The number of bands.
+
+    Returns:
+        np.ndarray: The `n_bands + 1` band edges.
+    """
+    return np.geomspace(fmin, fmax, n_bands + 1)
+
+
+def spectrum_features(spectra: np.ndarray, freqs: np.ndarray, edges: np.ndarray):
+    """
+    Reduces one or more spectra to normalized log band energies, a compact
+    representation whose Euclidean distances compare the spectral shapes
+    regardless of the overall amplitude and the frequency resolution.
+
+    Args:
+        spectra (np.ndarray): The spectrum, or a 2-D batch of spectra sharing the
+            same frequencies, one per row.
+        freqs (np.ndarray): The frequency of every bin of the spectra in Hz.
+        edges (np.ndarray): The band edges, as returned by `band_edges`.
+
+    Returns:
+        np.ndarray: The unit-norm feature vector of every spectrum, as float32.
+    """
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=float))
+    # Cumulative power interpolated at the band edges, so that narrow bands with
+    # fewer bins than the spectrum resolution still get a fraction of the power
+    power = np.cumsum(spectra**2, axis=1)
+    position = np.interp(edges, freqs, np.arange(len(freqs)))
+    below = np.floor(position).astype(np.intp)
+    above = np.minimum(below + 1, len(freqs) - 1)
+    weight = position - below
+    energy = power[:, below] * (1 - weight) + power[:, above] * weight
+    band_energy = np.diff(energy, axis=1)
+
+    features = np.log1p(band_energy / (band_energy.mean(axis=1, keepdims=True) + 1e-30))
+    features -= features.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return (features / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+
+def _grown(array: np.ndarray, size: int, capacity: int) -> np.ndarray:
+    """
+    Returns a larger buffer of `capacity` rows holding the first `size` rows of an
+    array.
+    """
+    grown = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+    grown[:size] = array[:size]
+    return grown
+
+
+class SpectrumIndex:
+    """
+    Local similarity index over the spectra of historical captures.
+
+    Spectra are stored as normalized log band energies (see `spectrum_features`),
+    and their tags and timestamps as integer arrays, with the tag names in a small
+    table, so the index of millions of captures fits in memory. Queries are either
+    exact, as one vectorized distance computation against every stored spectrum, or
+    approximate, using random hyperplane locality-sensitive hashing to only rerank
+    the spectra that share a bucket with the query in any of the hash tables.
+    Spectra can be inserted incrementally at any time.
+
+    Args:
+        fmin (float): The lower edge of the first band in Hz, greater than 0.
+        fmax (float): The upper edge of the last band in Hz.
+        n_bands (int): The number of bands of the feature vectors.
+        n_tables (int): The number of hash tables of the approximate mode.
+        n_bits (int): The number of hyperplanes (bits) of every hash table.
+        seed (int): Seed of the random hyperplanes.
+    """
+
+    def __init__(self, fmin, fmax, n_bands=64, n_tables=8, n_bits=12, seed=0):
+        self.fmin = fmin
+        self.fmax = fmax
+        self.edges = band_edges(fmin, fmax, n_bands)
+        self.tag_names = []
+        self._tag_codes = np.empty(0, dtype=np.int32)
+        self._timestamps = np.empty(0, dtype=np.int64)
+        self._features = np.empty((0, n_bands), dtype=np.float32)
+        self._size = 0
+        # Code of every tag name, and the sorted timestamps indexed per tag code
+        # with their number, for membership checks
+        self._codes = {}
+        self._sorted_timestamps = []
+        self._counts = []
+
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_tables, n_bands, n_bits)).astype(
+            np.float32
+        )
+        self._center = None
+        self._tables = [{} for _ in range(n_tables)]
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, key):
+        tag, timestamp = key
+        code = self._codes.get(tag)
+        if code is None:
+            return False
+        timestamps = self._sorted_timestamps[code][: self._counts[code]]
+        position = np.searchsorted(timestamps, timestamp)
+        return bool(position < len(timestamps) and timestamps[position] == timestamp)
+
+    @property
+    def features(self) -> np.ndarray:
+        """
+        np.ndarray: The feature vectors of the stored spectra, one per row.
+        """
+        return self._features[: self._size]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """
+        np.ndarray: The Unix timestamps of the stored spectra.
+        """
+        return self._timestamps[: self._size]
+
+    @property
+    def tag_codes(self) -> np.ndarray:
+        """
+        np.ndarray: The tag of every stored spectrum, as its position in
+            `tag_names`.
+        """
+        return self._tag_codes[: self._size]
+
+    @property
+    def tags(self) -> list[str]:
+        """
+        list[str]: The tag of every stored spectrum. Built on every access.
+        """
+        return [self.tag_names[code] for code in self.tag_codes.tolist()]
+
+    def add(self, tag, timestamp, spectra, freqs) -> None:
+        """
+        Inserts one or more spectra of a tag into the index.
+
+        Args:
+            tag (str): The combined tag in the format M1:P1:PM1.
+            timestamp (int | list[int]): Unix timestamp of every spectrum.
+            spectra (np.ndarray): The spectrum, or a 2-D batch of spectra sharing the
+                same frequencies.
+            freqs (np.ndarray): The frequency of every bin of the spectra in Hz.
+        """
+        features = spectrum_features(spectra, freqs, self.edges)
+        timestamps = np.atleast_1d(np.asarray(timestamp, dtype=np.int64))
+        n_new = len(features)
+
+        code = self._codes.get(tag)
+        if code is None:
+            code = self._codes[tag] = len(self.tag_names)
+            self.tag_names.append(tag)
+            self._sorted_timestamps.append(np.empty(0, dtype=np.int64))
+            self._counts.append(0)
+
+        if self._size + n_new > len(self._features):
+            capacity = max(2 * len(self._features), self._size + n_new, 1024)
+            self._features = _grown(self._features, self._size, capacity)
+            self._timestamps = _grown(self._timestamps, self._size, capacity)
+            self._tag_codes = _grown(self._tag_codes, self._size, capacity)
+        self._features[self._size : self._size + n_new] = features
+        self._timestamps[self._size : self._size + n_new] = timestamps
+        self._tag_codes[self._size : self._size + n_new] = code
+        self._add_timestamps(code, np.broadcast_to(timestamps, n_new))
+
+        if self._center is None:
+            # Hyperplanes through the mean of the first spectra split them evenly
+            self._center = features.mean(axis=0)
+        self._insert(features, np.arange(self._size, self._size + n_new))
+
+        self._size += n_new
+
+    def _add_timestamps(self, code: int, timestamps: np.ndarray) -> None:
+        """
+        Adds timestamps to the sorted timestamps of a tag. Spectra are usually
+        indexed in chronological order, and then they are simply appended.
+        """
+        count = self._counts[code]
+        total = count + len(timestamps)
+        stored = self._sorted_timestamps[code]
+        if total > len(stored):
+            stored = _grown(stored, count, max(2 * len(stored), total, 16))
+            self._sorted_timestamps[code] = stored
+        stored[count:total] = timestamps
+        if np.any(np.diff(stored[max(count - 1, 0) : total]) < 0):
+            stored[:total].sort(kind="stable")
+        self._counts[code] = total
+
+    def query(self, spectrum, freqs, k=10, approximate=False):
+        """
+        Finds the stored spectra most similar to a given one.
+
+        Args:
+            spectrum (np.ndarray): The spectrum to search for.
+            freqs (np.ndarray): The frequency of every bin of the spectrum in Hz.
+            k (int): The number of neighbours to return.
+            approximate (bool): Whether to only rerank the candidates found by the
+                hash tables instead of scanning the whole index.
+
+        Returns:
+            list[tuple[str, int, float]]: The tag, Unix timestamp and distance of
+                the `k` nearest spectra, from most to least similar.
+        """
+        feature = spectrum_features(spectrum, freqs, self.edges)
+        if approximate:
+            buckets = [
+                group
+                for table, codes in zip(self._tables, self._hash(feature), strict=True)
+                for group in table.get(int(codes[0]), ())
+            ]
+            ids = np.unique(np.concatenate(buckets)) if buckets else np.empty(0, int)
+            if len(ids) < k:
+                ids = np.arange(self._size)
+        else:
+            ids = np.arange(self._size)
+
+        distances = np.linalg.norm(self._features[ids] - feature, axis=1)
+        k = min(k, len(ids))
+        nearest = np.argpartition(distances, k - 1)[:k] if k else []
+        nearest = sorted(nearest, key=lambda i: distances[i])
+        return [
+            (
+                self.tag_names[self._tag_codes[ids[i]]],
+                int(self._timestamps[ids[i]]),
+                float(distances[i]),
+            )
+            for i in nearest
+        ]
+
+    def save(self, file_path: str) -> None:
+        """
+        Saves the index to an `.npz` file. The hash tables are rebuilt on load.
+
+        Args:
+            file_path (str): The path of the file.
+        """
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, "wb") as file:
+            np.savez(
+                file,
+                frange=np.array([self.fmin, self.fmax]),
+                features=self.features,
+                tag_names=np.array(self.tag_names, dtype=str),
+                tag_codes=self.tag_codes,
+                timestamps=self.timestamps,
+                planes=self._planes,
+                center=self._center if self._center is not None else [],
+            )
+
+    @classmethod
+    def load(cls, file_path: str) -> "SpectrumIndex":
+        """
+        Loads an index saved with `save`.
+
+        Args:
+            file_path (str): The path of the file.
+
+        Returns:
+            SpectrumIndex: The loaded index.
+        """
+        with np.load(file_path) as data:
+            fmin, fmax = data["frange"]
+            planes = data["planes"]
+            index = cls(fmin, fmax, n_bands=planes.shape[1], n_tables=planes.shape[0])
+            index._planes = planes
+            index._center = data["center"] if len(data["center"]) else None
+            features = data["features"]
+            index._features = features.copy()
+            index._size = len(features)
+            index._timestamps = data["timestamps"].astype(np.int64)
+            if "tag_names" in data:
+                index.tag_names = data["tag_names"].tolist()
+                index._tag_codes = data["tag_codes"].astype(np.int32)
+            else:
+                # Indexes saved before the tag table stored one tag per spectrum
+                tag_names, codes = np.unique(data["tags"], return_inverse=True)
+                index.tag_names = tag_names.tolist()
+                index._tag_codes = codes.astype(np.int32)
+
+        index._insert(index.features, np.arange(index._size))
+        index._codes = {tag: code for code, tag in enumerate(index.tag_names)}
+        order = np.lexsort((index.timestamps, index.tag_codes))
+        counts = np.bincount(index.tag_codes, minlength=len(index.tag_names))
+        index._sorted_timestamps = np.split(
+            index.timestamps[order], np.cumsum(counts)[:-1]
+        )
+        index._counts = counts.tolist()
+        return index
+
+    def _insert(self, features: np.ndarray, ids: np.ndarray) -> None:
+        """
+        Adds feature vectors to the hash tables, grouping them by bucket so that the
+        work in Python is per bucket rather than per spectrum.
+        """
+        for table, codes in zip(self._tables, self._hash(features), strict=True):
+            order = np.argsort(codes, kind="stable")
+            unique, starts = np.unique(codes[order], return_index=True)
+            for code, group in zip(
+                unique.tolist(), np.split(ids[order], starts[1:]), strict=True
+            ):
+                table.setdefault(code, []).append(group)
+
+    def _hash(self, features: np.ndarray) -> np.ndarray:
+        """
+        Computes the bucket of every feature vector in every hash table.
+
+        Returns:
+            np.ndarray: The bucket codes, with shape (n_tables, n_features).
+        """
+        center = 0 if self._center is None else self._center
+        bits = np.einsum("nb,tbk->tnk", features - center, self._planes) > 0
+        weights = 1 << np.arange(self._planes.shape[2], dtype=np.int64)
+        return bits.astype(np.int64) @ weights
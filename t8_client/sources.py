@@ -0,0 +1,294 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from t8_client import get_data
+from t8_client.capture import SpectrumCapture, WaveCapture
+from t8_client.exceptions import T8FatalError
+from t8_client.store import PayloadStore
+from t8_client.util.timestamp import iso_string_to_timestamp, timestamp_to_iso_string
+
+CAPTURE_CLASSES = {"waves": WaveCapture, "spectra": SpectrumCapture}
+ERROR_MESSAGES = {"waves": "Failed to get waveform", "spectra": "Failed to get spectra"}
+
+# Names accepted by `open_source`
+SOURCES = ("http", "record", "archive")
+
+
+class DataSource(ABC):
+    """
+    Where the `get_data` functions get listings and captures from.
+
+    A data source is given to the `get_data` functions as the `source` keyword
+    argument, and receives the same keyword arguments (connection parameters,
+    `machine`, `point`, `pmode` and `time`). Subclasses implement `list_captures`
+    and `get_capture`.
+    """
+
+    @abstractmethod
+    def list_captures(self, kind, start=None, end=None, **kwargs):
+        """
+        Lists the timestamps of the waves or spectra of a tag within a time range.
+
+        Args:
+            kind (str): The kind of capture, either "waves" or "spectra".
+            start (str): ISO formatted inclusive lower bound. None for no lower
+                bound.
+            end (str): ISO formatted inclusive upper bound. None for no upper bound.
+            kwargs: The URL parameters as keyword arguments.
+
+        Yields:
+            str: ISO formatted timestamp string for each capture within the range.
+        """
+
+    @abstractmethod
+    def get_capture(self, kind, **kwargs):
+        """
+        Returns a wave or spectrum.
+
+        Args:
+            kind (str): The kind of capture, either "waves" or "spectra".
+            kwargs: The URL parameters as keyword arguments, including `time`.
+
+        Returns:
+            WaveCapture | SpectrumCapture: The capture, not yet decoded.
+        """
+
+    def close(self) -> None:  # noqa: B027 (optional, most sources hold nothing)
+        """
+        Releases the resources held by the source.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _in_range(times, start, end):
+    """
+    Yields the ISO formatted timestamps within an inclusive ISO formatted range.
+    """
+    start = iso_string_to_timestamp(start) if start else None
+    end = iso_string_to_timestamp(end) if end else None
+    for time in times:
+        timestamp = iso_string_to_timestamp(time)
+        if (start is None or timestamp >= start) and (end is None or timestamp <= end):
+            yield time
+
+
+class HttpSource(DataSource):
+    """
+    The REST API of a live T8 device.
+    """
+
+    def list_captures(self, kind, start=None, end=None, **kwargs):
+        yield from _in_range(get_data.fetch_capture_list(kind, **kwargs), start, end)
+
+    def get_capture(self, kind, **kwargs):
+        return CAPTURE_CLASSES[kind].from_response(
+            get_data.fetch_capture(kind, **kwargs),
+            kwargs["machine"],
+            kwargs["point"],
+            kwargs["pmode"],
+            iso_string_to_timestamp(kwargs["time"]),
+        )
+
+
+class ArchiveSource(DataSource):
+    """
+    Replays the captures recorded in a payload store, without contacting any T8.
+
+    Payloads are read from the memory map of the store and listings are sliced to
+    the requested time range by binary search, so replaying long histories is
+    cheap. Listings only contain the recorded captures.
+
+    Args:
+        archive (PayloadStore | str): The payload store, or the directory of one
+            to open (it is then closed by `close`).
+        device (str): ID of the recorded device to replay for every request.
+            Defaults to the `id` of each request, so a recording of a fleet
+            replays every device under its own ID.
+    """
+
+    def __init__(self, archive, device=None):
+        self._owns_archive = not isinstance(archive, PayloadStore)
+        self.archive = PayloadStore(archive) if self._owns_archive else archive
+        self.device = device
+
+    def _key(self, kind, kwargs) -> tuple:
+        device = self.device or kwargs["id"]
+        return device, kind, kwargs["machine"], kwargs["point"], kwargs["pmode"]
+
+    def list_captures(self, kind, start=None, end=None, **kwargs):
+        timestamps = self.archive.timestamps(
+            *self._key(kind, kwargs),
+            start=iso_string_to_timestamp(start) if start else None,
+            end=iso_string_to_timestamp(end) if end else None,
+        )
+        for timestamp in timestamps:
+            yield timestamp_to_iso_string(timestamp)
+
+    def get_capture(self, kind, **kwargs):
+        timestamp = iso_string_to_timestamp(kwargs["time"])
+        capture = self.archive.get(*self._key(kind, kwargs), timestamp)
+        if capture is None:
+            raise T8FatalError(
+                f"{ERROR_MESSAGES[kind]}: {kwargs['time']} is not in the local store",
+                status_code=404,
+            )
+        return capture
+
+    def captures(self, kind, start=None, end=None, **kwargs):
+        """
+        Yields every recorded capture of a tag within a time range, in
+        chronological order.
+
+        Args:
+            kind (str): The kind of capture, either "waves" or "spectra".
+            start (str): ISO formatted inclusive lower bound. None for no lower
+                bound.
+            end (str): ISO formatted inclusive upper bound. None for no upper bound.
+            kwargs: The URL parameters as keyword arguments.
+
+        Yields:
+            WaveCapture | SpectrumCapture: The captures, not yet decoded.
+        """
+        for time in self.list_captures(kind, start, end, **kwargs):
+            yield self.get_capture(kind, **kwargs, time=time)
+
+    def close(self) -> None:
+        """
+        Closes the payload store if it was opened by this source.
+        """
+        if self._owns_archive:
+            self.archive.close()
+
+
+class Recorder(DataSource):
+    """
+    Records the captures returned by another source (the live T8 by default) into
+    a payload store, for later replay with `ArchiveSource`.
+
+    Captures already recorded are served from the store, since the captures of a
+    T8 never change once acquired; listings always come from the wrapped source.
+
+    Args:
+        archive (PayloadStore | str): The payload store to record into, or the
+            directory of one to open (it is then closed by `close`).
+        source (DataSource): The source whose captures are recorded. Defaults to a
+            `HttpSource`.
+    """
+
+    def __init__(self, archive, source=None):
+        self._owns_archive = not isinstance(archive, PayloadStore)
+        self.archive = PayloadStore(archive) if self._owns_archive else archive
+        self.source = source or HttpSource()
+
+    def list_captures(self, kind, start=None, end=None, **kwargs):
+        yield from self.source.list_captures(kind, start, end, **kwargs)
+
+    def get_capture(self, kind, **kwargs):
+        timestamp = iso_string_to_timestamp(kwargs["time"])
+        key = (kwargs["machine"], kwargs["point"], kwargs["pmode"], timestamp)
+        capture = self.archive.get(kwargs["id"], kind, *key)
+        if capture is None:
+            capture = self.source.get_capture(kind, **kwargs)
+            self.archive.put(kwargs["id"], capture)
+        return capture
+
+    def close(self) -> None:
+        """
+        Closes the payload store if it was opened by this source.
+        """
+        if self._owns_archive:
+            self.archive.close()
+
+
+class CachedSource(DataSource):
+    """
+    Keeps the most recently used captures of another source in memory.
+
+    Captures memoize their decoded samples, so a capture requested again is
+    served already decoded, without a request or decompression. Listings always
+    come from the wrapped source. Used by long-lived processes, such as the
+    daemon, that serve many requests. The cache may be shared by several threads;
+    captures missing from it are fetched outside of its lock.
+
+    Args:
+        source (DataSource): The source whose captures are cached.
+        max_captures (int): The number of captures kept; the least recently used
+            are dropped first.
+    """
+
+    def __init__(self, source, max_captures=256):
+        self.source = source
+        self.max_captures = max_captures
+        self._captures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def list_captures(self, kind, start=None, end=None, **kwargs):
+        yield from self.source.list_captures(kind, start, end, **kwargs)
+
+    def get_capture(self, kind, **kwargs):
+        key = (
+            kwargs["host"],
+            kwargs["id"],
+            kind,
+            kwargs["machine"],
+            kwargs["point"],
+            kwargs["pmode"],
+            kwargs["time"],
+        )
+        with self._lock:
+            capture = self._captures.get(key)
+            if capture is not None:
+                self._captures.move_to_end(key)
+                return capture
+
+        capture = self.source.get_capture(kind, **kwargs)
+        with self._lock:
+            # Another thread may have fetched it meanwhile: share its capture, so
+            # that the samples are only decoded once
+            capture = self._captures.setdefault(key, capture)
+            self._captures.move_to_end(key)
+            if len(self._captures) > self.max_captures:
+                self._captures.popitem(last=False)
+        return capture
+
+    def close(self) -> None:
+        """
+        Drops the cached captures and closes the wrapped source.
+        """
+        with self._lock:
+            self._captures.clear()
+        self.source.close()
+
+
+def open_source(name="http", archive=None) -> DataSource:
+    """
+    Creates a data source from its configuration name.
+
+    Args:
+        name (str): "http" for the live T8, "record" to also record every capture
+            into the archive, or "archive" to replay the archive offline.
+        archive (PayloadStore | str): The payload store, or its directory, used by
+            the "record" and "archive" sources. A directory is opened by the source
+            and closed by its `close` method.
+
+    Returns:
+        DataSource: The data source.
+
+    Raises:
+        ValueError: If the name is unknown or the source needs a missing archive.
+    """
+    if name not in SOURCES:
+        raise ValueError(f"Invalid source '{name}', expected one of {list(SOURCES)}")
+    if name == "http":
+        return HttpSource()
+    if archive is None:
+        raise ValueError(f"The '{name}' source needs an archive")
+    if name == "archive":
+        return ArchiveSource(archive)
+    return Recorder(archive)
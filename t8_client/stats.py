@@ -0,0 +1,170 @@
+import math
+
+import numpy as np
+
+from t8_client import get_data
+from t8_client.util.decoder import iter_int16_chunks
+
+# Overall values computed for every wave, in output order
+STATISTICS = ("rms", "peak", "peak_to_peak", "crest_factor", "kurtosis")
+
+
+class StreamingStatistics:
+    """
+    One-pass accumulator of the overall values of a wave.
+
+    Samples are added in chunks of any size, typically the int16 chunks coming out
+    of the decompressor, so a wave never has to be held in memory. Every chunk is
+    reduced to its count, mean, central moments and extremes, and merged into the
+    running totals with the pairwise update formulas of Chan et al. and Pébay,
+    which stay accurate where accumulating raw power sums would lose precision.
+    The scale factor of the samples is only applied by `result`.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.m3 = 0.0
+        self.m4 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, chunk) -> "StreamingStatistics":
+        """
+        Adds a chunk of samples.
+
+        Args:
+            chunk (np.ndarray): The samples.
+
+        Returns:
+            StreamingStatistics: The accumulator itself.
+        """
+        if len(chunk) == 0:
+            return self
+        chunk = np.asarray(chunk, dtype=np.float64)
+        other = StreamingStatistics()
+        other.count = len(chunk)
+        other.mean = float(chunk.mean())
+        deviation = chunk - other.mean
+        power = deviation * deviation
+        other.m2 = float(power.sum())
+        other.m3 = float(np.dot(power, deviation))
+        other.m4 = float(np.dot(power, power))
+        other.min = float(chunk.min())
+        other.max = float(chunk.max())
+        return self.merge(other)
+
+    def merge(self, other) -> "StreamingStatistics":
+        """
+        Adds the samples accumulated by another accumulator.
+
+        Args:
+            other (StreamingStatistics): The other accumulator.
+
+        Returns:
+            StreamingStatistics: The accumulator itself.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        n_a, n_b = self.count, other.count
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        delta_n = delta / n
+        m2 = self.m2 + other.m2 + delta * delta_n * n_a * n_b
+        m3 = (
+            self.m3
+            + other.m3
+            + delta * delta_n**2 * n_a * n_b * (n_a - n_b)
+            + 3 * delta_n * (n_a * other.m2 - n_b * self.m2)
+        )
+        m4 = (
+            self.m4
+            + other.m4
+            + delta * delta_n**3 * n_a * n_b * (n_a * n_a - n_a * n_b + n_b * n_b)
+            + 6 * delta_n**2 * (n_a * n_a * other.m2 + n_b * n_b * self.m2)
+            + 4 * delta_n * (n_a * other.m3 - n_b * self.m3)
+        )
+
+        self.count = n
+        self.mean += delta_n * n_b
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def result(self, factor=1.0) -> dict[str, float]:
+        """
+        Computes the overall values of the accumulated samples.
+
+        Args:
+            factor (float): Factor that scales the samples to physical units.
+
+        Returns:
+            dict[str, float]: The RMS, peak (largest magnitude), peak to peak, crest
+                factor (peak over RMS) and kurtosis (4th standardized moment, 3 for
+                a normal distribution) of the samples. NaN where undefined, such
+                as for no samples.
+        """
+        if self.count == 0:
+            return dict.fromkeys(STATISTICS, math.nan)
+        scale = abs(factor)
+        variance = self.m2 / self.count
+        rms = math.sqrt(variance + self.mean**2) * scale
+        peak = max(abs(self.min), abs(self.max)) * scale
+        return {
+            "rms": rms,
+            "peak": peak,
+            "peak_to_peak": (self.max - self.min) * scale,
+            "crest_factor": peak / rms if rms else math.nan,
+            "kurtosis": (self.m4 / self.count / variance**2 if variance else math.nan),
+        }
+
+
+def capture_statistics(capture, chunk_size=65536) -> dict[str, float]:
+    """
+    Computes the overall values of a wave straight from its compressed payload,
+    in chunks, without decoding the whole wave.
+
+    Args:
+        capture (WaveCapture): The wave.
+        chunk_size (int): The number of samples decompressed at a time.
+
+    Returns:
+        dict[str, float]: The overall values, see `StreamingStatistics.result`.
+    """
+    statistics = StreamingStatistics()
+    if capture.is_decoded:
+        statistics.update(capture.samples)
+    elif capture.payload:
+        for chunk in iter_int16_chunks(capture.payload, chunk_size):
+            statistics.update(chunk)
+    return statistics.result(capture.factor)
+
+
+def iter_statistics(start=None, end=None, chunk_size=65536, **kwargs):
+    """
+    Computes the overall values of every wave of a tag within a time range, one
+    wave at a time, so memory use does not depend on the number or length of the
+    waves.
+
+    Args:
+        start (str): ISO formatted inclusive lower bound. None for no lower bound.
+        end (str): ISO formatted inclusive upper bound. None for no upper bound.
+        chunk_size (int): The number of samples decompressed at a time.
+        kwargs: The URL parameters as keyword arguments.
+
+    Yields:
+        tuple[str, dict[str, float]]: The ISO formatted timestamp and the overall
+            values of every wave, in the order of the listing.
+
+    Raises:
+        T8Error: If a request to the server fails.
+    """
+    for time in get_data.list_captures("waves", start, end, **kwargs):
+        capture = get_data.get_wave_capture(**{**kwargs, "time": time})
+        yield time, capture_statistics(capture, chunk_size)
@@ -0,0 +1,296 @@
+import bisect
+import fcntl
+import json
+import mmap
+import os
+import threading
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+from t8_client.capture import SpectrumCapture, WaveCapture
+
+KIND_CLASSES = {"waves": WaveCapture, "spectra": SpectrumCapture}
+
+
+@contextmanager
+def _exclusive(file):
+    """
+    Holds an exclusive advisory lock on an open file, shared by every process.
+    """
+    fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+class PayloadStore:
+    """
+    Local store of the captures of T8 devices in the form the T8 returns them.
+
+    Only the zlib compressed int16 payload (not base64 encoded) and its metadata
+    are kept, which is several times smaller than the decoded float arrays, so long
+    histories fit on local disk. The payloads are appended to a single data file
+    that is read through a memory map, and every capture has a line in an
+    append-only JSON index that is loaded into a dictionary, so captures are found
+    by device, kind, tag and timestamp in constant time. Captures of a T8 never
+    change once acquired, so stored captures never need revalidation.
+
+    The store is safe to use from several threads and processes: appends hold an
+    exclusive `flock` on both files, and the index lines appended by other
+    processes are loaded before every lookup, so captures recorded elsewhere are
+    found without reopening the store. Use it as a context manager, or call
+    `close`, to release the files.
+
+    Args:
+        root (str): Directory of the store. It is created if it does not exist.
+    """
+
+    DATA_FILE = "payloads.bin"
+    INDEX_FILE = "index.jsonl"
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = {}
+        self._timestamps = defaultdict(list)
+
+        # The files stay open for the lifetime of the store, see `close`
+        index_path = os.path.join(root, self.INDEX_FILE)
+        self._data = open(os.path.join(root, self.DATA_FILE), "ab+")  # noqa: SIM115
+        self._index_file = open(index_path, "a")  # noqa: SIM115
+        self._index_reader = open(index_path, "rb")  # noqa: SIM115
+        # Bytes of the index loaded so far, and size of the file when last read
+        self._index_offset = 0
+        self._index_size = -1
+        self._map = None
+        self._refresh()
+
+    @staticmethod
+    def _key(record) -> tuple:
+        return (
+            record["device"],
+            record["kind"],
+            record["machine"],
+            record["point"],
+            record["pmode"],
+            record["timestamp"],
+        )
+
+    def _add_record(self, record) -> None:
+        key = self._key(record)
+        if key in self._index:
+            # Already added by this process, or recorded twice
+            return
+        self._index[key] = record
+        # Kept sorted; captures are usually recorded in chronological order
+        timestamps = self._timestamps[key[:5]]
+        if not timestamps or key[5] > timestamps[-1]:
+            timestamps.append(key[5])
+        else:
+            bisect.insort(timestamps, key[5])
+
+    def _refresh(self) -> None:
+        """
+        Loads the index lines appended since the last call, by this or another
+        process. Must be called with the lock held.
+        """
+        size = os.fstat(self._index_reader.fileno()).st_size
+        if size == self._index_size:
+            return
+        self._index_size = size
+        self._index_reader.seek(self._index_offset)
+        for line in self._index_reader:
+            if not line.endswith(b"\n"):
+                # Still being written by another process, or left incomplete by an
+                # interrupted write: read again once it is terminated
+                break
+            self._index_offset += len(line)
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Incomplete line terminated by a later write
+                continue
+            self._add_record(record)
+
+    def _record(self, key) -> dict | None:
+        with self._lock:
+            self._refresh()
+            return self._index.get(key)
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def __contains__(self, key):
+        return self._record(tuple(key)) is not None
+
+    @property
+    def nbytes(self) -> int:
+        """
+        int: Size of the stored payloads in bytes.
+        """
+        with self._lock:
+            self._refresh()
+            return sum(record["length"] for record in self._index.values())
+
+    def put(self, device, capture) -> bool:
+        """
+        Stores a capture unless it is already stored.
+
+        Args:
+            device (str): The ID of the T8 the capture comes from.
+            capture (WaveCapture | SpectrumCapture): The capture.
+
+        Returns:
+            bool: Whether the capture was added.
+        """
+        kind = "waves" if isinstance(capture, WaveCapture) else "spectra"
+        record = {
+            "device": device,
+            "kind": kind,
+            "machine": capture.machine,
+            "point": capture.point,
+            "pmode": capture.pmode,
+            "timestamp": capture.timestamp,
+            "factor": capture.factor,
+        }
+        if kind == "waves":
+            record["sample_rate"] = capture.sample_rate
+        else:
+            record["min_freq"] = capture.fmin
+            record["max_freq"] = capture.fmax
+
+        with self._lock, _exclusive(self._data), _exclusive(self._index_file):
+            self._refresh()
+            if self._key(record) in self._index:
+                return False
+            torn = self._index_offset < self._index_size
+            if torn:
+                # No other process is writing, so the last line is torn:
+                # terminate it so that the next line can be read
+                self._index_file.write("\n")
+            self._data.seek(0, os.SEEK_END)
+            record["offset"] = self._data.tell()
+            record["length"] = len(capture.payload)
+            self._data.write(capture.payload)
+            self._data.flush()
+            # The index line is written after its payload, so it never points to
+            # missing data
+            line = json.dumps(record, separators=(",", ":")) + "\n"
+            self._index_file.write(line)
+            self._index_file.flush()
+            self._add_record(record)
+            if not torn:
+                # The index is loaded up to the end: skip reading this line back
+                self._index_offset += len(line.encode())
+                self._index_size = self._index_offset
+        return True
+
+    def _payload(self, record) -> memoryview:
+        """
+        Returns a zero-copy view of a stored payload in the memory map.
+        """
+        if not record["length"]:
+            return memoryview(b"")
+        end = record["offset"] + record["length"]
+        with self._lock:
+            if self._map is None or len(self._map) < end:
+                # The data file grew: map it again. The previous map is released
+                # once the views still reading from it are gone
+                self._map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+            return memoryview(self._map)[record["offset"] : end]
+
+    def get(self, device, kind, machine, point, pmode, timestamp):
+        """
+        Returns a stored capture.
+
+        Args:
+            device (str): The ID of the T8.
+            kind (str): The kind of capture, either "waves" or "spectra".
+            machine (str): The machine tag.
+            point (str): The point tag.
+            pmode (str): The processing mode tag.
+            timestamp (int): Unix timestamp of the capture.
+
+        Returns:
+            WaveCapture | SpectrumCapture | None: The capture, not yet decoded, or
+                None if it is not stored.
+        """
+        record = self._record((device, kind, machine, point, pmode, timestamp))
+        if record is None:
+            return None
+        payload = bytes(self._payload(record))
+        if kind == "waves":
+            extra = (record["sample_rate"],)
+        else:
+            extra = (record["min_freq"], record["max_freq"])
+        return KIND_CLASSES[kind](
+            machine, point, pmode, timestamp, payload, record["factor"], *extra
+        )
+
+    def read_samples(self, device, kind, machine, point, pmode, timestamp):
+        """
+        Decompresses a stored payload straight from the memory map into an int16
+        array, without building a capture.
+
+        Returns:
+            np.ndarray | None: The unscaled int16 samples, or None if the capture
+                is not stored.
+        """
+        record = self._record((device, kind, machine, point, pmode, timestamp))
+        if record is None:
+            return None
+        raw = zlib.decompress(self._payload(record))
+        return np.frombuffer(raw, dtype=np.int16, count=len(raw) // 2)
+
+    def timestamps(
+        self, device, kind, machine, point, pmode, start=None, end=None
+    ) -> list[int]:
+        """
+        Returns the sorted timestamps of the stored captures of a tag, optionally
+        sliced to a time range by binary search.
+
+        Args:
+            device (str): The ID of the T8.
+            kind (str): The kind of capture, either "waves" or "spectra".
+            machine (str): The machine tag.
+            point (str): The point tag.
+            pmode (str): The processing mode tag.
+            start (int): Inclusive lower bound as a Unix timestamp. None for no
+                lower bound.
+            end (int): Inclusive upper bound as a Unix timestamp. None for no upper
+                bound.
+
+        Returns:
+            list[int]: The timestamps within the range.
+        """
+        with self._lock:
+            self._refresh()
+            timestamps = self._timestamps.get((device, kind, machine, point, pmode), [])
+            low = 0 if start is None else bisect.bisect_left(timestamps, start)
+            high = (
+                len(timestamps) if end is None else bisect.bisect_right(timestamps, end)
+            )
+            return timestamps[low:high]
+
+    def close(self) -> None:
+        """
+        Closes the files of the store.
+        """
+        with self._lock:
+            self._map = None
+            self._data.close()
+            self._index_file.close()
+            self._index_reader.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,10 +1,60 @@
 from base64 import b64decode
-from struct import unpack
-from zlib import decompress
+from zlib import decompress, decompressobj
 
 import numpy as np
 
 
+def zint_to_int16(payload: bytes) -> np.ndarray:
+    """
+    Decompress a zlib compressed buffer of 16-bit integers into a NumPy array.
+
+    Args:
+        payload (bytes): The compressed 16-bit integer data, already base64 decoded.
+
+    Returns:
+        np.ndarray: A read-only NumPy array of int16 backed by the decompressed data.
+    """
+    decompressed_data = decompress(payload)
+    if len(decompressed_data) % 2:
+        decompressed_data = decompressed_data[:-1]
+    return np.frombuffer(decompressed_data, dtype=np.int16)
+
+
+def iter_int16_chunks(payload: bytes, chunk_size=65536):
+    """
+    Decompress a zlib compressed buffer of 16-bit integers incrementally, in chunks
+    of bounded size, so the whole decompressed array is never held in memory.
+
+    Args:
+        payload (bytes): The compressed 16-bit integer data, already base64 decoded.
+        chunk_size (int): The maximum number of integers of a chunk, except for one
+            more integer completed from the previous chunk.
+
+    Yields:
+        np.ndarray: Read-only NumPy arrays of int16, in order.
+    """
+    decompressor = decompressobj()
+    payload = memoryview(payload)
+    max_length = 2 * chunk_size
+    carry = b""
+    # The input is fed in blocks because the unconsumed input is copied on every
+    # call, which would copy the rest of a large payload for every chunk
+    for offset in range(0, max(len(payload), 1), max_length):
+        data = payload[offset : offset + max_length]
+        while True:
+            raw = decompressor.decompress(data, max_length)
+            data = decompressor.unconsumed_tail
+            full = len(raw) == max_length
+            # An integer may be split between two chunks
+            raw = carry + raw if carry else raw
+            usable = len(raw) - len(raw) % 2
+            carry = raw[usable:]
+            if usable:
+                yield np.frombuffer(raw, dtype=np.int16, count=usable // 2)
+            if not data and not full:
+                break
+
+
 def zint_to_float(raw):
     """
     Convert a base64 encoded compressed string of 16-bit integers to a NumPy array of
@@ -20,11 +70,4 @@ def zint_to_float(raw):
     if not raw:
         return np.array([], dtype="f")
 
-    decompressed_data = decompress(b64decode(raw.encode()))
-    return np.array(
-        [
-            unpack("h", decompressed_data[i * 2 : (i + 1) * 2])[0]
-            for i in range(int(len(decompressed_data) / 2))
-        ],
-        dtype="f",
-    )
+    return zint_to_int16(b64decode(raw.encode())).astype("f")
@@ -0,0 +1,188 @@
+import lzma
+import math
+import struct
+import zlib
+from base64 import b64encode
+
+import numpy as np
+
+INT16_MAX = np.iinfo(np.int16).max
+
+# Container layout: magic, version, codec, flags, number of dimensions and
+# factor, followed by one uint64 per dimension and the compressed int16 samples
+MAGIC = b"T8ZC"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBBd")
+DIMENSION = struct.Struct("<Q")
+
+CODECS = {"zlib": 0, "lzma": 1}
+DEFAULT_LEVELS = {"zlib": 6, "lzma": 6}
+FLAG_DELTA = 1
+
+
+def choose_factor(values) -> float:
+    """
+    Chooses the scale factor that maps the largest magnitude of the values to the
+    int16 range, so the quantization error is as small as possible.
+
+    Args:
+        values (np.ndarray): The values to encode.
+
+    Returns:
+        float: The factor, or 1.0 if every value is zero.
+    """
+    peak = float(np.max(np.abs(values), initial=0.0))
+    return peak / INT16_MAX if peak > 0 else 1.0
+
+
+def float_to_int16(values, factor=None) -> tuple[np.ndarray, float]:
+    """
+    Quantizes floats to the int16 samples of the T8 "zint" format.
+
+    Every value is rounded to the nearest multiple of `factor`, so the samples
+    times `factor` differ from the values by at most `factor / 2`. With the
+    automatic factor this is 1 / 65534 (about 1.5e-5) of the largest magnitude.
+
+    Args:
+        values (np.ndarray): The values to encode.
+        factor (float): Factor that scales the int16 samples to the units of the
+            values. Defaults to `choose_factor(values)`.
+
+    Returns:
+        tuple[np.ndarray, float]: The int16 samples and the factor.
+
+    Raises:
+        ValueError: If a value is not finite or does not fit in int16 with the
+            given factor.
+    """
+    values = np.asarray(values)
+    if not np.all(np.isfinite(values)):
+        raise ValueError("Only finite values can be encoded")
+    if factor is None:
+        factor = choose_factor(values)
+    if factor <= 0:
+        raise ValueError(f"The factor must be positive, got {factor}")
+
+    scaled = np.rint(values / factor)
+    if scaled.size and np.max(np.abs(scaled)) > INT16_MAX:
+        raise ValueError(f"The values do not fit in int16 with factor {factor}")
+    return scaled.astype(np.int16), factor
+
+
+def float_to_zint(values, factor=None, level=6) -> tuple[str, float]:
+    """
+    Encodes floats in the T8 "zint" format, the inverse of `zint_to_float`.
+
+    Args:
+        values (np.ndarray): The values to encode.
+        factor (float): Factor that scales the int16 samples to the units of the
+            values. Defaults to `choose_factor(values)`.
+        level (int): The zlib compression level, from 0 to 9.
+
+    Returns:
+        tuple[str, float]: The base64 encoded zlib compressed int16 samples and the
+            factor, so that `zint_to_float(raw) * factor` restores the values within
+            `factor / 2`.
+
+    Raises:
+        ValueError: If a value is not finite or does not fit in int16 with the
+            given factor.
+    """
+    samples, factor = float_to_int16(values, factor)
+    return b64encode(zlib.compress(samples.tobytes(), level)).decode(), factor
+
+
+def encode_series(series, factor=None, delta=False, codec="zlib", level=None) -> bytes:
+    """
+    Encodes an array of values, such as the consecutive spectra or envelopes of a
+    tag, into a self-describing compact container.
+
+    The values are quantized to int16 with a single factor (see `float_to_int16`
+    for the error bound) and compressed. With `delta`, each row of a 2-D series is
+    stored as its difference from the previous row, with int16 wraparound, which
+    is lossless and compresses slowly changing series much better.
+
+    Args:
+        series (np.ndarray): The values, one row per spectrum for a series.
+        factor (float): Factor that scales the int16 samples to the units of the
+            values. Defaults to `choose_factor(series)`.
+        delta (bool): Whether to encode the differences between consecutive rows.
+        codec (str): The compressor, either "zlib" or "lzma".
+        level (int): The compression level (zlib level or lzma preset, from 0 to
+            9). Defaults to 6.
+
+    Returns:
+        bytes: The container, decoded by `decode_series`.
+
+    Raises:
+        ValueError: If the codec is unknown, or a value is not finite or does not
+            fit in int16 with the given factor.
+    """
+    if codec not in CODECS:
+        raise ValueError(f"Invalid codec '{codec}', expected one of {list(CODECS)}")
+    level = DEFAULT_LEVELS[codec] if level is None else level
+
+    samples, factor = float_to_int16(series, factor)
+    if delta and samples.ndim > 1:
+        # int16 arithmetic wraps around, and so does the cumulative sum that
+        # restores the rows
+        samples[1:] = samples[1:] - samples[:-1]
+
+    raw = samples.tobytes()
+    if codec == "zlib":
+        compressed = zlib.compress(raw, level)
+    else:
+        compressed = lzma.compress(raw, preset=level)
+
+    flags = FLAG_DELTA if delta and samples.ndim > 1 else 0
+    header = HEADER.pack(MAGIC, VERSION, CODECS[codec], flags, samples.ndim, factor)
+    shape = b"".join(DIMENSION.pack(size) for size in samples.shape)
+    return header + shape + compressed
+
+
+def decode_series(container: bytes, dtype=np.float32) -> np.ndarray:
+    """
+    Decodes a container created by `encode_series`.
+
+    Args:
+        container (bytes): The container.
+        dtype (np.dtype): The floating point type of the returned values.
+
+    Returns:
+        np.ndarray: The values, within `factor / 2` of the encoded ones.
+
+    Raises:
+        ValueError: If the container is not valid.
+    """
+    if len(container) < HEADER.size:
+        raise ValueError("Truncated container")
+    magic, version, codec, flags, ndim, factor = HEADER.unpack_from(container)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a compact series container")
+    offset = HEADER.size + ndim * DIMENSION.size
+    if len(container) < offset:
+        raise ValueError("Truncated container")
+    shape = tuple(
+        DIMENSION.unpack_from(container, HEADER.size + i * DIMENSION.size)[0]
+        for i in range(ndim)
+    )
+
+    compressed = memoryview(container)[offset:]
+    try:
+        if codec == CODECS["zlib"]:
+            raw = zlib.decompress(compressed)
+        elif codec == CODECS["lzma"]:
+            raw = lzma.decompress(compressed)
+        else:
+            raise ValueError(f"Unknown codec {codec} in container")
+    except (zlib.error, lzma.LZMAError) as error:
+        raise ValueError(f"Corrupt container: {error}") from error
+    if math.prod(shape) * np.dtype(np.int16).itemsize != len(raw):
+        raise ValueError(
+            f"Container holds {len(raw)} bytes of samples, expected shape {shape}"
+        )
+
+    samples = np.frombuffer(raw, dtype=np.int16).reshape(shape)
+    if flags & FLAG_DELTA:
+        samples = np.cumsum(samples, axis=0, dtype=np.int16)
+    return np.multiply(samples, factor, dtype=dtype)
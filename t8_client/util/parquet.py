@@ -0,0 +1,214 @@
+import os
+from datetime import UTC, datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DTYPES = {"float32": np.float32, "float16": np.float16}
+
+
+def capture_schema(dtype: str = "float32"):
+    """
+    Builds the Arrow schema of the rows written by `ParquetCaptureWriter`.
+
+    Args:
+        dtype (str): Storage type of the samples, "float32" or "float16".
+
+    Returns:
+        pa.Schema: The schema with the capture metadata and the samples list column.
+    """
+    value_type = pa.float16() if dtype == "float16" else pa.float32()
+    return pa.schema(
+        [
+            ("timestamp", pa.timestamp("s", tz="UTC")),
+            ("sample_rate", pa.float64()),
+            ("factor", pa.float64()),
+            ("fmin", pa.float64()),
+            ("fmax", pa.float64()),
+            ("samples", pa.list_(value_type)),
+        ]
+    )
+
+
+class ParquetCaptureWriter:
+    """
+    Streams captures into a Parquet dataset partitioned by machine, point, processing
+    mode and date, in the Hive layout (`machine=M1/point=P1/pmode=PM1/date=...`).
+
+    Rows are buffered per partition and written as a row group every
+    `row_group_size` captures, so memory stays bounded however many captures are
+    exported. At most `max_open_partitions` files are kept open at once; the least
+    recently opened one is flushed and closed when the limit is exceeded.
+
+    Args:
+        root (str): Root directory of the dataset.
+        dtype (str): Storage type of the samples, "float32" or "float16". float16
+            halves the size but only holds magnitudes up to 65504 (with about 3
+            significant digits); captures with larger samples are rejected instead
+            of being stored as infinities.
+        row_group_size (int): Number of captures per row group.
+        compression (str): Parquet compression codec.
+        max_open_partitions (int): Maximum number of partition files open at once.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        ValueError: If the storage type is not supported.
+    """
+
+    def __init__(
+        self,
+        root,
+        dtype="float32",
+        row_group_size=64,
+        compression="zstd",
+        max_open_partitions=16,
+    ):
+        if pa is None:
+            raise ImportError(
+                "Parquet export requires pyarrow, install it with"
+                + " `pip install t8-client[parquet]`"
+            )
+        if dtype not in DTYPES:
+            raise ValueError(f"Invalid dtype '{dtype}', expected one of {list(DTYPES)}")
+
+        self.root = root
+        self.dtype = dtype
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self.max_open_partitions = max_open_partitions
+        self.schema = capture_schema(dtype)
+        self._partitions = {}
+
+    def write(
+        self,
+        machine,
+        point,
+        pmode,
+        timestamp,
+        samples,
+        factor,
+        sample_rate=None,
+        fmin=None,
+        fmax=None,
+    ) -> None:
+        """
+        Adds a capture to the dataset.
+
+        Args:
+            machine (str): The machine tag.
+            point (str): The point tag.
+            pmode (str): The processing mode tag.
+            timestamp (int): Unix timestamp of the capture.
+            samples (np.ndarray): The scaled samples of the wave or spectrum.
+            factor (float): The scale factor of the capture.
+            sample_rate (float): The sample rate of a wave, None for spectra.
+            fmin (float): The minimum frequency of a spectrum, None for waves.
+            fmax (float): The maximum frequency of a spectrum, None for waves.
+
+        Raises:
+            ValueError: If a sample does not fit in the storage type.
+        """
+        samples = np.asarray(samples)
+        limit = np.finfo(DTYPES[self.dtype]).max
+        if samples.size and np.max(np.abs(samples)) > limit:
+            raise ValueError(
+                f"Samples of magnitude above {limit:g} cannot be stored as {self.dtype}"
+            )
+
+        date = datetime.fromtimestamp(timestamp, tz=UTC).strftime("%Y-%m-%d")
+        key = (machine, point, pmode, date)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._open_partition(key)
+
+        partition["rows"].append(
+            (
+                timestamp,
+                sample_rate,
+                factor,
+                fmin,
+                fmax,
+                np.asarray(samples, dtype=DTYPES[self.dtype]),
+            )
+        )
+        if len(partition["rows"]) >= self.row_group_size:
+            self._flush(partition)
+
+    def close(self) -> None:
+        """
+        Writes the pending rows of every partition and closes their files.
+        """
+        for key in list(self._partitions):
+            self._close_partition(key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _open_partition(self, key) -> dict:
+        if len(self._partitions) >= self.max_open_partitions:
+            self._close_partition(next(iter(self._partitions)))
+
+        machine, point, pmode, date = key
+        directory = os.path.join(
+            self.root,
+            f"machine={machine}",
+            f"point={point}",
+            f"pmode={pmode}",
+            f"date={date}",
+        )
+        os.makedirs(directory, exist_ok=True)
+        # Never overwrite the files of previous exports to the same partition
+        part = len(
+            [name for name in os.listdir(directory) if name.endswith(".parquet")]
+        )
+        path = os.path.join(directory, f"part-{part}.parquet")
+
+        partition = {
+            "writer": pq.ParquetWriter(path, self.schema, compression=self.compression),
+            "rows": [],
+        }
+        self._partitions[key] = partition
+        return partition
+
+    def _close_partition(self, key) -> None:
+        partition = self._partitions.pop(key)
+        self._flush(partition)
+        partition["writer"].close()
+
+    def _flush(self, partition) -> None:
+        rows = partition["rows"]
+        if not rows:
+            return
+
+        timestamps, sample_rates, factors, fmins, fmaxs, samples = zip(
+            *rows, strict=True
+        )
+        lengths = np.fromiter(
+            (len(s) for s in samples), dtype=np.int32, count=len(rows)
+        )
+        offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        values = pa.array(np.concatenate(samples))
+
+        table = pa.Table.from_arrays(
+            [
+                pa.array(timestamps, type=self.schema.field("timestamp").type),
+                pa.array(sample_rates, type=pa.float64()),
+                pa.array(factors, type=pa.float64()),
+                pa.array(fmins, type=pa.float64()),
+                pa.array(fmaxs, type=pa.float64()),
+                pa.ListArray.from_arrays(pa.array(offsets), values),
+            ],
+            schema=self.schema,
+        )
+        partition["writer"].write_table(table, row_group_size=len(rows))
+        rows.clear()
@@ -1,5 +1,8 @@
+import os
+
 import numpy as np
 from matplotlib import pyplot as plt
+from matplotlib.figure import Figure
 
 
 def plot_waveform(waveform, sample_rate):
@@ -44,6 +47,7 @@ def plot_spectrum_comparison(
     title2: str = "Spectrum 2",
     xlabel: str = "Frequency (Hz)",
     ylabel: str = "Amplitude",
+    file_path: str = None,
 ):
     """
     Plots a comparison of two spectra.
@@ -59,8 +63,15 @@ def plot_spectrum_comparison(
         title2 (str): The title of the second spectrum plot.
         xlabel (str): The label for the x-axis.
         ylabel (str): The label for the y-axis.
+        file_path (str): If given, the plot is saved to this image file instead of
+            being shown. The figure is created without pyplot, so this can be used
+            from worker threads and without a display.
     """
-    _, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
+    if file_path is None:
+        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
+    else:
+        fig = Figure(figsize=(10, 8))
+        ax1, ax2 = fig.subplots(2, 1)
 
     ax1.plot(freqs1, spectrum1)
     ax1.set_xlim(fmin, fmax)
@@ -76,5 +87,9 @@ def plot_spectrum_comparison(
     ax2.set_ylabel(ylabel)
     ax2.grid(True)
 
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    if file_path is None:
+        plt.show()
+    else:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        fig.savefig(file_path)
@@ -0,0 +1,192 @@
+import heapq
+import random
+import time as time_module
+
+import requests
+
+from t8_client import get_data
+from t8_client.exceptions import T8FatalError, T8RetryableError
+from t8_client.util.timestamp import iso_string_to_timestamp, timestamp_to_iso_string
+
+# Names of the `get_data` functions that list and fetch each kind of capture
+KINDS = {
+    "waves": ("get_wave_list", "get_wave"),
+    "spectra": ("get_spectra", "get_spectrum"),
+}
+
+
+def parse_tag(tag: str) -> tuple[str, str, str]:
+    """
+    Splits a combined tag in the format M1:P1:PM1 into its components.
+
+    Args:
+        tag (str): The combined machine, point and processing mode tag.
+
+    Returns:
+        tuple[str, str, str]: The machine, point and processing mode tags.
+
+    Raises:
+        ValueError: If the tag does not have exactly three components.
+    """
+    parts = tag.split(":")
+    if len(parts) != 3:
+        raise ValueError(f"Invalid tag '{tag}', expected the format M1:P1:PM1")
+    return parts[0], parts[1], parts[2]
+
+
+def watch(
+    tags,
+    kinds=("waves",),
+    since=None,
+    min_interval=1.0,
+    max_interval=60.0,
+    backoff=2.0,
+    jitter=0.1,
+    max_events=None,
+    sleep=time_module.sleep,
+    clock=time_module.monotonic,
+    **kwargs,
+):
+    """
+    Polls the T8 for new captures of several tags and yields them as they appear.
+
+    All the tags are served by a single scheduler that polls whichever tag is due
+    next, and they share one HTTP session (and so one connection pool). The listing
+    requests are revalidated with ETag/Last-Modified, so polling an unchanged tag
+    costs a body-less 304 response. Each tag has its own polling interval: it drops
+    to `min_interval` whenever new captures are found and grows by `backoff` up to
+    `max_interval` while nothing changes or the device is busy, with a random
+    `jitter` so that many tags do not hit the device at the same instant.
+
+    The tags fail independently: a capture that cannot be fetched for a transient
+    reason is retried on the next poll of its tag, and a non-retryable error is
+    yielded as the result of its tag instead of being raised. An error listing a
+    tag stops the polling of that tag only; an error fetching one capture skips
+    that capture.
+
+    Args:
+        tags (list[str]): Combined tags in the format M1:P1:PM1.
+        kinds (tuple[str]): Kinds of captures to watch, "waves" and/or "spectra".
+        since (str): ISO formatted timestamp after which captures are considered
+            new. If None, only captures acquired after the first poll are yielded.
+        min_interval (float): Minimum seconds between two polls of the same tag.
+        max_interval (float): Maximum seconds between two polls of the same tag.
+        backoff (float): Interval multiplier applied when a poll finds nothing new.
+        jitter (float): Relative random variation applied to every interval.
+        max_events (int): Stop after yielding this many captures. None to run
+            forever.
+        sleep (callable): Function used to wait between polls.
+        clock (callable): Monotonic clock used to schedule polls.
+        kwargs: The connection parameters (host, id, t8_user, t8_password).
+
+    Yields:
+        tuple[str, str, str, tuple]: The kind, tag, ISO formatted time and the result
+            of `get_wave` or `get_spectrum` for every new capture. For errors, the
+            result is the `T8FatalError`, and the time is None if the listing
+            failed.
+
+    Raises:
+        ValueError: If a tag or kind is not valid.
+    """
+    for kind in kinds:
+        if kind not in KINDS:
+            raise ValueError(f"Invalid kind '{kind}', expected one of {list(KINDS)}")
+
+    kwargs = dict(kwargs)
+    own_session = kwargs.get("session") is None
+    if own_session:
+        kwargs["session"] = requests.Session()
+
+    last_seen = iso_string_to_timestamp(since) if since else None
+    queue = []
+    for i, (kind, tag) in enumerate((kind, tag) for tag in tags for kind in kinds):
+        machine, point, pmode = parse_tag(tag)
+        state = {
+            "kind": kind,
+            "tag": tag,
+            "params": {**kwargs, "machine": machine, "point": point, "pmode": pmode},
+            "last_seen": last_seen,
+            "interval": min_interval,
+        }
+        queue.append((clock(), i, state))
+    heapq.heapify(queue)
+
+    def reschedule(i, state, found):
+        if found:
+            state["interval"] = min_interval
+        else:
+            # Nothing new, or the device is busy: poll this tag less often
+            state["interval"] = min(state["interval"] * backoff, max_interval)
+        interval = state["interval"] * (1 + random.uniform(-jitter, jitter))
+        heapq.heappush(queue, (clock() + interval, i, state))
+
+    events = 0
+    try:
+        while queue:
+            due, i, state = heapq.heappop(queue)
+            delay = due - clock()
+            if delay > 0:
+                sleep(delay)
+
+            list_name, get_name = KINDS[state["kind"]]
+            list_captures = getattr(get_data, list_name)
+            get_capture = getattr(get_data, get_name)
+            try:
+                timestamps = sorted(
+                    iso_string_to_timestamp(time)
+                    for time in list_captures(**state["params"])
+                )
+            except T8RetryableError:
+                reschedule(i, state, found=False)
+                continue
+            except T8FatalError as error:
+                # Stop polling this tag only
+                yield state["kind"], state["tag"], None, error
+                continue
+
+            if state["last_seen"] is None:
+                new = []
+                state["last_seen"] = timestamps[-1] if timestamps else 0
+            else:
+                new = [t for t in timestamps if t > state["last_seen"]]
+
+            found = False
+            for timestamp in new:
+                time = timestamp_to_iso_string(timestamp)
+                try:
+                    result = get_capture(**state["params"], time=time)
+                except T8RetryableError:
+                    # Back off and fetch the rest of the new captures on a later poll
+                    found = False
+                    break
+                except T8FatalError as error:
+                    # Skip this capture only
+                    state["last_seen"] = timestamp
+                    yield state["kind"], state["tag"], time, error
+                    continue
+                found = True
+                state["last_seen"] = timestamp
+                yield state["kind"], state["tag"], time, result
+                events += 1
+                if max_events is not None and events >= max_events:
+                    return
+
+            reschedule(i, state, found)
+    finally:
+        if own_session:
+            kwargs["session"].close()
+
+
+def run_watch(callback, tags, **kwargs) -> None:
+    """
+    Watches several tags for new captures and hands each one to a callback.
+
+    Args:
+        callback (callable): Function called as `callback(kind, tag, time, result)`
+            for every new capture, as soon as it is fetched, and for every error
+            of a tag (see `watch`).
+        tags (list[str]): Combined tags in the format M1:P1:PM1.
+        kwargs: The polling options and connection parameters accepted by `watch`.
+    """
+    for event in watch(tags, **kwargs):
+        callback(*event)
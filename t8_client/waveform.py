@@ -1,31 +1,73 @@
+from functools import lru_cache
+
 import numpy as np
 
 
+def padded_length(n: int) -> int:
+    """
+    Returns the length `zero_padding` pads a waveform of `n` samples to.
+
+    Parameters:
+    n (int): The number of samples of the waveform.
+
+    Returns:
+    int: The next power of 2 greater than or equal to `n`.
+    """
+    return int(2 ** np.ceil(np.log2(n)).astype(int))
+
+
 def zero_padding(waveform: np.ndarray):
     """
     Pads the input waveform with zeros to the next power of 2 length.
 
     Parameters:
-    waveform (np.ndarray): The input waveform array.
+    waveform (np.ndarray): The input waveform array. A 2-D array is treated as a
+        batch of waveforms, one per row.
 
     Returns:
     np.ndarray: The zero-padded waveform array with length equal to the next power of 2.
     """
-    n = len(waveform)
-    padded_length = 2 ** np.ceil(np.log2(n)).astype(int)
-    return np.pad(waveform, (0, padded_length - n), "constant")
+    n = waveform.shape[-1]
+    pad_width = [(0, 0)] * (waveform.ndim - 1) + [(0, padded_length(n) - n)]
+    return np.pad(waveform, pad_width, "constant")
+
+
+@lru_cache(maxsize=32)
+def hanning_window(n: int, dtype=np.float64) -> np.ndarray:
+    """
+    Returns the Hanning window applied by `preprocess_waveform`, cached per length
+    and type.
+
+    Parameters:
+    n (int): The number of points of the window.
+    dtype (np.dtype): The floating point type of the window.
+
+    Returns:
+    np.ndarray: The read-only window. Copy it before modifying it.
+    """
+    window = np.hanning(n).astype(dtype)
+    window.flags.writeable = False
+    return window
 
 
-def preprocess_waveform(waveform: np.ndarray):
+def preprocess_waveform(waveform: np.ndarray, dtype=np.float64):
     """
     Preprocesses the given waveform by applying a Hanning window and zero padding.
 
     Parameters:
-    waveform (np.ndarray): The input waveform to preprocess.
+    waveform (np.ndarray): The input waveform to preprocess. A 2-D array is treated
+        as a batch of waveforms, one per row.
+    dtype (np.dtype): The floating point precision of the result. `np.float32`
+        keeps float32 waveforms (as returned by `get_data`) in single precision,
+        halving the memory of this and the following spectrum stages.
 
     Returns:
     np.ndarray: The preprocessed waveform with a Hanning window applied and zero
         padding.
     """
-    windowed_waveform = waveform * np.hanning(len(waveform))
+    waveform = np.asarray(waveform)
+    dtype = np.dtype(dtype)
+    windowed_waveform = np.multiply(
+        waveform, hanning_window(waveform.shape[-1], dtype), dtype=dtype
+    )
     return zero_padding(windowed_waveform)
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from t8_client.baseline import BaselineStore, SpectrumBaseline
+
+
+def test_spectrum_baseline_statistics():
+    """
+    Test that the running statistics of a baseline match the statistics of the
+    whole history computed at once.
+
+    Asserts:
+        - Mean and standard deviation match NumPy over all the spectra.
+        - The estimated median is within the relative error of the sketch.
+    """
+    rng = np.random.default_rng(0)
+    history = rng.lognormal(mean=-2, sigma=0.5, size=(500, 64))
+
+    baseline = SpectrumBaseline(64)
+    for spectrum in history:
+        baseline.update(spectrum)
+
+    assert baseline.count == 500
+    np.testing.assert_allclose(baseline.mean, history.mean(axis=0))
+    np.testing.assert_allclose(baseline.std, history.std(axis=0, ddof=1))
+    np.testing.assert_allclose(
+        baseline.percentile(50), np.median(history, axis=0), rtol=0.15
+    )
+
+
+def test_spectrum_baseline_scoring():
+    """
+    Test that spectra like the baseline ones score about 1 and that a spectrum
+    with a new peak scores higher, and that spectra with a different number of
+    bins are rejected.
+    """
+    rng = np.random.default_rng(1)
+    baseline = SpectrumBaseline(32)
+    for spectrum in rng.normal(1.0, 0.1, size=(200, 32)):
+        baseline.update(spectrum)
+
+    normal = rng.normal(1.0, 0.1, size=32)
+    abnormal = normal.copy()
+    abnormal[10] = 3.0
+
+    assert baseline.score(normal) == pytest.approx(1, abs=0.5)
+    assert baseline.score(abnormal) > 3
+    assert baseline.zscores(abnormal)[10] > 10
+    assert baseline.exceedance(abnormal, 99) >= 1 / 32
+    with pytest.raises(ValueError):
+        baseline.update(np.ones(31))
+
+
+def test_baseline_store_persistence(tmp_path):
+    """
+    Test that a baseline store saves its baselines per tag and that they load back
+    with the same state.
+    """
+    rng = np.random.default_rng(2)
+    store = BaselineStore(tmp_path)
+    for spectrum in rng.random((10, 2048)):
+        store.update("M1", "P1", "PM1", spectrum)
+    store.save()
+
+    loaded = BaselineStore(tmp_path).get("M1", "P1", "PM1")
+
+    original = store.get("M1", "P1", "PM1")
+    assert loaded.count == 10
+    np.testing.assert_array_equal(loaded.mean, original.mean)
+    np.testing.assert_array_equal(loaded.histogram, original.histogram)
+    assert BaselineStore(tmp_path).get("M1", "P1", "PM2") is None
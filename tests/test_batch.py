@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from t8_client.batch import (
+    calculate_spectra,
+    common_frequency_grid,
+    plan_batches,
+    resample_spectra,
+)
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+
+def test_plan_batches_groups_by_padded_length_and_sample_rate():
+    """
+    Test that captures are grouped by padded length and sample rate, in order of
+    first appearance, and that empty captures are rejected.
+    """
+    groups = plan_batches([1000, 1024, 2000, 1000], [2560, 2560, 2560, 5120])
+
+    assert groups == {(1024, 2560.0): [0, 1], (2048, 2560.0): [2], (1024, 5120.0): [3]}
+    with pytest.raises(ValueError):
+        plan_batches([1000, 0], [2560, 2560])
+
+
+def test_calculate_spectra_matches_per_capture_path():
+    """
+    Test that batched spectra of mixed lengths and sample rates equal the spectra
+    computed one capture at a time, in the order of the input.
+    """
+    rng = np.random.default_rng(0)
+    lengths = [1000, 2048, 1024, 1500, 2048]
+    sample_rates = [2560, 2560, 2560, 5120, 5120]
+    waveforms = [rng.standard_normal(n).astype(np.float32) for n in lengths]
+
+    results = calculate_spectra(waveforms, sample_rates, 10, 1000)
+
+    assert len(results) == len(waveforms)
+    for waveform, sample_rate, (spectrum, freqs) in zip(
+        waveforms, sample_rates, results, strict=True
+    ):
+        expected, expected_freqs = calculate_spectrum(
+            preprocess_waveform(waveform), sample_rate, 10, 1000
+        )
+        np.testing.assert_allclose(spectrum, expected, rtol=1e-10, atol=1e-12)
+        np.testing.assert_array_equal(freqs, expected_freqs)
+
+
+def test_resample_spectra_onto_common_grid():
+    """
+    Test that spectra of different resolutions are interpolated onto the coarsest
+    common grid, that grid frequencies outside a spectrum are filled, and that a
+    grid cannot be built from a spectrum without a resolution.
+    """
+    fine = np.arange(0, 100.5, 0.5)
+    coarse = np.arange(10, 91, 2.0)
+    spectra = [2 * fine, 2 * coarse]
+
+    grid = common_frequency_grid([fine, coarse])
+    np.testing.assert_allclose(grid, coarse)
+
+    resampled = resample_spectra(spectra, [fine, coarse], grid)
+    np.testing.assert_allclose(resampled, [2 * grid, 2 * grid])
+
+    resampled = resample_spectra(spectra, [fine, coarse], [5.0, 50.25, 95.0])
+    np.testing.assert_allclose(resampled[0], [10.0, 100.5, 190.0])
+    np.testing.assert_allclose(resampled[1], [np.nan, 100.5, np.nan])
+
+    with pytest.raises(ValueError, match="at least two frequencies"):
+        common_frequency_grid([fine, np.array([10.0])])
+    with pytest.raises(ValueError, match="at least two frequencies"):
+        common_frequency_grid([])
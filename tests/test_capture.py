@@ -0,0 +1,96 @@
+from base64 import b64encode
+from unittest.mock import patch
+from zlib import compress
+
+import numpy as np
+import pytest
+
+from t8_client import get_data
+from t8_client.capture import SpectrumCapture, WaveCapture
+
+
+def make_wave(samples, factor=0.5):
+    """
+    Builds a wave capture from int16 samples.
+    """
+    payload = compress(np.asarray(samples, dtype=np.int16).tobytes())
+    return WaveCapture("M1", "P1", "PM1", 1554907724, payload, factor, 2560)
+
+
+def test_capture_decodes_lazily():
+    """
+    Test that a capture is only decoded on first access to its data, that the
+    decoded samples are memoized and that scaling is applied on demand.
+
+    Asserts:
+        - The capture is not decoded after being built or after reading metadata.
+        - The number of samples is known without decoding.
+        - `data` returns the scaled samples and memoizes the decoded integers.
+    """
+    capture = make_wave([2, -4, 6, 32767])
+
+    assert capture.n_samples == 4
+    assert capture.duration == 4 / 2560
+    assert capture.tag == "M1:P1:PM1"
+    assert capture.time == "2019-04-10T14:48:44"
+    assert not capture.is_decoded
+
+    np.testing.assert_array_equal(capture.data, [1.0, -2.0, 3.0, 16383.5])
+    assert capture.is_decoded
+    assert capture.samples is capture.samples
+
+    capture.release()
+    assert not capture.is_decoded
+
+
+def test_capture_uses_slots():
+    """
+    Test that captures have no per-instance `__dict__`, so that holding many of
+    them costs little more than their compressed payload.
+    """
+    capture = make_wave(np.zeros(16384))
+
+    assert not hasattr(capture, "__dict__")
+    with pytest.raises(AttributeError):
+        capture.extra = 1
+    assert capture.nbytes < 1000
+
+
+def test_get_spectrum_capture():
+    """
+    Test that `get_spectrum_capture` builds a `SpectrumCapture` keeping the tags,
+    timestamp, factor and frequency range of the response, and that its tuple form
+    matches what `get_spectrum` returns.
+    """
+    mock_response = {
+        "data": b64encode(compress(np.array([1, 2, 3], dtype=np.int16).tobytes())),
+        "factor": 2.0,
+        "min_freq": 5,
+        "max_freq": 20,
+    }
+
+    kwargs = {
+        "host": "example.com",
+        "id": "test_id",
+        "machine": "M1",
+        "point": "P1",
+        "pmode": "PM1",
+        "time": "2019-04-10T14:48:44",
+        "t8_user": "user",
+        "t8_password": "password",
+    }
+
+    with patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = mock_response
+
+        capture = get_data.get_spectrum_capture(**kwargs)
+        spectrum, fmin, fmax = get_data.get_spectrum(**kwargs)
+
+    assert isinstance(capture, SpectrumCapture)
+    assert capture.tag == "M1:P1:PM1"
+    assert capture.timestamp == 1554907724
+    assert (capture.factor, capture.fmin, capture.fmax) == (2.0, 5, 20)
+    np.testing.assert_array_equal(capture.freqs, [5, 12.5, 20])
+    np.testing.assert_array_equal(capture.data, spectrum)
+    assert (fmin, fmax) == (5, 20)
@@ -0,0 +1,88 @@
+from zlib import compress
+
+import numpy as np
+import pytest
+from scipy.signal import coherence, csd
+
+from t8_client.capture import WaveCapture
+from t8_client.cross_spectrum import (
+    coherence_matrix,
+    common_times,
+    cross_spectral_matrix,
+    get_synchronous_waves,
+)
+from t8_client.sources import ArchiveSource
+from t8_client.store import PayloadStore
+
+CONNECTION = {"host": "example.com", "id": "t8", "t8_user": "u", "t8_password": "p"}
+TAGS = ["LP_Turbine:MAD31CY005:AM1", "LP_Turbine:MAD31CY006:AM1"]
+
+
+def wave(tag, timestamp, samples, sample_rate=2560):
+    machine, point, pmode = tag.split(":")
+    payload = compress(np.asarray(samples, dtype=np.int16).tobytes())
+    return WaveCapture(machine, point, pmode, timestamp, payload, 0.5, sample_rate)
+
+
+def test_get_synchronous_waves(tmp_path):
+    """
+    Test that the waves captured at the same instant at several points are
+    fetched as one array, by default at the latest common instant, and that waves
+    that cannot be compared are rejected.
+    """
+    with PayloadStore(tmp_path) as store:
+        store.put("t8", wave(TAGS[0], 100, [1, 2]))
+        store.put("t8", wave(TAGS[0], 200, [3, 4]))
+        store.put("t8", wave(TAGS[0], 300, [5, 6]))
+        store.put("t8", wave(TAGS[1], 200, [7, 8]))
+        store.put("t8", wave(TAGS[1], 300, [9, 10], sample_rate=5120))
+        params = {**CONNECTION, "source": ArchiveSource(store)}
+
+        times = common_times(TAGS, **params)
+        assert times == ["1970-01-01T00:03:20", "1970-01-01T00:05:00"]
+
+        waveforms, sample_rate = get_synchronous_waves(TAGS, times[0], **params)
+        np.testing.assert_array_equal(waveforms, [[1.5, 2.0], [3.5, 4.0]])
+        assert sample_rate == 2560
+
+        with pytest.raises(ValueError, match="sample rate"):
+            get_synchronous_waves(TAGS, **params)
+        with pytest.raises(ValueError, match="same time"):
+            get_synchronous_waves([*TAGS, "LP_Turbine:Other:AM1"], **params)
+
+
+@pytest.mark.parametrize("nperseg", [256, 255])
+def test_cross_spectral_matrix_matches_pairwise_csd(nperseg):
+    """
+    Test that every element of the spectral matrix and of the coherence matrix
+    equals the pairwise estimate of SciPy.
+    """
+    rng = np.random.default_rng(0)
+    waveforms = rng.standard_normal((4, 3000))
+    waveforms[1] += 0.5 * waveforms[0]
+    waveforms[3] = 0
+
+    matrix, freqs = cross_spectral_matrix(waveforms, 2560, nperseg=nperseg)
+    coherences = coherence_matrix(matrix)
+
+    assert matrix.shape == (len(freqs), 4, 4)
+    np.testing.assert_allclose(matrix, np.conj(matrix.transpose(0, 2, 1)))
+    for i in range(3):
+        for j in range(3):
+            expected_freqs, expected = csd(
+                waveforms[i], waveforms[j], 2560, nperseg=nperseg
+            )
+            np.testing.assert_allclose(freqs, expected_freqs)
+            np.testing.assert_allclose(matrix[:, i, j], expected, atol=1e-12)
+            _, expected = coherence(waveforms[i], waveforms[j], 2560, nperseg=nperseg)
+            np.testing.assert_allclose(coherences[:, i, j], expected, atol=1e-12)
+    np.testing.assert_array_equal(coherences[:, 3], 0)
+
+
+@pytest.mark.parametrize("noverlap", [256, 300])
+def test_cross_spectral_matrix_rejects_full_overlap(noverlap):
+    """
+    Test that segments overlapping by their whole length or more are rejected.
+    """
+    with pytest.raises(ValueError, match="noverlap"):
+        cross_spectral_matrix(np.zeros((2, 1000)), 2560, nperseg=256, noverlap=noverlap)
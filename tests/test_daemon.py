@@ -0,0 +1,193 @@
+import io
+import json
+import os
+import threading
+import zlib
+
+import numpy as np
+import pytest
+
+from t8_client import cli, daemon
+from t8_client.capture import WaveCapture
+from t8_client.store import PayloadStore
+
+TIMES = ["1970-01-01T00:01:40", "1970-01-01T00:03:20"]
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    """
+    Runs a daemon on a socket of the test in a background thread.
+    """
+    server = daemon.Daemon(str(tmp_path / "t8.sock"))
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.close()
+
+
+def record(root):
+    with PayloadStore(root) as store:
+        for timestamp in (100, 200):
+            payload = zlib.compress(np.array([1, -1], dtype=np.int16).tobytes())
+            store.put("t8", WaveCapture("M1", "P1", "PM1", timestamp, payload, 1, 10))
+
+
+def test_forward_runs_commands_in_daemon(running_daemon, tmp_path, monkeypatch, capsys):
+    """
+    Test that commands forwarded to the daemon run with the environment and
+    working directory of the client, print their output in the client and return
+    their exit code, and that the data source is kept open between commands while
+    still finding the captures recorded meanwhile.
+    """
+    record(tmp_path / "store")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("HOST", "example.com")
+    monkeypatch.setenv("ID", "t8")
+    monkeypatch.setenv("T8_SOURCE", "archive")
+    monkeypatch.setenv("T8_STORE", "store")
+    monkeypatch.setenv("UNRELATED_TOKEN", "secret")
+    args = ["list-waves", "-p", "M1:P1:PM1"]
+    requests = []
+    run = running_daemon._run
+
+    def record_request(request, send):
+        requests.append(request)
+        return run(request, send)
+
+    monkeypatch.setattr(running_daemon, "_run", record_request)
+
+    assert daemon.forward(args, running_daemon.path) == 0
+    assert capsys.readouterr().out.split() == TIMES
+    assert requests[0]["env"] == {
+        "HOST": "example.com",
+        "ID": "t8",
+        "T8_SOURCE": "archive",
+        "T8_STORE": "store",
+    }
+    assert daemon.forward(args, running_daemon.path) == 0
+    assert capsys.readouterr().out.split() == TIMES
+    assert len(running_daemon._sources) == 1
+
+    # Captures recorded by another process are seen by the open source
+    with PayloadStore(tmp_path / "store") as store:
+        payload = zlib.compress(np.array([2], dtype=np.int16).tobytes())
+        store.put("t8", WaveCapture("M1", "P1", "PM1", 300, payload, 1, 10))
+    assert daemon.forward(args, running_daemon.path) == 0
+    assert capsys.readouterr().out.split() == [*TIMES, "1970-01-01T00:05:00"]
+    assert len(running_daemon._sources) == 1
+
+    assert daemon.forward(["stats", "-p", "M1:P1:PM1"], running_daemon.path) == 0
+    assert capsys.readouterr().out.splitlines()[1] == f"{TIMES[0]},1,1,2,1,1"
+
+    monkeypatch.delenv("T8_STORE")
+    assert daemon.forward(args, running_daemon.path) == 2
+    assert "needs an archive" in capsys.readouterr().err
+
+
+def test_daemon_does_not_change_process_state(running_daemon, tmp_path, monkeypatch):
+    """
+    Test that a command runs with the environment variables and working directory
+    of its request, resolving relative paths against that directory, without
+    changing those of the daemon process, even while the command runs.
+    """
+    record(tmp_path / "store")
+    cwd = os.getcwd()
+    states = []
+    save_array_to_csv = cli.save_array_to_csv
+
+    def save(*args):
+        states.append((os.getcwd(), os.getenv("T8_STORE")))
+        save_array_to_csv(*args)
+
+    monkeypatch.setattr(cli, "save_array_to_csv", save)
+    request = {
+        "args": ["get-wave", "-p", "M1:P1:PM1", "-t", TIMES[0]],
+        "env": {"HOST": "example.com", "ID": "t8", "T8_STORE": "store"},
+        "cwd": str(tmp_path),
+    }
+    wfile = io.BytesIO()
+
+    running_daemon.handle(io.BytesIO(json.dumps(request).encode() + b"\n"), wfile)
+
+    messages = [json.loads(line) for line in wfile.getvalue().splitlines()]
+    assert messages[-1] == {"exit": 0}, messages
+    assert (tmp_path / "output" / f"wave_M1_P1_PM1_{TIMES[0]}.csv").exists()
+    assert states == [(cwd, None)]
+    assert os.getcwd() == cwd
+
+
+def test_forward_checks_the_daemon_user(running_daemon, monkeypatch, capsys):
+    """
+    Test that the client sends nothing to a daemon run by another user.
+    """
+    monkeypatch.setattr(daemon, "_peer_uid", lambda client, path: os.getuid() + 1)
+    requests = []
+    monkeypatch.setattr(
+        running_daemon, "_run", lambda request, send: requests.append(request)
+    )
+
+    assert daemon.forward(["list-waves"], running_daemon.path) is None
+    assert "run by another user" in capsys.readouterr().err
+    assert requests == []
+
+
+def test_private_directory(tmp_path, monkeypatch):
+    """
+    Test that the default socket is created in a directory only accessible to the
+    current user, and that a directory accessible to others is refused.
+    """
+    monkeypatch.delenv("T8_DAEMON_SOCKET", raising=False)
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    server = daemon.Daemon()
+    try:
+        directory = os.path.dirname(server.path)
+        assert directory == str(tmp_path / f"t8-client-{os.getuid()}")
+        assert os.stat(directory).st_mode & 0o777 == 0o700
+        assert os.path.exists(server.path)
+    finally:
+        server.close()
+
+    os.chmod(directory, 0o755)
+    with pytest.raises(RuntimeError, match="not a private directory"):
+        daemon.Daemon()
+
+
+def test_main_falls_back_to_in_process(tmp_path, monkeypatch, capsys):
+    """
+    Test that without a daemon `forward` reports it and `main` runs the command
+    in-process.
+    """
+    record(tmp_path)
+    path = str(tmp_path / "missing.sock")
+    monkeypatch.setenv("T8_DAEMON_SOCKET", path)
+    monkeypatch.setenv("ID", "t8")
+    monkeypatch.setenv("T8_STORE", str(tmp_path))
+
+    assert daemon.forward(["list-waves"], path) is None
+    assert not daemon.is_running(path)
+
+    with pytest.raises(SystemExit) as exit_info:
+        daemon.main(["--offline", "list-waves", "-p", "M1:P1:PM1"])
+    assert exit_info.value.code == 0
+    assert capsys.readouterr().out.split() == TIMES
+
+
+@pytest.mark.parametrize(
+    ("args", "command"),
+    [
+        (["list-waves", "-p", "watch"], "list-waves"),
+        (["--store", "watch", "list-waves"], "list-waves"),
+        (["--source", "archive", "--offline", "watch", "-p", "M1:P1:PM1"], "watch"),
+        (["--store=watch", "plot-wave"], "plot-wave"),
+        (["--help"], None),
+    ],
+)
+def test_command_name(args, command):
+    """
+    Test that the command of a command line is found after the group options and
+    their values, and that arguments of the command are never taken for it.
+    """
+    assert daemon.command_name(args) == command
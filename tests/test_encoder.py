@@ -0,0 +1,88 @@
+from base64 import b64decode
+from zlib import decompress
+
+import numpy as np
+import pytest
+
+from t8_client.util.decoder import zint_to_float
+from t8_client.util.encoder import (
+    choose_factor,
+    decode_series,
+    encode_series,
+    float_to_zint,
+)
+
+
+def test_float_to_zint_round_trip():
+    """
+    Test that `float_to_zint` is the inverse of `zint_to_float` within half the
+    factor, that the automatic factor uses the whole int16 range, and that a given
+    factor is used as is.
+    """
+    values = np.array([0.0, 1.25, -3.5, 2.0, 0.001])
+
+    raw, factor = float_to_zint(values)
+    assert factor == choose_factor(values) == 3.5 / 32767
+    samples = np.frombuffer(decompress(b64decode(raw)), dtype=np.int16)
+    assert samples[2] == -32767
+    assert np.max(np.abs(zint_to_float(raw) * factor - values)) <= factor / 2
+
+    raw, factor = float_to_zint(values, factor=0.25)
+    assert factor == 0.25
+    np.testing.assert_array_equal(zint_to_float(raw), [0, 5, -14, 8, 0])
+
+    assert float_to_zint(np.zeros(3))[1] == 1.0
+    with pytest.raises(ValueError):
+        float_to_zint(values, factor=1e-6)
+    with pytest.raises(ValueError):
+        float_to_zint([1.0, np.nan])
+
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+@pytest.mark.parametrize("delta", [False, True])
+def test_series_round_trip(codec, delta):
+    """
+    Test that a series decodes to its shape within the documented error bound with
+    every codec, with and without delta encoding, including deltas that wrap
+    around the int16 range.
+    """
+    rng = np.random.default_rng(0)
+    series = rng.standard_normal((20, 300))
+    series[1::2] *= -1
+    series[0, 0] = 10.0
+    series[1, 0] = -10.0
+
+    container = encode_series(series, delta=delta, codec=codec, level=1)
+    decoded = decode_series(container, dtype=np.float64)
+
+    assert decoded.shape == series.shape
+    assert np.max(np.abs(decoded - series)) <= choose_factor(series) / 2
+    assert decode_series(container).dtype == np.float32
+
+
+def test_series_container_is_self_describing():
+    """
+    Test that 1-D series round-trip, that delta encoding makes slowly changing
+    series smaller, and that invalid, truncated or inconsistent containers and
+    invalid codecs are rejected.
+    """
+    decoded = decode_series(encode_series(np.array([1.0, 2.0]), factor=0.5))
+    np.testing.assert_array_equal(decoded, [1.0, 2.0])
+
+    base = np.abs(np.random.default_rng(1).standard_normal(1000))
+    series = base + np.linspace(0, 0.01, 50)[:, None]
+    assert len(encode_series(series, delta=True)) < len(encode_series(series)) / 2
+
+    with pytest.raises(ValueError):
+        decode_series(b"not a container at all")
+    for codec in ["zlib", "lzma"]:
+        container = encode_series(series, codec=codec)
+        for truncated in [container[:19], container[:40], container[:-1]]:
+            with pytest.raises(ValueError, match="Truncated|Corrupt"):
+                decode_series(truncated)
+    container = encode_series(series)
+    other_shape = encode_series(series[:, :999])
+    with pytest.raises(ValueError, match="expected shape"):
+        decode_series(container[:32] + other_shape[32:])
+    with pytest.raises(ValueError):
+        encode_series(series, codec="bz2")
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client import get_data
+from t8_client.exceptions import T8FatalError
+from t8_client.fleet import Fleet, load_profiles
+from t8_client.util.timestamp import timestamp_to_iso_string
+
+PROFILES = """
+[defaults]
+t8_user = "user"
+t8_password = "password"
+tags = ["M1:P1:PM1", "M1:P2:PM1"]
+
+[devices.north]
+host = "north.example.com"
+id = "north"
+max_connections = 2
+
+[devices.south]
+host = "south.example.com"
+id = "south"
+tags = ["M2:P1:PM1"]
+"""
+
+
+def test_load_profiles(tmp_path):
+    """
+    Test that `load_profiles` applies the defaults to every device and that device
+    values override them.
+    """
+    path = tmp_path / "profiles.toml"
+    path.write_text(PROFILES)
+
+    profiles = load_profiles(path)
+
+    assert profiles["north"]["host"] == "north.example.com"
+    assert profiles["north"]["t8_user"] == "user"
+    assert profiles["north"]["max_connections"] == 2
+    assert profiles["north"]["tags"] == ["M1:P1:PM1", "M1:P2:PM1"]
+    assert profiles["south"]["max_connections"] == 4
+    assert profiles["south"]["tags"] == ["M2:P1:PM1"]
+
+
+@pytest.mark.parametrize(
+    "device",
+    [
+        'id = "a"',
+        'host = "a"\nid = "a"\nport = 80',
+        'host = "a"\nid = "a"\ntags = ["M1:P1"]',
+    ],
+)
+def test_load_profiles_invalid(tmp_path, device):
+    """
+    Test that profiles with a missing host, unknown keys or malformed tags are
+    rejected.
+    """
+    path = tmp_path / "profiles.toml"
+    path.write_text(f"[devices.a]\n{device}\n")
+
+    with pytest.raises(ValueError):
+        load_profiles(path)
+
+
+def test_fleet_run_fans_out_per_device():
+    """
+    Test that `Fleet.run` calls the function for every tag of every device with the
+    connection parameters of the device, never runs more than `max_connections`
+    calls of a device at once, and yields the errors of a failing device without
+    interrupting the others.
+    """
+    profiles = {
+        "north": {
+            "host": "north",
+            "id": "n",
+            "t8_user": "user",
+            "t8_password": "password",
+            "max_connections": 2,
+            "tags": [f"M1:P{i}:PM1" for i in range(6)],
+        },
+        "south": {
+            "host": "south",
+            "id": "s",
+            "t8_user": "user",
+            "t8_password": "password",
+            "max_connections": 1,
+            "tags": ["M2:P1:PM1", "M2:P2:PM1"],
+        },
+    }
+    lock = threading.Lock()
+    active = {"north": 0, "south": 0}
+    peak = {"north": 0, "south": 0}
+
+    def function(**params):
+        host = params["host"]
+        with lock:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+        time.sleep(0.01)
+        with lock:
+            active[host] -= 1
+        if host == "south" and params["point"] == "P2":
+            raise T8FatalError("Failed to get waveform: not found", status_code=404)
+        assert params["session"] is not None
+        return params["id"], params["point"]
+
+    with Fleet(profiles) as fleet:
+        results = list(fleet.run(function))
+
+    assert len(results) == 8
+    assert peak == {"north": 2, "south": 1}
+    successes = {(d, t): r for d, t, r in results if not isinstance(r, Exception)}
+    assert successes[("north", "M1:P3:PM1")] == ("n", "P3")
+    assert successes[("south", "M2:P1:PM1")] == ("s", "P1")
+    errors = [(d, t) for d, t, r in results if isinstance(r, T8FatalError)]
+    assert errors == [("south", "M2:P2:PM1")]
+
+
+def test_fleet_run_tag_and_device_selection():
+    """
+    Test that `Fleet.run` can override the profile tags and restrict the devices.
+    """
+    profiles = {
+        name: {"host": name, "id": name, "t8_user": "u", "t8_password": "p"}
+        for name in ("a", "b", "c")
+    }
+
+    with Fleet(profiles) as fleet:
+        results = list(
+            fleet.run(
+                lambda **params: params["machine"],
+                tags=["M9:P1:PM1"],
+                devices=["a", "c"],
+            )
+        )
+
+    assert sorted(results) == [("a", "M9:P1:PM1", "M9"), ("c", "M9:P1:PM1", "M9")]
+
+
+def test_fleet_respects_max_connections_of_a_device():
+    """
+    Test that a device with `max_connections = 1` never gets concurrent requests,
+    even from a function that fetches several captures through the scheduler of
+    the device with more threads, against a stand-in device that serves a single
+    request at a time and rejects the others with 503.
+    """
+    device = StandInDevice(n_captures=6, n_samples=1024)
+    times = [timestamp_to_iso_string(t) for t in device.timestamps]
+
+    with StandInServer({"t8": device}, latency=0.01, capacity=1) as server:
+        connection = server.params()
+        profiles = {
+            "t8": {
+                key: connection[key]
+                for key in ("scheme", "host", "id", "t8_user", "t8_password")
+            }
+            | {"max_connections": 1, "tags": ["M1:P1:PM1", "M1:P2:PM1"]}
+        }
+
+        def fetch(**params):
+            return params["scheduler"].map(
+                lambda time: get_data.get_wave(**params, time=time),
+                times,
+                max_workers=4,
+            )
+
+        with Fleet(profiles) as fleet:
+            results = list(fleet.run(fetch))
+
+    assert [len(waves) for _, _, waves in results] == [6, 6]
+    assert server.rejected == 0
@@ -393,3 +393,119 @@ def test_get_spectrum_failure():
         with pytest.raises(Exception) as excinfo:
             get_data.get_spectrum(**kwargs)
         assert "Failed to get spectra: Not Found" in str(excinfo.value)
+
+
+def test_get_wave_list_revalidates_with_etag():
+    """
+    Test that repeated listings are revalidated with conditional headers.
+
+    The first request returns a listing with an ETag and a Last-Modified header. The
+    second request must send them back as `If-None-Match` and `If-Modified-Since`, and
+    when the server answers 304 Not Modified (without body) the previously returned
+    listing must be reused.
+
+    Asserts:
+        - The validators of the first response are sent in the second request.
+        - Both listings are identical even though the second response has no body.
+    """
+    get_data.clear_conditional_cache()
+    mock_response = {
+        "_items": [
+            {
+                "_links": {
+                    "self": "http://lzfs45.mirror.twave.io/lzfs45/rest/waves/LP_Turbine/MAD31CY005/AM1/1554907724"
+                }
+            },
+        ],
+    }
+
+    kwargs = {
+        "host": "example.com",
+        "id": "test_id",
+        "machine": "test_machine",
+        "point": "test_point",
+        "pmode": "test_pmode",
+        "t8_user": "user",
+        "t8_password": "password",
+    }
+
+    with patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {
+            "ETag": '"abc"',
+            "Last-Modified": "Wed, 10 Apr 2019 14:48:44 GMT",
+        }
+        mock_get.return_value.json.return_value = mock_response
+        first = list(get_data.get_wave_list(**kwargs))
+
+        mock_get.return_value.status_code = 304
+        mock_get.return_value.json.side_effect = ValueError("No body")
+        second = list(get_data.get_wave_list(**kwargs))
+
+        headers = mock_get.call_args.kwargs["headers"]
+        assert headers["If-None-Match"] == '"abc"'
+        assert headers["If-Modified-Since"] == "Wed, 10 Apr 2019 14:48:44 GMT"
+        assert first == second == ["2019-04-10T14:48:44"]
+
+    get_data.clear_conditional_cache()
+
+
+def test_conditional_cache_is_bounded(monkeypatch):
+    """
+    Test that only the validators of the most recently used listing URLs are kept.
+    """
+    get_data.clear_conditional_cache()
+    monkeypatch.setattr(get_data, "CONDITIONAL_CACHE_SIZE", 2)
+    kwargs = {
+        "host": "example.com",
+        "id": "test_id",
+        "machine": "M1",
+        "pmode": "PM1",
+        "t8_user": "user",
+        "t8_password": "password",
+    }
+
+    with patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {"ETag": '"abc"'}
+        mock_get.return_value.json.return_value = {"_items": []}
+        for point in ["P1", "P2", "P1", "P3"]:
+            list(get_data.get_wave_list(**kwargs, point=point))
+
+    assert [url.split("/")[-2] for url, _ in get_data._conditional_cache] == [
+        "P1",
+        "P3",
+    ]
+    get_data.clear_conditional_cache()
+
+
+def test_conditional_cache_is_per_credentials():
+    """
+    Test that the validators of a listing fetched with some credentials are not
+    sent with other credentials, so a 304 never returns the listing of another
+    user.
+    """
+    get_data.clear_conditional_cache()
+    kwargs = {
+        "host": "example.com",
+        "id": "test_id",
+        "machine": "M1",
+        "point": "P1",
+        "pmode": "PM1",
+        "t8_user": "user",
+        "t8_password": "password",
+    }
+
+    with patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.headers = {"ETag": '"abc"'}
+        mock_get.return_value.json.return_value = {"_items": []}
+        list(get_data.get_wave_list(**kwargs))
+        list(get_data.get_wave_list(**{**kwargs, "t8_password": "other"}))
+        assert mock_get.call_args.kwargs["headers"] == {}
+
+        list(get_data.get_wave_list(**kwargs))
+        assert mock_get.call_args.kwargs["headers"] == {"If-None-Match": '"abc"'}
+
+    assert len(get_data._conditional_cache) == 2
+    get_data.clear_conditional_cache()
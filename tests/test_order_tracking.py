@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+from t8_client.order_tracking import (
+    angle_domain_resample,
+    calculate_order_spectrum,
+    speed_from_tachometer,
+)
+from t8_client.spectrum import calculate_spectrum
+from t8_client.waveform import preprocess_waveform
+
+SAMPLE_RATE = 5120
+N_SAMPLES = 5120 * 4
+
+
+def run_up(start_rpm, end_rpm, order):
+    """
+    Builds a waveform with a single order component during a linear run-up, and
+    its speed profile in RPM.
+    """
+    t = np.arange(N_SAMPLES) / SAMPLE_RATE
+    speed = np.linspace(start_rpm, end_rpm, N_SAMPLES)
+    revolutions = np.concatenate(
+        ([0], np.cumsum((speed[1:] + speed[:-1]) / 2 / 60 / SAMPLE_RATE))
+    )
+    return np.sin(2 * np.pi * order * revolutions), speed, t
+
+
+def test_order_spectrum_of_run_up():
+    """
+    Test that the order spectrum of a run-up keeps the energy of a 3x component
+    in a single order, even though its frequency sweeps during the capture.
+
+    Asserts:
+        - The peak of the order spectrum is at order 3.
+        - The peak is several times higher than the smeared peak of the fixed-rate
+          spectrum of the same waveform.
+    """
+    waveform, speed, _ = run_up(1200, 3000, order=3)
+
+    spectrum, orders = calculate_order_spectrum(
+        waveform, SAMPLE_RATE, speed, max_order=10, samples_per_rev=64
+    )
+
+    assert orders[np.argmax(spectrum)] == pytest.approx(3, abs=0.05)
+    fixed_rate_spectrum, _ = calculate_spectrum(
+        preprocess_waveform(waveform), SAMPLE_RATE, 0, 500
+    )
+    assert spectrum.max() > 5 * fixed_rate_spectrum.max()
+
+
+def test_angle_domain_resample_batch_matches_single():
+    """
+    Test that resampling a batch of waveforms with one speed profile per row gives
+    the same result as resampling each waveform on its own, and that a constant
+    speed matches a plain uniform resampling.
+    """
+    first, first_speed, _ = run_up(1200, 3000, order=2)
+    second, second_speed, _ = run_up(1500, 2500, order=5)
+
+    batch = angle_domain_resample(
+        np.stack([first, second]), SAMPLE_RATE, np.stack([first_speed, second_speed])
+    )
+    single = angle_domain_resample(second, SAMPLE_RATE, second_speed)
+    np.testing.assert_allclose(batch[1], single[: batch.shape[1]], atol=1e-9)
+
+    # At 60 RPM and 64 samples/rev the output rate is 64 Hz
+    t = np.arange(N_SAMPLES) / SAMPLE_RATE
+    wave = np.sin(2 * np.pi * 0.25 * t)
+    resampled = angle_domain_resample(wave, SAMPLE_RATE, 60.0, samples_per_rev=64)
+    expected = np.sin(2 * np.pi * 0.25 * np.arange(len(resampled)) / 64)
+    np.testing.assert_allclose(resampled, expected, atol=1e-6)
+
+
+def test_angle_domain_resample_rejects_aliasing_orders():
+    """
+    Test that an order above the Nyquist order of the resampling is filtered out
+    instead of folding back: at 3000 RPM and 64 samples/rev, a 3000 Hz tone is order
+    60 and would otherwise alias to order 4.
+    """
+    sample_rate = 2 * SAMPLE_RATE
+    t = np.arange(N_SAMPLES) / sample_rate
+    tone = np.sin(2 * np.pi * 3000 * t) + np.sin(2 * np.pi * 500 * t)
+
+    spectrum, orders = calculate_order_spectrum(
+        tone, sample_rate, 3000.0, max_order=32, samples_per_rev=64
+    )
+
+    # 500 Hz is order 10 at 3000 RPM
+    assert spectrum[np.argmin(np.abs(orders - 10))] > 0.5
+    assert spectrum[np.argmin(np.abs(orders - 4))] < 1e-3
+
+
+@pytest.mark.parametrize(
+    ("waveforms", "speed"),
+    [
+        (np.zeros(10000), np.full(100, 3000.0)),
+        (np.zeros((2, 10000)), [3000.0, 1500.0]),
+        (np.zeros(10000), np.full((2, 10000), 3000.0)),
+    ],
+)
+def test_angle_domain_resample_rejects_speed_shape(waveforms, speed):
+    """
+    Test that a speed that is neither a scalar, a profile of the waveform length
+    nor one profile per waveform is rejected.
+    """
+    with pytest.raises(ValueError, match="speed must be a scalar"):
+        angle_domain_resample(waveforms, SAMPLE_RATE, speed)
+
+
+def test_speed_from_tachometer():
+    """
+    Test that a constant pulse train is converted into a constant speed, and that
+    fewer than two pulses are rejected.
+    """
+    speed = speed_from_tachometer(np.arange(0, 4, 0.5), 100, 25, pulses_per_rev=2)
+    np.testing.assert_allclose(speed, 60.0)
+
+    with pytest.raises(ValueError):
+        speed_from_tachometer([0.1], 100, 25)
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from t8_client.util.parquet import ParquetCaptureWriter  # noqa: E402
+
+
+def test_parquet_capture_writer(tmp_path):
+    """
+    Test that `ParquetCaptureWriter` partitions captures by machine, point,
+    processing mode and date, writes them in row groups and keeps their metadata.
+
+    Five waves of one day and one wave of the next day are written with a row group
+    size of two.
+
+    Asserts:
+        - One file is created per date partition.
+        - The first partition has three row groups (2 + 2 + 1 captures).
+        - Samples and metadata are read back unchanged.
+    """
+    day = 1554907724
+    waves = [np.arange(8, dtype=np.float32) * i for i in range(6)]
+    timestamps = [day + i for i in range(5)] + [day + 86400]
+
+    with ParquetCaptureWriter(tmp_path, row_group_size=2) as writer:
+        for timestamp, wave in zip(timestamps, waves, strict=True):
+            writer.write("M1", "P1", "PM1", timestamp, wave, 0.5, sample_rate=2560)
+
+    partition = tmp_path / "machine=M1" / "point=P1" / "pmode=PM1"
+    first = partition / "date=2019-04-10" / "part-0.parquet"
+    second = partition / "date=2019-04-11" / "part-0.parquet"
+    assert first.exists() and second.exists()
+    assert pq.ParquetFile(first).metadata.num_row_groups == 3
+
+    table = pq.read_table(first)
+    assert table.column("factor").to_pylist() == [0.5] * 5
+    assert table.column("sample_rate").to_pylist() == [2560] * 5
+    assert table.column("fmax").null_count == 5
+    np.testing.assert_array_equal(table.column("samples")[3].values, waves[3])
+
+
+def test_parquet_capture_writer_float16(tmp_path):
+    """
+    Test that samples can be stored as float16 and that invalid storage types and
+    samples out of the float16 range are rejected.
+
+    Asserts:
+        - The samples column holds half precision floats.
+        - The values are within float16 precision of the original ones.
+        - An unsupported dtype raises a ValueError.
+        - Samples above 65504 raise a ValueError instead of becoming inf.
+    """
+    spectrum = np.linspace(0, 1, 100)
+    with ParquetCaptureWriter(tmp_path, dtype="float16") as writer:
+        writer.write("M1", "P1", "PM1", 0, spectrum, 1.0, fmin=0, fmax=1000)
+
+    table = pq.read_table(next(tmp_path.rglob("*.parquet")))
+    values = table.column("samples")[0].values.to_numpy()
+    assert values.dtype == np.float16
+    np.testing.assert_allclose(values, spectrum, atol=1e-3)
+
+    with pytest.raises(ValueError):
+        ParquetCaptureWriter(tmp_path, dtype="int8")
+    with (
+        ParquetCaptureWriter(tmp_path, dtype="float16") as writer,
+        pytest.raises(ValueError, match="65504"),
+    ):
+        writer.write("M1", "P1", "PM1", 0, [1.0, -70000.0], 1.0, fmin=0, fmax=1)
@@ -0,0 +1,191 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from t8_client import get_data
+from t8_client.exceptions import (
+    T8CircuitOpenError,
+    T8FatalError,
+    T8RetryableError,
+)
+from t8_client.scheduler import HostLimiter, RequestScheduler
+
+KWARGS = {
+    "host": "example.com",
+    "id": "test_id",
+    "machine": "M1",
+    "point": "P1",
+    "pmode": "PM1",
+    "time": "2019-04-10T14:48:44",
+    "t8_user": "user",
+    "t8_password": "password",
+}
+
+
+def test_host_limiter_aimd():
+    """
+    Test the AIMD policy of `HostLimiter`: the limit grows additively with fast
+    successful requests, shrinks slightly with slow ones and halves on failures.
+    """
+    limiter = HostLimiter(initial_limit=2, max_limit=4)
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(True, latency=0.1)
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5 + 1 / 2.9)
+
+    limiter.acquire()
+    limiter.release(True, latency=1.0)
+    assert limiter.limit == pytest.approx((2 + 1 / 2 + 1 / 2.5 + 1 / 2.9) * 0.9)
+
+    before = limiter.limit
+    limiter.acquire()
+    limiter.release(False)
+    assert limiter.limit == pytest.approx(before / 2)
+    assert limiter.in_flight == 0
+
+
+def test_host_limiter_latency_per_kind():
+    """
+    Test that the initial limit is clamped to the maximum, and that a slow request
+    is only compared with the fastest request of its own kind, so that large
+    captures are not taken for overload after fast 304 listings.
+    """
+    limiter = HostLimiter(initial_limit=4, max_limit=1)
+    assert limiter.limit == 1
+
+    limiter = HostLimiter(initial_limit=2, max_limit=4)
+    limiter.acquire()
+    limiter.release(True, latency=0.01, kind="list")
+    limiter.acquire()
+    limiter.release(True, latency=1.0, kind="capture")
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+
+    limiter.acquire()
+    limiter.release(True, latency=4.0, kind="capture")
+    assert limiter.limit == pytest.approx((2 + 1 / 2 + 1 / 2.5) * 0.9)
+
+
+def test_host_limiter_ceiling_probing():
+    """
+    Test that after a failure the limit recovers up to the last concurrency that
+    did not fail, and only probes above it after `probe_after` successes.
+    """
+    limiter = HostLimiter(initial_limit=5.5, probe_after=3)
+    limiter.acquire()
+    limiter.release(False, latency=0.1)
+    assert limiter.ceiling == 4
+    assert limiter.limit == pytest.approx(2.75)
+
+    for _ in range(5):
+        limiter.acquire()
+        limiter.release(True, latency=0.1)
+    assert limiter.limit == 4
+    assert limiter.ceiling == 4
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(True, latency=0.1)
+    assert limiter.ceiling == 5
+
+
+def test_host_limiter_circuit_breaker():
+    """
+    Test that the circuit opens after repeated failures, rejects requests while
+    open, lets a single trial request through after the cooldown and closes again
+    when the trial succeeds.
+    """
+    now = [0.0]
+    limiter = HostLimiter(failure_threshold=3, cooldown=10, clock=lambda: now[0])
+
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(False)
+    assert limiter.state == "open"
+    with pytest.raises(T8CircuitOpenError):
+        limiter.acquire()
+
+    now[0] = 11
+    assert limiter.state == "half-open"
+    assert limiter.acquire() is True
+    with pytest.raises(T8CircuitOpenError):
+        limiter.acquire()
+    limiter.release(True, latency=0.1, trial=True)
+    assert limiter.state == "closed"
+    assert limiter.acquire() is False
+
+
+def test_host_limiter_single_trial():
+    """
+    Test that a request sent before the circuit opened does not let a second
+    trial request through when it completes during the trial.
+    """
+    now = [0.0]
+    limiter = HostLimiter(
+        min_limit=2, failure_threshold=2, cooldown=10, clock=lambda: now[0]
+    )
+
+    limiter.acquire()
+    for _ in range(2):
+        limiter.acquire()
+        limiter.release(False)
+    assert limiter.state == "open"
+
+    now[0] = 11
+    trial = limiter.acquire()
+    limiter.release(None)
+    with pytest.raises(T8CircuitOpenError):
+        limiter.acquire()
+    limiter.release(False, trial=trial)
+    assert limiter.state == "open"
+
+
+def test_get_wave_retries_with_retry_after():
+    """
+    Test that a 503 response with a `Retry-After` header is retried after the
+    requested delay and that the retry succeeds.
+    """
+    busy = MagicMock(status_code=503, text="Busy", headers={"Retry-After": "2"})
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"data": "", "factor": 1.0, "sample_rate": 2560}
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    scheduler = RequestScheduler(clock=lambda: now[0], sleep=sleep)
+
+    with patch("requests.get") as mock_get:
+        mock_get.side_effect = [busy, ok]
+        waveform, sample_rate = get_data.get_wave(**KWARGS, scheduler=scheduler)
+
+    assert sample_rate == 2560
+    assert len(waveform) == 0
+    assert sleeps == [2.0]
+
+
+def test_get_wave_typed_errors():
+    """
+    Test that errors retrying cannot fix are raised at once as `T8FatalError`, and
+    that transient errors are raised as `T8RetryableError` once the retries are
+    exhausted.
+    """
+    scheduler = RequestScheduler(max_retries=2, sleep=MagicMock())
+
+    with patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 404
+        mock_get.return_value.text = "Not Found"
+        with pytest.raises(T8FatalError) as excinfo:
+            get_data.get_wave(**KWARGS, scheduler=scheduler)
+        assert excinfo.value.status_code == 404
+        assert mock_get.call_count == 1
+
+    with patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 502
+        mock_get.return_value.text = "Bad Gateway"
+        mock_get.return_value.headers = {}
+        with pytest.raises(T8RetryableError):
+            get_data.get_wave(**KWARGS, scheduler=scheduler)
+        assert mock_get.call_count == 3
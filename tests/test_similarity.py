@@ -0,0 +1,149 @@
+from unittest import mock
+
+import numpy as np
+from click.testing import CliRunner
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from t8_client import get_data
+from t8_client.cli import cli
+from t8_client.similarity import SpectrumIndex, spectrum_features
+from t8_client.sources import Recorder
+from t8_client.util.timestamp import timestamp_to_iso_string
+
+FREQS = np.linspace(0, 1000, 512)
+
+
+def make_spectra(rng, n_shapes=20, per_shape=50):
+    """
+    Builds groups of noisy spectra around a few random spectral shapes.
+    """
+    shapes = rng.random((n_shapes, len(FREQS))) ** 4
+    labels = np.repeat(np.arange(n_shapes), per_shape)
+    noise = 1 + 0.1 * rng.standard_normal((len(labels), len(FREQS)))
+    return np.abs(shapes[labels] * noise), labels, shapes
+
+
+def test_spectrum_features_ignore_scale_and_resolution():
+    """
+    Test that the features of a spectrum do not change when it is scaled or
+    sampled on a finer frequency grid.
+    """
+    edges = np.geomspace(10, 1000, 33)
+    spectrum = 1 / (1 + FREQS / 100)
+    fine_freqs = np.linspace(0, 1000, 4096)
+    fine_spectrum = 1 / (1 + fine_freqs / 100) / np.sqrt(8)
+
+    features = spectrum_features(spectrum, FREQS, edges)
+    np.testing.assert_allclose(np.linalg.norm(features), 1, rtol=1e-6)
+    np.testing.assert_allclose(
+        spectrum_features(5 * spectrum, FREQS, edges), features, atol=1e-6
+    )
+    np.testing.assert_allclose(
+        spectrum_features(fine_spectrum, fine_freqs, edges), features, atol=0.05
+    )
+
+
+def test_spectrum_index_query(tmp_path):
+    """
+    Test that exact and approximate queries return spectra of the same shape as the
+    query, that insertion is incremental and that the index survives a round trip
+    to disk.
+    """
+    rng = np.random.default_rng(0)
+    spectra, labels, shapes = make_spectra(rng)
+
+    index = SpectrumIndex(2, 1000, n_bands=32)
+    index.add("M1:P1:PM1", np.arange(500), spectra[:500], FREQS)
+    index.add("M1:P1:PM1", np.arange(500, 1000), spectra[500:], FREQS)
+    assert len(index) == 1000
+    assert ("M1:P1:PM1", 999) in index
+
+    query = shapes[7] * (1 + 0.1 * rng.standard_normal(len(FREQS)))
+    exact = index.query(query, FREQS, k=5)
+    approximate = index.query(query, FREQS, k=5, approximate=True)
+    assert all(labels[timestamp] == 7 for _, timestamp, _ in exact)
+    assert all(labels[timestamp] == 7 for _, timestamp, _ in approximate)
+    assert [r[2] for r in exact] == sorted(r[2] for r in exact)
+
+    index.save(index_path := tmp_path / "index.npz")
+    loaded = SpectrumIndex.load(index_path)
+    assert loaded.query(query, FREQS, k=5) == exact
+    assert loaded.query(query, FREQS, k=5, approximate=True) == approximate
+
+
+def test_spectrum_index_center_is_fitted_on_insertion():
+    """
+    Test that querying an empty index neither fails nor fixes the center of the
+    hyperplanes, which is fitted on the first inserted spectra, and that the
+    timestamps survive the growth of the storage.
+    """
+    rng = np.random.default_rng(0)
+    spectra, _, shapes = make_spectra(rng, per_shape=100)
+
+    index = SpectrumIndex(2, 1000, n_bands=32)
+    assert index.query(shapes[0], FREQS, k=5, approximate=True) == []
+    assert index._center is None
+
+    index.add("M1:P1:PM1", np.arange(1500), spectra[:1500], FREQS)
+    np.testing.assert_allclose(index._center, index.features.mean(axis=0), atol=1e-6)
+    index.add("M1:P1:PM2", 1500, spectra[1500], FREQS)
+    np.testing.assert_array_equal(index.timestamps, np.arange(1501))
+
+
+def test_spectrum_index_membership(tmp_path):
+    """
+    Test that membership is checked per tag and timestamp, also for spectra
+    inserted out of chronological order and after a round trip to disk.
+    """
+    rng = np.random.default_rng(0)
+    spectra, _, _ = make_spectra(rng, n_shapes=2, per_shape=5)
+
+    index = SpectrumIndex(2, 1000, n_bands=32)
+    index.add("M1:P1:PM1", [10, 30, 50], spectra[:3], FREQS)
+    index.add("M1:P1:PM2", 20, spectra[3], FREQS)
+    index.add("M1:P1:PM1", [40, 20], spectra[4:6], FREQS)
+    assert index.tags == ["M1:P1:PM1"] * 3 + ["M1:P1:PM2"] + ["M1:P1:PM1"] * 2
+
+    index.save(index_path := tmp_path / "index.npz")
+    for loaded in [index, SpectrumIndex.load(index_path)]:
+        for timestamp in [10, 20, 30, 40, 50]:
+            assert ("M1:P1:PM1", timestamp) in loaded
+        assert ("M1:P1:PM1", 60) not in index
+        assert ("M1:P1:PM2", 20) in loaded
+        assert ("M1:P1:PM2", 10) not in index
+        assert ("M1:P2:PM1", 10) not in index
+
+
+def test_cli_index_spectra_fetches_only_new_spectra(tmp_path):
+    """
+    Test that indexing the spectra of a tag again only fetches the spectra that
+    are not in the index yet.
+    """
+    device = StandInDevice(n_captures=3, n_samples=2048)
+    times = [timestamp_to_iso_string(t) for t in device.timestamps]
+    store = tmp_path / "store"
+    index_path = tmp_path / "index.npz"
+    args = ["index-spectra", "-p", "M1:P1:PM1", "-i", str(index_path)]
+    env = {"HOST": "h", "ID": "t8", "T8_SOURCE": "archive", "T8_STORE": str(store)}
+
+    with StandInServer({"t8": device}) as server:
+        params = server.params(machine="M1", point="P1", pmode="PM1")
+        for time in times[:2]:
+            with Recorder(str(store)) as recorder:
+                get_data.get_spectrum_capture(**params, time=time, source=recorder)
+        result = CliRunner().invoke(cli, args, env=env)
+        assert result.exit_code == 0, result.output
+        assert "Added 2 spectra, the index has 2 spectra" in result.output
+
+        with Recorder(str(store)) as recorder:
+            get_data.get_spectrum_capture(**params, time=times[2], source=recorder)
+
+    get_spectrum_capture = get_data.get_spectrum_capture
+    with mock.patch.object(
+        get_data, "get_spectrum_capture", wraps=get_spectrum_capture
+    ) as fetch:
+        result = CliRunner().invoke(cli, args, env=env)
+
+    assert result.exit_code == 0, result.output
+    assert "Added 1 spectra, the index has 3 spectra" in result.output
+    assert [call.kwargs["time"] for call in fetch.call_args_list] == [times[2]]
@@ -0,0 +1,185 @@
+import sys
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from zlib import compress
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+
+from t8_client import get_data
+from t8_client.cli import cli
+from t8_client.exceptions import T8FatalError
+from t8_client.sources import (
+    ArchiveSource,
+    CachedSource,
+    DataSource,
+    HttpSource,
+    Recorder,
+    open_source,
+)
+
+CONNECTION = {
+    "host": "example.com",
+    "id": "t8",
+    "machine": "M1",
+    "point": "P1",
+    "pmode": "PM1",
+    "t8_user": "user",
+    "t8_password": "password",
+}
+TIMES = ["2019-04-10T14:48:44", "2019-04-10T14:49:44", "2019-04-10T14:50:44"]
+
+
+def record(root):
+    """
+    Records three waves of a mocked T8 into a payload store with a `Recorder`.
+    """
+    responses = [
+        {
+            "data": b64encode(compress(np.full(4, i, dtype=np.int16).tobytes())),
+            "factor": 0.5,
+            "sample_rate": 2560,
+        }
+        for i in range(len(TIMES))
+    ]
+    with Recorder(str(root)) as recorder, patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        for time, response in zip(TIMES, responses, strict=True):
+            mock_get.return_value.json.return_value = response
+            get_data.get_wave(**CONNECTION, time=time, source=recorder)
+        # Already recorded: served from the store
+        get_data.get_wave(**CONNECTION, time=TIMES[0], source=recorder)
+        assert mock_get.call_count == len(TIMES)
+
+
+def test_archive_replays_recording(tmp_path):
+    """
+    Test that the captures recorded from live traffic are replayed by an
+    `ArchiveSource` through the `get_data` functions, with time range slicing and
+    without any request.
+    """
+    record(tmp_path)
+
+    with ArchiveSource(str(tmp_path)) as archive, patch("requests.get") as mock_get:
+        params = {**CONNECTION, "source": archive}
+
+        assert list(get_data.get_wave_list(**params)) == TIMES
+        assert list(get_data.list_captures("waves", TIMES[1], None, **params)) == [
+            TIMES[1],
+            TIMES[2],
+        ]
+        assert list(get_data.list_captures("waves", None, TIMES[0], **params)) == [
+            TIMES[0]
+        ]
+        waveform, sample_rate = get_data.get_wave(**params, time=TIMES[2])
+        np.testing.assert_array_equal(waveform, [1.0, 1.0, 1.0, 1.0])
+        assert sample_rate == 2560
+
+        captures = list(archive.captures("waves", TIMES[1], **CONNECTION))
+        assert [capture.time for capture in captures] == TIMES[1:]
+
+        with pytest.raises(T8FatalError, match="not in the local store"):
+            get_data.get_spectrum(**params, time=TIMES[0])
+        mock_get.assert_not_called()
+
+    with ArchiveSource(str(tmp_path), device="t8") as archive:
+        other = {**CONNECTION, "id": "another", "source": archive}
+        assert list(get_data.get_wave_list(**other)) == TIMES
+
+
+def test_cached_source_keeps_recent_captures(tmp_path):
+    """
+    Test that a `CachedSource` returns the same decoded capture without asking
+    the wrapped source again, and drops the least recently used captures.
+    """
+    record(tmp_path)
+
+    with CachedSource(ArchiveSource(str(tmp_path)), max_captures=2) as cached:
+        first = cached.get_capture("waves", **CONNECTION, time=TIMES[0])
+        np.testing.assert_array_equal(first.data, [0.0, 0.0, 0.0, 0.0])
+        assert cached.get_capture("waves", **CONNECTION, time=TIMES[0]) is first
+        assert first.is_decoded
+
+        cached.get_capture("waves", **CONNECTION, time=TIMES[1])
+        cached.get_capture("waves", **CONNECTION, time=TIMES[0])
+        cached.get_capture("waves", **CONNECTION, time=TIMES[2])
+        assert cached.get_capture("waves", **CONNECTION, time=TIMES[0]) is first
+        assert list(cached.list_captures("waves", **CONNECTION)) == TIMES
+
+
+def test_cached_source_concurrent_access():
+    """
+    Test that a `CachedSource` shared by many threads returns the capture of
+    every key and never keeps more than `max_captures` captures.
+    """
+
+    class KeySource(DataSource):
+        def list_captures(self, kind, start=None, end=None, **kwargs):
+            return iter([])
+
+        def get_capture(self, kind, **kwargs):
+            return (kind, kwargs["time"])
+
+    cached = CachedSource(KeySource(), max_captures=4)
+
+    def get_captures(seed):
+        rng = np.random.default_rng(seed)
+        for time in rng.integers(0, 8, 20000).tolist():
+            assert cached.get_capture("waves", **CONNECTION, time=time) == (
+                "waves",
+                time,
+            )
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(get_captures, range(8)))
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert len(cached._captures) <= 4
+
+
+def test_open_source():
+    """
+    Test that sources are created from their configuration names, that the
+    sources that need an archive reject a missing one, and that a source must
+    implement both the listing and the fetching of captures.
+    """
+    assert isinstance(open_source(), HttpSource)
+    with pytest.raises(TypeError):
+        DataSource()
+    with pytest.raises(ValueError):
+        open_source("archive")
+    with pytest.raises(ValueError):
+        open_source("ftp")
+
+
+def test_cli_switches_source_with_config(tmp_path):
+    """
+    Test that the CLI replays an archive when configured only through the
+    T8_SOURCE and T8_STORE variables.
+    """
+    record(tmp_path)
+    env = {
+        "HOST": "example.com",
+        "ID": "t8",
+        "T8_USER": "user",
+        "T8_PASSWORD": "password",
+        "T8_SOURCE": "archive",
+        "T8_STORE": str(tmp_path),
+    }
+
+    with patch("requests.get") as mock_get:
+        result = CliRunner().invoke(cli, ["list-waves", "-p", "M1:P1:PM1"], env=env)
+
+    assert result.exit_code == 0
+    assert result.output.split() == TIMES
+    mock_get.assert_not_called()
+
+    result = CliRunner().invoke(
+        cli, ["--source", "archive", "list-waves", "-p", "M1:P1:PM1"], env={}
+    )
+    assert result.exit_code != 0
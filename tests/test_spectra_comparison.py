@@ -0,0 +1,62 @@
+import csv
+from unittest import mock
+
+from click.testing import CliRunner
+
+from benchmarks.stand_in_server import StandInDevice, StandInServer
+from scripts.spectra_comparison import main
+from t8_client import get_data
+from t8_client.sources import Recorder
+from t8_client.util.timestamp import timestamp_to_iso_string
+
+
+def test_spectra_comparison_from_store(tmp_path):
+    """
+    Test that the spectra comparison runs offline on captures recorded from a
+    stand-in T8, writes the metrics and a plot for every compared capture, and
+    reports the captures that cannot be compared without aborting the others.
+
+    The waves of three captures are recorded, but the spectrum of the last one is
+    not, so fetching it fails, and the spectrum of the second one is corrupt, so
+    decoding it fails.
+    """
+    device = StandInDevice(n_captures=3, n_samples=2048)
+    times = [timestamp_to_iso_string(t) for t in device.timestamps]
+    store = tmp_path / "store"
+
+    with StandInServer({"t8": device}) as server, Recorder(str(store)) as recorder:
+        params = server.params(machine="M1", point="P1", pmode="PM1")
+        for time in times:
+            get_data.get_wave_capture(**params, time=time, source=recorder)
+        for time in times[:2]:
+            get_data.get_spectrum_capture(**params, time=time, source=recorder)
+
+    output = tmp_path / "output"
+    args = ["--offline", "--store", str(store), "-T", "M1:P1:PM1", "-o", str(output)]
+    get_spectrum_capture = get_data.get_spectrum_capture
+
+    def corrupt_second_spectrum(**kwargs):
+        if kwargs["time"] == times[1]:
+            raise ValueError("Corrupt payload")
+        return get_spectrum_capture(**kwargs)
+
+    with mock.patch.object(
+        get_data, "get_spectrum_capture", side_effect=corrupt_second_spectrum
+    ):
+        result = CliRunner().invoke(
+            main,
+            [*args, *(f"--time={time}" for time in times), "--plots", "-j", "2"],
+            env={"HOST": params["host"], "ID": params["id"]},
+        )
+
+    assert result.exit_code == 0, result.output
+    assert f"M1:P1:PM1 {times[1]} error: ValueError('Corrupt payload')" in (
+        result.output
+    )
+    assert f"M1:P1:PM1 {times[2]} error" in result.output
+    assert "Compared 1 of 3 captures" in result.output
+    with open(output / "metrics.csv", newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["time"] for row in rows] == times[:1]
+    plots = sorted(path.name for path in (output / "plots").iterdir())
+    assert plots == [f"M1_P1_PM1_{times[0].replace(':', '-')}.png"]
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+from scipy.fft import fft, fftfreq
+
+from benchmarks.stand_in_server import make_payload
+from t8_client.capture import WaveCapture
+from t8_client.spectrum import calculate_spectrum
+from t8_client.util.decoder import zint_to_float
+from t8_client.waveform import preprocess_waveform
+
+SAMPLE_RATE = 2560
+
+
+def waveforms(n_waveforms=4, n_samples=10000):
+    """
+    Builds a batch of float32 waveforms with a few harmonics and noise, scaled like
+    the int16 captures decoded from the T8.
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(n_samples) / SAMPLE_RATE
+    waves = [
+        3 * np.sin(2 * np.pi * 50 * (i + 1) * t)
+        + np.sin(2 * np.pi * 313 * t)
+        + 0.05 * rng.standard_normal(n_samples)
+        for i in range(n_waveforms)
+    ]
+    return np.round(np.array(waves) * 8000).astype(np.float32) / np.float32(8000)
+
+
+def reference_spectrum(waveform, sample_rate, fmin, fmax):
+    """
+    The original full complex FFT implementation of `calculate_spectrum`, in
+    float64.
+    """
+    spectrum = fft(waveform, axis=-1) * 2 * np.sqrt(2)
+    magnitude = np.abs(spectrum) / spectrum.shape[-1]
+    freqs = fftfreq(waveform.shape[-1], 1 / sample_rate)
+    in_range = (freqs >= fmin) & (freqs <= fmax)
+    return magnitude[..., in_range], freqs[in_range]
+
+
+@pytest.mark.parametrize("n_samples", [1000, 1001])
+def test_calculate_spectrum_matches_full_fft(n_samples):
+    """
+    Test that the real FFT path returns the same bins as the full complex FFT, for
+    even and odd lengths and a range that reaches the Nyquist frequency.
+    """
+    waveform = waveforms(1, n_samples)[0].astype(np.float64)
+
+    spectrum, freqs = calculate_spectrum(waveform, SAMPLE_RATE, 0, SAMPLE_RATE)
+    expected, expected_freqs = reference_spectrum(waveform, SAMPLE_RATE, 0, SAMPLE_RATE)
+
+    np.testing.assert_array_equal(freqs, expected_freqs)
+    np.testing.assert_allclose(spectrum, expected, rtol=1e-12, atol=1e-15)
+
+
+def test_calculate_spectrum_accepts_lists():
+    """
+    Test that waveforms given as lists are processed like arrays.
+    """
+    waveform = waveforms(1, 1000)[0].astype(np.float64)
+
+    spectrum, freqs = calculate_spectrum(
+        preprocess_waveform(waveform.tolist()), SAMPLE_RATE, 0, 1000
+    )
+    expected, expected_freqs = calculate_spectrum(
+        preprocess_waveform(waveform), SAMPLE_RATE, 0, 1000
+    )
+
+    np.testing.assert_array_equal(freqs, expected_freqs)
+    np.testing.assert_array_equal(spectrum, expected)
+    np.testing.assert_array_equal(
+        calculate_spectrum(waveform.tolist(), SAMPLE_RATE, 0, 1000)[0],
+        calculate_spectrum(waveform, SAMPLE_RATE, 0, 1000)[0],
+    )
+
+
+def test_float64_is_the_default_precision():
+    """
+    Test that float32 waveforms are still processed in float64 unless single
+    precision is requested.
+    """
+    waveform = waveforms(1)[0]
+
+    preprocessed = preprocess_waveform(waveform)
+    spectrum, _ = calculate_spectrum(preprocessed, SAMPLE_RATE, 0, 1000)
+
+    assert preprocessed.dtype == np.float64
+    assert spectrum.dtype == np.float64
+
+
+def test_float32_precision_end_to_end():
+    """
+    Test that the float32 mode keeps the waveforms decoded from T8 payloads, the
+    preprocessed waveforms and the spectra in single precision, with an accuracy
+    loss bounded against the float64 path.
+
+    Asserts:
+        - Every stage returns float32 and the frequencies are unchanged.
+        - The error of every bin is below 1e-5 of the peak of the spectrum.
+        - The peaks are found at the same frequencies.
+    """
+    payloads = [make_payload(waveform) for waveform in waveforms()]
+    assert zint_to_float(payloads[0][0]).dtype == np.float32
+    captures = [
+        WaveCapture.from_response(
+            {"data": data, "factor": factor, "sample_rate": SAMPLE_RATE},
+            "M1",
+            "P1",
+            "PM1",
+            0,
+        )
+        for data, factor in payloads
+    ]
+    batch = np.stack([capture.data for capture in captures])
+    assert batch.dtype == np.float32
+
+    single, freqs = calculate_spectrum(
+        preprocess_waveform(batch, dtype=np.float32), SAMPLE_RATE, 0, 1000
+    )
+    double, double_freqs = calculate_spectrum(
+        preprocess_waveform(batch), SAMPLE_RATE, 0, 1000
+    )
+
+    assert preprocess_waveform(batch, dtype=np.float32).dtype == np.float32
+    assert single.dtype == np.float32
+    np.testing.assert_array_equal(freqs, double_freqs)
+    peak = double.max(axis=-1, keepdims=True)
+    assert np.max(np.abs(single - double) / peak) < 1e-5
+    np.testing.assert_array_equal(single.argmax(axis=-1), double.argmax(axis=-1))
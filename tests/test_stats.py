@@ -0,0 +1,88 @@
+import zlib
+
+import numpy as np
+from click.testing import CliRunner
+from scipy.stats import kurtosis
+
+from t8_client.capture import WaveCapture
+from t8_client.cli import cli
+from t8_client.stats import STATISTICS, StreamingStatistics, capture_statistics
+from t8_client.store import PayloadStore
+from t8_client.util.decoder import iter_int16_chunks
+
+
+def test_iter_int16_chunks():
+    """
+    Test that chunked decompression returns the same integers as decompressing the
+    whole payload, in chunks of at most the requested size.
+    """
+    samples = np.arange(-5000, 5001, dtype=np.int16)
+    payload = zlib.compress(samples.tobytes())
+
+    chunks = list(iter_int16_chunks(payload, chunk_size=999))
+
+    assert max(len(chunk) for chunk in chunks) <= 1000
+    np.testing.assert_array_equal(np.concatenate(chunks), samples)
+    assert list(iter_int16_chunks(zlib.compress(b""))) == []
+
+
+def test_streaming_statistics_match_full_array():
+    """
+    Test that the overall values accumulated chunk by chunk, with the factor only
+    applied at the end, match those computed on the whole scaled wave, also for a
+    large offset that ruins naive power sums.
+    """
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_t(5, 100_003) * 100 + 30_000).clip(-32768, 32767)
+    samples = samples.astype(np.int16)
+    capture = WaveCapture(
+        "M1", "P1", "PM1", 0, zlib.compress(samples.tobytes()), 0.01, 2560
+    )
+
+    values = capture_statistics(capture, chunk_size=4096)
+    assert not capture.is_decoded
+
+    wave = samples * 0.01
+    rms = np.sqrt(np.mean(wave**2))
+    expected = {
+        "rms": rms,
+        "peak": np.max(np.abs(wave)),
+        "peak_to_peak": np.ptp(wave),
+        "crest_factor": np.max(np.abs(wave)) / rms,
+        "kurtosis": kurtosis(wave, fisher=False),
+    }
+    for name in STATISTICS:
+        np.testing.assert_allclose(values[name], expected[name], rtol=1e-9)
+
+    merged = (
+        StreamingStatistics()
+        .update(samples[:10])
+        .merge(StreamingStatistics().update(samples[10:]))
+    )
+    merged = merged.result(0.01)
+    for name in STATISTICS:
+        np.testing.assert_allclose(merged[name], values[name], rtol=1e-12)
+    assert np.isnan(StreamingStatistics().result()["rms"])
+
+
+def test_cli_stats(tmp_path):
+    """
+    Test that the stats command prints the overall values of every wave within
+    the time range as CSV.
+    """
+    with PayloadStore(tmp_path) as store:
+        for timestamp, samples in [(100, [1, -1]), (200, [2, -2]), (300, [4, 0])]:
+            payload = zlib.compress(np.array(samples, dtype=np.int16).tobytes())
+            store.put("t8", WaveCapture("M1", "P1", "PM1", timestamp, payload, 0.5, 10))
+
+    env = {"HOST": "h", "ID": "t8", "T8_SOURCE": "archive", "T8_STORE": str(tmp_path)}
+    result = CliRunner().invoke(
+        cli, ["stats", "-p", "M1:P1:PM1", "-s", "1970-01-01T00:03:00"], env=env
+    )
+
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == [
+        "time,rms,peak,peak_to_peak,crest_factor,kurtosis",
+        "1970-01-01T00:03:20,1,1,2,1,1",
+        "1970-01-01T00:05:00,1.41421,2,2,1.41421,1",
+    ]
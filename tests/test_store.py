@@ -0,0 +1,157 @@
+import multiprocessing
+from base64 import b64encode
+from unittest.mock import patch
+from zlib import compress
+
+import numpy as np
+import pytest
+
+from t8_client import get_data
+from t8_client.capture import SpectrumCapture, WaveCapture
+from t8_client.exceptions import T8FatalError
+from t8_client.store import PayloadStore
+
+KWARGS = {
+    "host": "example.com",
+    "id": "test_id",
+    "machine": "M1",
+    "point": "P1",
+    "pmode": "PM1",
+    "time": "2019-04-10T14:48:44",
+    "t8_user": "user",
+    "t8_password": "password",
+}
+
+
+def payload(samples):
+    return compress(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+def test_store_round_trip_and_reopen(tmp_path):
+    """
+    Test that stored waves and spectra are returned with their payload and metadata,
+    also after reopening the store, and that a capture is only stored once.
+    """
+    wave = WaveCapture("M1", "P1", "PM1", 1554907724, payload([1, -2, 3]), 0.5, 2560)
+    spectrum = SpectrumCapture(
+        "M1", "P1", "PM1", 1554907724, payload([4, 5]), 0.25, 10, 1000
+    )
+
+    with PayloadStore(tmp_path) as store:
+        assert store.put("t8", wave)
+        assert store.put("t8", spectrum)
+        assert not store.put("t8", wave)
+
+    with PayloadStore(tmp_path) as store:
+        assert len(store) == 2
+        assert ("t8", "waves", "M1", "P1", "PM1", 1554907724) in store
+
+        stored_wave = store.get("t8", "waves", "M1", "P1", "PM1", 1554907724)
+        assert isinstance(stored_wave, WaveCapture)
+        assert stored_wave.payload == wave.payload
+        assert stored_wave.sample_rate == 2560
+        np.testing.assert_array_equal(stored_wave.data, [0.5, -1.0, 1.5])
+
+        stored_spectrum = store.get("t8", "spectra", "M1", "P1", "PM1", 1554907724)
+        assert (stored_spectrum.fmin, stored_spectrum.fmax) == (10, 1000)
+        np.testing.assert_array_equal(
+            store.read_samples("t8", "spectra", "M1", "P1", "PM1", 1554907724), [4, 5]
+        )
+
+        assert store.get("t8", "waves", "M1", "P1", "PM1", 0) is None
+        assert store.get("other", "waves", "M1", "P1", "PM1", 1554907724) is None
+
+
+def test_store_reads_while_growing_and_skips_torn_index_lines(tmp_path):
+    """
+    Test that captures added after the data file was mapped can be read, and that
+    an index line left incomplete by an interrupted write is ignored on reopen
+    without corrupting the next record.
+    """
+    with PayloadStore(tmp_path) as store:
+        for i in range(3):
+            capture = WaveCapture("M1", "P1", "PM1", i, payload([i] * 100), 1.0, 2560)
+            store.put("t8", capture)
+            assert store.read_samples("t8", "waves", "M1", "P1", "PM1", i)[0] == i
+        assert store.timestamps("t8", "waves", "M1", "P1", "PM1") == [0, 1, 2]
+
+    with open(tmp_path / PayloadStore.INDEX_FILE, "a") as file:
+        file.write('{"device": "t8", "kind"')
+
+    with PayloadStore(tmp_path) as store:
+        assert len(store) == 3
+        store.put("t8", WaveCapture("M1", "P1", "PM1", 3, payload([3]), 1.0, 2560))
+
+    with PayloadStore(tmp_path) as store:
+        assert store.timestamps("t8", "waves", "M1", "P1", "PM1") == [0, 1, 2, 3]
+
+
+def record_waves(root, first, count):
+    """
+    Stores a range of waves in a store, as a separate process would.
+    """
+    with PayloadStore(root) as store:
+        for i in range(first, first + count):
+            store.put("t8", WaveCapture("M1", "P1", "PM1", i, payload([i] * 50), 1, 2))
+
+
+def test_store_shared_between_processes(tmp_path):
+    """
+    Test that captures appended concurrently by several processes are all indexed
+    with intact payloads, and that an open store finds the captures recorded by
+    other processes without being reopened.
+    """
+    with PayloadStore(tmp_path) as store:
+        assert store.timestamps("t8", "waves", "M1", "P1", "PM1") == []
+
+        processes = [
+            multiprocessing.Process(target=record_waves, args=(tmp_path, i * 20, 20))
+            for i in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            assert process.exitcode == 0
+
+        assert store.timestamps("t8", "waves", "M1", "P1", "PM1") == list(range(80))
+        for i in range(80):
+            samples = store.read_samples("t8", "waves", "M1", "P1", "PM1", i)
+            np.testing.assert_array_equal(samples, [i] * 50)
+        assert not store.put("t8", WaveCapture("M1", "P1", "PM1", 0, b"", 1, 2))
+        assert len(store) == 80
+
+
+def test_get_data_fills_and_serves_from_store(tmp_path):
+    """
+    Test that the capture functions add every fetched capture to the store and
+    then serve it without any request, and that in offline mode the listings come
+    from the store and missing captures fail without contacting the T8.
+    """
+    samples = np.array([1, 2, 3, 4], dtype=np.int16)
+    response = {
+        "data": b64encode(compress(samples.tobytes())).decode(),
+        "factor": 2.0,
+        "sample_rate": 2560,
+    }
+
+    with PayloadStore(tmp_path) as store, patch("requests.get") as mock_get:
+        mock_get.return_value.status_code = 200
+        mock_get.return_value.json.return_value = response
+
+        waveform, sample_rate = get_data.get_wave(**KWARGS, store=store)
+        assert mock_get.call_count == 1
+
+        cached, _ = get_data.get_wave(**KWARGS, store=store)
+        assert mock_get.call_count == 1
+
+        offline = {**KWARGS, "store": store, "offline": True}
+        assert list(get_data.get_wave_list(**offline)) == [KWARGS["time"]]
+        assert list(get_data.get_spectra(**offline)) == []
+        with pytest.raises(T8FatalError, match="not in the local store"):
+            get_data.get_spectrum(**offline)
+        assert mock_get.call_count == 1
+
+    np.testing.assert_array_equal(waveform, [2.0, 4.0, 6.0, 8.0])
+    np.testing.assert_array_equal(cached, waveform)
+    assert sample_rate == 2560
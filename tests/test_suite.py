@@ -0,0 +1,72 @@
+import json
+
+from click.testing import CliRunner
+
+from benchmarks.suite import compare_results, main
+
+
+def results(**timings) -> dict:
+    """
+    Builds the results of a suite run from the minimum seconds per call of every
+    benchmark.
+    """
+    return {
+        "results": {
+            f"{name}[1024]": {"min": seconds, "median": 2 * seconds}
+            for name, seconds in timings.items()
+        }
+    }
+
+
+def test_compare_results():
+    """
+    Test that benchmarks are classified by the ratio of their timings against the
+    threshold, and that benchmarks missing from either run are reported.
+    """
+    baseline = results(faster=1.0, slower=1.0, noisy=1.0, dropped=1.0)
+    current = results(faster=0.5, slower=1.2, noisy=1.05, added=1.0)
+
+    rows = compare_results(baseline, current, threshold=0.1)
+
+    assert rows == [
+        ("faster[1024]", 1.0, 0.5, 0.5, "improvement"),
+        ("slower[1024]", 1.0, 1.2, 1.2, "regression"),
+        ("noisy[1024]", 1.0, 1.05, 1.05, "unchanged"),
+        ("dropped[1024]", 1.0, None, None, "removed"),
+        ("added[1024]", None, 1.0, None, "new"),
+    ]
+    assert compare_results(baseline, current, threshold=0.5)[1][4] == "unchanged"
+    assert compare_results(baseline, current, statistic="median")[0][1:3] == (2, 1)
+
+
+def test_compare_exit_code(tmp_path):
+    """
+    Test that the `compare` command only fails when a benchmark regressed by more
+    than the threshold.
+    """
+    files = {}
+    for name, timings in [
+        ("before", results(fetch=1.0, decode=1.0)),
+        ("faster", results(fetch=0.5, decode=1.0, parse=1.0)),
+        ("slower", results(fetch=1.5)),
+    ]:
+        files[name] = tmp_path / f"{name}.json"
+        files[name].write_text(json.dumps(timings))
+
+    runner = CliRunner()
+    result = runner.invoke(
+        main, ["compare", str(files["before"]), str(files["faster"])]
+    )
+    assert result.exit_code == 0, result.output
+    assert "improvement" in result.output
+
+    result = runner.invoke(
+        main, ["compare", str(files["before"]), str(files["slower"])]
+    )
+    assert result.exit_code == 1
+    assert "1 benchmarks regressed by more than 10%" in result.output
+
+    result = runner.invoke(
+        main, ["compare", str(files["before"]), str(files["slower"]), "-t", "0.6"]
+    )
+    assert result.exit_code == 0, result.output
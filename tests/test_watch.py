@@ -0,0 +1,178 @@
+from unittest.mock import patch
+
+import pytest
+
+from t8_client.exceptions import T8FatalError, T8RetryableError
+from t8_client.watch import parse_tag, watch
+
+CONNECTION = {
+    "host": "example.com",
+    "id": "test_id",
+    "t8_user": "user",
+    "t8_password": "password",
+}
+
+
+class FakeClock:
+    """
+    Clock whose time only advances when `sleep` is called, so that the scheduler
+    can be tested without waiting.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_parse_tag():
+    """
+    Test that combined tags are split into machine, point and processing mode, and
+    that malformed tags are rejected.
+    """
+    assert parse_tag("M1:P1:PM1") == ("M1", "P1", "PM1")
+    with pytest.raises(ValueError):
+        parse_tag("M1:P1")
+
+
+def test_watch_yields_only_new_captures():
+    """
+    Test that `watch` primes the last seen timestamp on the first poll and then
+    yields each capture that appears afterwards exactly once, in order.
+
+    The mocked listing returns one old capture on the first poll and two new ones
+    from the second poll onwards.
+
+    Asserts:
+        - Only the two new captures are yielded.
+        - `get_wave` is called once per new capture with the right time.
+    """
+    listings = [
+        ["2019-04-10T14:48:44"],
+        ["2019-04-10T14:48:44", "2019-04-10T14:49:28", "2019-04-10T14:49:24"],
+    ]
+    clock = FakeClock()
+
+    with (
+        patch("t8_client.get_data.get_wave_list") as mock_list,
+        patch("t8_client.get_data.get_wave") as mock_get,
+    ):
+        mock_list.side_effect = lambda **kwargs: listings[
+            min(mock_list.call_count, 2) - 1
+        ]
+        mock_get.side_effect = lambda **kwargs: ([kwargs["time"]], 2560)
+
+        events = list(
+            watch(
+                ["M1:P1:PM1"],
+                max_events=2,
+                sleep=clock.sleep,
+                clock=clock,
+                **CONNECTION,
+            )
+        )
+
+    assert [event[2] for event in events] == [
+        "2019-04-10T14:49:24",
+        "2019-04-10T14:49:28",
+    ]
+    assert events[0][:2] == ("waves", "M1:P1:PM1")
+    assert events[0][3] == (["2019-04-10T14:49:24"], 2560)
+    assert mock_get.call_count == 2
+
+
+def test_watch_backs_off_while_idle():
+    """
+    Test that the polling interval of a tag grows by the backoff factor while no
+    new captures appear, up to the maximum interval.
+
+    Asserts:
+        - The waits between polls are 2, 4, 8 and then capped at 10 seconds.
+    """
+    clock = FakeClock()
+
+    with patch("t8_client.get_data.get_spectra") as mock_list:
+        mock_list.return_value = ["2019-04-10T14:48:44"]
+
+        def sleep(seconds):
+            clock.sleep(seconds)
+            if len(clock.sleeps) == 5:
+                raise KeyboardInterrupt
+
+        generator = watch(
+            ["M1:P1:PM1"],
+            kinds=("spectra",),
+            min_interval=1.0,
+            max_interval=10.0,
+            jitter=0.0,
+            sleep=sleep,
+            clock=clock,
+            **CONNECTION,
+        )
+        with pytest.raises(KeyboardInterrupt):
+            next(generator)
+
+    assert clock.sleeps == [2.0, 4.0, 8.0, 10.0, 10.0]
+
+
+def test_watch_isolates_failing_tags():
+    """
+    Test that a tag whose listing fails with a non-retryable error is reported and
+    no longer polled while the other tags keep being watched, and that a capture
+    that fails to be fetched is retried with backoff.
+
+    Asserts:
+        - The error of the failing tag is yielded once, without a time.
+        - The busy capture is yielded after its retry, and the poll that failed to
+          fetch it is followed by a longer wait.
+    """
+    listings = {
+        "P1": [["2019-04-10T14:48:44"], ["2019-04-10T14:48:44", "2019-04-10T14:49:24"]],
+    }
+    calls = {"P1": 0, "P2": 0}
+    fetches = []
+    clock = FakeClock()
+
+    def list_waves(**kwargs):
+        point = kwargs["point"]
+        calls[point] += 1
+        if point == "P2":
+            raise T8FatalError("Unknown point", status_code=404)
+        return listings[point][min(calls[point], 2) - 1]
+
+    def get_wave(**kwargs):
+        fetches.append(clock.now)
+        if len(fetches) == 1:
+            raise T8RetryableError("Busy", status_code=503)
+        return [kwargs["time"]], 2560
+
+    with (
+        patch("t8_client.get_data.get_wave_list", side_effect=list_waves),
+        patch("t8_client.get_data.get_wave", side_effect=get_wave),
+    ):
+        events = list(
+            watch(
+                ["M1:P1:PM1", "M1:P2:PM1"],
+                max_events=1,
+                min_interval=1.0,
+                jitter=0.0,
+                sleep=clock.sleep,
+                clock=clock,
+                **CONNECTION,
+            )
+        )
+
+    assert len(events) == 2
+    kind, tag, time, error = events[0]
+    assert (kind, tag, time) == ("waves", "M1:P2:PM1", None)
+    assert isinstance(error, T8FatalError)
+    assert events[1][1:3] == ("M1:P1:PM1", "2019-04-10T14:49:24")
+    assert calls["P2"] == 1
+    # Idle first poll, then 2 s later a busy fetch, retried after 4 s
+    assert fetches == [2.0, 6.0]